@@ -0,0 +1,55 @@
+"""Scaling curve for sharded scoring by worker count.
+
+    python benchmarks/bench_parallel.py [--size 200000] [--queries 50]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from factories import recommend_factories
+from parallel import shutdown_pools
+from synthetic import generate_requirements, write_catalog
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "factories.json")
+        write_catalog(path, args.size)
+        queries = generate_requirements(args.queries)
+        # Load, index and columnise the catalog outside the timed region
+        recommend_factories(queries[0], path=path, backend="vectorized")
+
+        start = time.perf_counter()
+        for req in queries:
+            recommend_factories(req, path=path, backend="vectorized")
+        baseline = (time.perf_counter() - start) / len(queries)
+        print(f"catalog={args.size} queries={len(queries)}")
+        print(f"{'workers':>8} {'ms/query':>10} {'speedup':>8}")
+        print(f"{'serial':>8} {baseline * 1000:>10.2f} {1.0:>8.2f}")
+
+        workers = 1
+        while workers <= args.max_workers:
+            # Warm-up call starts the pool so startup cost is excluded
+            recommend_factories(queries[0], path=path, workers=workers)
+            start = time.perf_counter()
+            for req in queries:
+                recommend_factories(req, path=path, workers=workers)
+            elapsed = (time.perf_counter() - start) / len(queries)
+            print(f"{workers:>8} {elapsed * 1000:>10.2f} {baseline / elapsed:>8.2f}")
+            workers *= 2
+        shutdown_pools()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Scaling benchmark for catalog load, index build and recommendation.
+
+For each catalog size a seeded synthetic catalog is generated and every phase
+is timed separately: load (cold get_catalog: parse + index), index build
+(Catalog over already-parsed factories), single recommend and batch
+recommend. Each phase reports throughput, p50/p99 latency and the peak
+traced memory of one run; everything is also written to JSON so runs can be
+diffed.
+
+    python benchmarks/bench_recommender.py [--sizes 1000 10000 100000 1000000]
+        [--queries 200] [--batch-size 100] [--repeat 3] [--out results.json]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from catalog import Catalog, get_catalog, invalidate_catalog_cache
+from factories import recommend_factories, recommend_factories_batch
+from synthetic import SIZES, generate_requirements, write_catalog
+
+
+def _percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, round(q * (len(ordered) - 1)))]
+
+
+def _peak_memory(fn):
+    """Peak bytes allocated by Python while running `fn` once."""
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(fn, repeat, items_per_call=1):
+    """Time `fn` `repeat` times, then trace one extra run for peak memory.
+
+    Tracing slows allocation-heavy code, so latencies come from untraced runs.
+    """
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return {
+        "runs": repeat,
+        "throughput_per_s": items_per_call * repeat / sum(samples),
+        "p50_ms": _percentile(samples, 0.50) * 1000,
+        "p99_ms": _percentile(samples, 0.99) * 1000,
+        "peak_memory_bytes": _peak_memory(fn),
+    }
+
+
+def bench_size(size, queries, batch_size, repeat, seed=0):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "factories.json")
+        write_catalog(path, size, seed=seed)
+
+        def load():
+            invalidate_catalog_cache(path)
+            get_catalog(path)
+
+        results = {"load": measure(load, repeat, items_per_call=size)}
+        factories = get_catalog(path).factories
+        results["index_build"] = measure(lambda: Catalog(factories), repeat, items_per_call=size)
+
+        reqs = generate_requirements(queries, seed=seed + 1)
+        pending = iter(reqs * 2)
+        results["recommend"] = measure(lambda: recommend_factories(next(pending), path=path), len(reqs))
+
+        batches = [reqs[i:i + batch_size] for i in range(0, len(reqs), batch_size)]
+        # Build the columnar arrays outside the timed region, as a long-lived process would
+        recommend_factories_batch(batches[0], path=path)
+        pending_batches = iter(batches * (repeat + 2))
+        results["recommend_batch"] = measure(
+            lambda: recommend_factories_batch(next(pending_batches), path=path),
+            max(repeat, len(batches)),
+            items_per_call=len(batches[0]),
+        )
+        invalidate_catalog_cache(path)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3, help="runs of the load and index phases")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="bench_recommender.json")
+    args = parser.parse_args()
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "seed": args.seed,
+        "queries": args.queries,
+        "batch_size": args.batch_size,
+        "sizes": {},
+    }
+    print(f"{'size':>9} {'phase':<16} {'items/s':>12} {'p50 ms':>10} {'p99 ms':>10} {'peak MiB':>9}")
+    for size in args.sizes:
+        results = bench_size(size, args.queries, args.batch_size, args.repeat, seed=args.seed)
+        report["sizes"][str(size)] = results
+        for phase, r in results.items():
+            print(
+                f"{size:>9} {phase:<16} {r['throughput_per_s']:>12.1f} {r['p50_ms']:>10.2f} "
+                f"{r['p99_ms']:>10.2f} {r['peak_memory_bytes'] / 2**20:>9.1f}"
+            )
+
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
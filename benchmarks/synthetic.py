@@ -0,0 +1,112 @@
+"""Seeded synthetic factory catalogs that follow the mock catalog's distributions.
+
+Vocabulary frequencies (product types, materials, certifications, geography,
+cost tier), list lengths and the MOQ distribution are all sampled from
+data/factories.json, so a synthetic catalog has the same shape as the real
+one at any size. The same (size, seed) always produces the same catalog.
+
+    python benchmarks/synthetic.py 100000 data/synthetic_100k.json [--seed 0]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from catalog import DEFAULT_CATALOG_PATH
+from model.requirements import ManufacturingRequirements
+
+SIZES = (1_000, 10_000, 100_000, 1_000_000)
+
+_NAME_PREFIXES = ("Blue", "Golden", "Summit", "River", "Northern", "Silk", "Harbor", "Evergreen", "Prime", "Delta")
+_NAME_SUFFIXES = ("Apparel", "Textiles", "Garments", "Manufacturing", "Knitwear", "Fashion", "Mills", "Works")
+
+
+class _Distribution:
+    """Empirical distributions of every factory field in a base catalog."""
+
+    def __init__(self, records):
+        self.list_values = {}
+        self.list_lengths = {}
+        for field in ("product_types", "materials", "certifications"):
+            self.list_values[field] = [value for r in records for value in r[field]]
+            self.list_lengths[field] = [len(r[field]) for r in records]
+        self.geography = [r["geography"] for r in records]
+        self.cost_tier = [r["cost_tier"] for r in records]
+        self.moq_min = [r["moq_min"] for r in records]
+
+    def sample_list(self, rng, field):
+        length = rng.choice(self.list_lengths[field])
+        values = []
+        # Draw by frequency without repeats; the vocabulary is always larger than any list
+        while len(values) < length:
+            value = rng.choice(self.list_values[field])
+            if value not in values:
+                values.append(value)
+        return values
+
+
+def _load_distribution(base_path=None):
+    with open(base_path or DEFAULT_CATALOG_PATH) as f:
+        return _Distribution(json.load(f))
+
+
+def generate_catalog(size, seed=0, base_path=None):
+    """Return `size` factory records drawn from the base catalog's distributions."""
+    dist = _load_distribution(base_path)
+    rng = random.Random(seed)
+    width = max(6, len(str(size)))
+    return [
+        {
+            "id": f"S{i:0{width}d}",
+            "name": f"{rng.choice(_NAME_PREFIXES)} {rng.choice(_NAME_SUFFIXES)} {i}",
+            "product_types": dist.sample_list(rng, "product_types"),
+            "materials": dist.sample_list(rng, "materials"),
+            # Jitter MOQs around the observed values so the sorted MOQ index is not all ties
+            "moq_min": max(50, int(round(rng.choice(dist.moq_min) * rng.uniform(0.8, 1.2), -1))),
+            "geography": rng.choice(dist.geography),
+            "certifications": dist.sample_list(rng, "certifications"),
+            "cost_tier": rng.choice(dist.cost_tier),
+        }
+        for i in range(size)
+    ]
+
+
+def generate_requirements(count, seed=1, base_path=None):
+    """Return `count` buyer requirements drawn from the same vocabulary as the catalog."""
+    dist = _load_distribution(base_path)
+    rng = random.Random(seed)
+    return [
+        ManufacturingRequirements(
+            product_type=rng.choice(dist.list_values["product_types"]),
+            materials=dist.sample_list(rng, "materials"),
+            moq=rng.choice(dist.moq_min) * rng.randint(1, 3),
+            geography=rng.choice([None, "Asia", "Europe", rng.choice(dist.geography)]),
+            budget_tier=rng.choice([None, rng.choice(dist.cost_tier)]),
+        )
+        for _ in range(count)
+    ]
+
+
+def write_catalog(out_path, size, seed=0, base_path=None):
+    """Generate a catalog and write it as a JSON array; returns `out_path`."""
+    records = generate_catalog(size, seed=seed, base_path=base_path)
+    with open(out_path, "w") as f:
+        json.dump(records, f)
+    return out_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("size", type=int)
+    parser.add_argument("out")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    write_catalog(args.out, args.size, seed=args.seed)
+    print(f"Wrote {args.size} factories to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,11 @@
-import os
-from openai import OpenAI
-from dotenv import load_dotenv
+from model.factory import as_factory
+from llm_cache import acached_completion, cached_completion, cached_stream
+from llm_clients import DEFAULT_CONCURRENCY, async_openai_client, gather_limited, openai_client
 
-load_dotenv()
-_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+_client = openai_client()
 
-def generate_rfq(factory, req):
+def _rfq_prompt(factory, req):
+    factory = as_factory(factory)
     # Use product_description if available, otherwise fall back to product_type
     product_name = req.product_description if req.product_description else req.product_type
     
@@ -13,9 +13,9 @@ def generate_rfq(factory, req):
 Draft a professional Request for Quote (RFQ) email to the following manufacturing factory.
 
 Factory Details:
-- Name: {factory['name']}
-- Location: {factory['geography']}
-- Certifications: {', '.join(factory['certifications'])}
+- Name: {factory.name}
+- Location: {factory.geography}
+- Certifications: {', '.join(factory.certifications)}
 
 Our Requirements:
 - Product: {product_name}
@@ -35,11 +35,37 @@ The email should:
 
 Format as a ready-to-send email with subject line.
 """
+    return prompt
 
-    response = _client.chat.completions.create(
+def generate_rfq(factory, req, cache=None):
+    # Drafts are sampled, so a repeated request gets a fresh draft unless cache=True
+    return cached_completion(
+        _client,
+        cache=cache,
         model="gpt-4o-mini",
-        messages=[{"role": "user", "content": prompt}],
+        messages=[{"role": "user", "content": _rfq_prompt(factory, req)}],
         temperature=0.7
     )
 
-    return response.choices[0].message.content
+def generate_rfq_stream(factory, req, cache=None):
+    """Yield the RFQ email for `factory` as content deltas."""
+    return cached_stream(
+        _client,
+        cache=cache,
+        model="gpt-4o-mini",
+        messages=[{"role": "user", "content": _rfq_prompt(factory, req)}],
+        temperature=0.7
+    )
+
+async def agenerate_rfq(factory, req, cache=None):
+    return await acached_completion(
+        async_openai_client(),
+        cache=cache,
+        model="gpt-4o-mini",
+        messages=[{"role": "user", "content": _rfq_prompt(factory, req)}],
+        temperature=0.7
+    )
+
+async def agenerate_rfqs(factories, req, cache=None, limit=DEFAULT_CONCURRENCY):
+    """Draft RFQ emails for several factories concurrently, in the order given."""
+    return await gather_limited(*(agenerate_rfq(f, req, cache=cache) for f in factories), limit=limit)
@@ -1,8 +1,9 @@
 import streamlit as st
-from llm import chat, extract_requirements
-from factories import load_factories
-from actions import generate_rfq
-from model.requirements import ManufacturingRequirements
+from llm import chat_stream, split_rfq_trigger
+from extraction import RequirementsTracker
+from factories import load_factories, resolve_factory_name
+from geography import region_prompt_rules
+from actions import generate_rfq_stream
 import json
 import re
 
@@ -105,7 +106,7 @@ ENHANCED_SYSTEM_PROMPT = f"""
 You are an AI manufacturing concierge assistant. Your goal is to help users find the right manufacturing factory from our database.
 
 Available Factories in our Database:
-{json.dumps(factories_data, indent=2)}
+{json.dumps([f.to_dict() for f in factories_data], indent=2)}
 
 Required information to collect:
 1. product_type (e.g., electronics, consumer_goods, industrial)
@@ -120,9 +121,7 @@ Instructions:
 - Be friendly and conversational
 - Once you have enough information (at least product_type, materials, and moq), analyze ALL factories in the database above
 - IMPORTANT GEOGRAPHY RULE: If user specifies a geography preference (e.g., "Asia", "China", "Vietnam", "Europe", "USA"), you MUST prioritize factories in that region
-  * For "Asia" preference: ONLY recommend factories in China, Vietnam, Bangladesh, India, or other Asian countries
-  * For "Europe" preference: ONLY recommend factories in Europe
-  * For "USA" or "America" preference: ONLY recommend factories in USA
+{region_prompt_rules()}
   * Geographic match is CRITICAL - do NOT recommend factories outside the preferred region
 - Recommend EXACTLY the TOP 3 most suitable factories, ranked by best fit
 - Scoring criteria (in order of importance):
@@ -158,6 +157,25 @@ if "messages" not in st.session_state:
 if "requirements" not in st.session_state:
     st.session_state.requirements = None
 
+if "extraction" not in st.session_state:
+    st.session_state.extraction = RequirementsTracker()
+
+def assistant_bubble(content):
+    """HTML for an assistant message, left-aligned with the bot avatar."""
+    return f"""
+        <div style="padding: 1rem 1.5rem; 
+                    margin: 0.5rem 0;
+                    width: fit-content;
+                    max-width: 100%;">
+            <div style="display: flex; align-items: flex-start; gap: 0.8rem;">
+                <div style="font-size: 1.5rem;">🤖</div>
+                <div style="flex: 1; color: white;">
+                    {content}
+                </div>
+            </div>
+        </div>
+    """
+
 # Display chat history with custom styling for left/right alignment
 for message in st.session_state.messages:
     if message["role"] != "system":
@@ -184,19 +202,7 @@ for message in st.session_state.messages:
                 # Assistant message on the left using columns
                 col1, col2 = st.columns([4, 1])
                 with col1:
-                    st.markdown(f"""
-                        <div style="padding: 1rem 1.5rem; 
-                                    margin: 0.5rem 0;
-                                    width: fit-content;
-                                    max-width: 100%;">
-                            <div style="display: flex; align-items: flex-start; gap: 0.8rem;">
-                                <div style="font-size: 1.5rem;">🤖</div>
-                                <div style="flex: 1; color: white;">
-                                    {message["content"]}
-                                </div>
-                            </div>
-                        </div>
-                    """, unsafe_allow_html=True)
+                    st.markdown(assistant_bubble(message["content"]), unsafe_allow_html=True)
 
 # Chat input
 if prompt := st.chat_input("Type your message here..."):
@@ -220,74 +226,63 @@ if prompt := st.chat_input("Type your message here..."):
             </div>
         """, unsafe_allow_html=True)
     
-    # Get AI response
+    # Assistant bubble (left-aligned), filled in as the response streams
+    col1, col2 = st.columns([4, 1])
+    with col1:
+        bubble = st.empty()
+
+    # Get AI response; the first few tokens tell an RFQ trigger from a normal reply
     with st.spinner("🤖 Analyzing..."):
-        reply = chat(st.session_state.messages)
-        
-        # Check if AI wants to generate RFQ
-        if reply.startswith("GENERATE_RFQ:"):
+        is_rfq, reply, rest = split_rfq_trigger(chat_stream(st.session_state.messages))
+
+    if not is_rfq:
+        bubble.markdown(assistant_bubble(reply), unsafe_allow_html=True)
+        for delta in rest:
+            reply += delta
+            bubble.markdown(assistant_bubble(reply), unsafe_allow_html=True)
+    else:
+        with st.spinner("🤖 Analyzing..."):
+            # The trigger is a single short line; read the rest of it before acting
+            reply += "".join(rest)
             # Extract factory name from the response
             factory_name_match = re.search(r"GENERATE_RFQ:\s*(.+)", reply)
             if factory_name_match:
                 factory_name = factory_name_match.group(1).strip()
                 
-                # Find the factory in the database
-                factory = None
-                for f in factories_data:
-                    if f["name"].lower() in factory_name.lower() or factory_name.lower() in f["name"].lower():
-                        factory = f
-                        break
+                # Find the factory in the database (exact, then fuzzy name match)
+                factory, candidates = resolve_factory_name(factory_name)
                 
                 if factory:
-                    # Extract requirements from conversation if not already extracted
-                    if st.session_state.requirements is None:
-                        conversation_text = "\n".join(
-                            [m["content"] for m in st.session_state.messages if m["role"] != "system"]
-                        )
-                        try:
-                            raw = extract_requirements(conversation_text)
-                            req = ManufacturingRequirements(**json.loads(raw))
-                            st.session_state.requirements = req
-                        except Exception as e:
-                            st.error(f"Error extracting requirements: {e}")
-                            req = None
-                    else:
+                    # Bring requirements up to date with the turns since the last extraction
+                    try:
+                        req = st.session_state.extraction.update(st.session_state.messages)
+                        if req is None:
+                            st.error("Error extracting requirements: product type and quantity are still unknown")
+                        st.session_state.requirements = req
+                    except Exception as e:
+                        st.error(f"Error extracting requirements: {e}")
                         req = st.session_state.requirements
                     
                     if req:
-                        # Generate RFQ email
-                        rfq_email = generate_rfq(factory, req)
-                        
-                        # Create a nice formatted response
+                        # Stream the RFQ email into the bubble as it is drafted
                         rfq_response = f"📧 **Request for Quote (RFQ) Email Generated**\n\n"
-                        rfq_response += f"**To:** {factory['name']}\n\n"
+                        rfq_response += f"**To:** {factory.name}\n\n"
                         rfq_response += "---\n\n"
-                        rfq_response += rfq_email
+                        for delta in generate_rfq_stream(factory, req):
+                            rfq_response += delta
+                            bubble.markdown(assistant_bubble(rfq_response), unsafe_allow_html=True)
                         rfq_response += "\n\n---\n\n"
                         rfq_response += "Feel free to copy this email and send it to the manufacturer!"
                         
                         reply = rfq_response
+                elif candidates:
+                    names = ", ".join(f.name for f in candidates[:5])
+                    reply = f"I found several factories matching '{factory_name}': {names}. Which one would you like the RFQ for?"
                 else:
                     reply = f"I couldn't find the factory '{factory_name}' in our database. Please specify one of the recommended factories."
             else:
                 reply = "I had trouble identifying which factory you want the RFQ for. Could you please specify the factory name?"
-    
-    # Display assistant response (left-aligned)
-    col1, col2 = st.columns([4, 1])
-    with col1:
-        st.markdown(f"""
-            <div style="padding: 1rem 1.5rem; 
-                        margin: 0.5rem 0;
-                        width: fit-content;
-                        max-width: 100%;">
-                <div style="display: flex; align-items: flex-start; gap: 0.8rem;">
-                    <div style="font-size: 1.5rem;">🤖</div>
-                    <div style="flex: 1; color: white;">
-                        {reply}
-                    </div>
-                </div>
-            </div>
-        """, unsafe_allow_html=True)
+        bubble.markdown(assistant_bubble(reply), unsafe_allow_html=True)
     
     st.session_state.messages.append({"role": "assistant", "content": reply})
     st.rerun()
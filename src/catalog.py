@@ -0,0 +1,517 @@
+import bisect
+import itertools
+import json
+import os
+import threading
+from pathlib import Path
+
+from geography import resolve_geography
+from model.factory import Factory
+
+DEFAULT_CATALOG_PATH = Path(__file__).parent.parent / "data" / "factories.json"
+
+# Requirement fields recommend_factories(constraints=...) can make mandatory
+CONSTRAINTS = frozenset({"geography", "certifications", "moq"})
+MAX_CACHED_BITMAPS = 256
+# Compiled catalog formats get_catalog loads by suffix; both are read-only
+SNAPSHOT_SUFFIXES = (".snap",)
+SQLITE_SUFFIXES = (".sqlite", ".sqlite3", ".db")
+
+
+class ReadOnlyCatalogError(ValueError):
+    """A delta was applied to a compiled (snapshot or SQLite) catalog."""
+
+
+_versions = itertools.count(1)
+
+
+def next_catalog_version():
+    """Process-wide monotonically increasing catalog version number."""
+    return next(_versions)
+
+
+class Catalog:
+    """A parsed factory catalog plus the file signature it was loaded from.
+
+    Inverted indexes map each product type, material, geography, cost tier
+    and certification to the sorted positions of the factories that carry it,
+    so candidate generation is a posting-list union instead of a full scan.
+    Hard constraints are answered with position bitmaps built from the same
+    postings. `version` changes whenever the catalog is loaded or a delta is
+    applied.
+    """
+
+    storage = "memory"
+
+    def __init__(self, factories, path=None, signature=None):
+        self.factories = factories
+        self.path = path
+        self.signature = signature
+        self.version = next_catalog_version()
+        self._columns = None
+        self._name_index = None
+        self._description_index = None
+        self._owned = None
+        self._build_indexes()
+
+    def _build_indexes(self):
+        self.product_index = {}
+        self.material_index = {}
+        self.geography_index = {}
+        self.cost_tier_index = {}
+        self.certification_index = {}
+        self.positions = {}
+        self._bitmaps = {}
+
+        for pos, f in enumerate(self.factories):
+            self._index_postings(pos, f)
+
+        # MOQ earns points for any factory with moq_min <= 2 * req.moq, so keep
+        # positions ordered by moq_min and answer that with a bisect.
+        self._moq_order = sorted(range(len(self.factories)), key=lambda p: self.factories[p].moq_min)
+        self._moq_sorted = [self.factories[p].moq_min for p in self._moq_order]
+
+    def _index_postings(self, pos, f):
+        self.positions[f.id] = pos
+        for product_type in set(f.product_types):
+            _add_posting(self._postings(self.product_index, product_type), pos)
+        for material in set(f.materials):
+            _add_posting(self._postings(self.material_index, material), pos)
+        _add_posting(self._postings(self.geography_index, f.geography.lower()), pos)
+        _add_posting(self._postings(self.cost_tier_index, f.cost_tier), pos)
+        for certification in {c.casefold() for c in f.certifications}:
+            _add_posting(self._postings(self.certification_index, certification), pos)
+
+    def _index(self, pos, f):
+        self._index_postings(pos, f)
+        i = bisect.bisect_right(self._moq_sorted, f.moq_min)
+        self._moq_sorted.insert(i, f.moq_min)
+        self._moq_order.insert(i, pos)
+
+    def _unindex(self, pos, f):
+        del self.positions[f.id]
+        for product_type in set(f.product_types):
+            self._remove_posting(self.product_index, product_type, pos)
+        for material in set(f.materials):
+            self._remove_posting(self.material_index, material, pos)
+        self._remove_posting(self.geography_index, f.geography.lower(), pos)
+        self._remove_posting(self.cost_tier_index, f.cost_tier, pos)
+        for certification in {c.casefold() for c in f.certifications}:
+            self._remove_posting(self.certification_index, certification, pos)
+        i = bisect.bisect_left(self._moq_sorted, f.moq_min)
+        while self._moq_order[i] != pos:
+            i += 1
+        del self._moq_sorted[i]
+        del self._moq_order[i]
+
+    def _remove_posting(self, index, key, pos):
+        postings = self._postings(index, key)
+        del postings[bisect.bisect_left(postings, pos)]
+        if not postings:
+            del index[key]
+
+    def id_key(self, pos):
+        """Sort key of the factory id at `pos`, used to break score ties."""
+        return self.factories[pos].id
+
+    def view(self):
+        """The catalog version to read from; a Catalog is never modified once built."""
+        return self
+
+    def with_delta(self, ops):
+        """A new Catalog version with upsert/delete operations applied; this one is left untouched.
+
+        Each op is {"op": "upsert", "factory": {...}} or {"op": "delete", "id": ...}.
+        The new version shares every posting list the delta does not touch and
+        copies the rest on first write, so nothing a concurrent reader of this
+        version can see changes. Deleted factories are swap-removed, so
+        positions of other factories may move. A columnar view that was
+        already built is patched row by row; the name and description
+        indexes are not patched and are rebuilt on first use.
+        """
+        # Validate everything up front so a bad op cannot leave a half-applied delta
+        parsed = []
+        for op in ops:
+            kind = op.get("op")
+            if kind == "upsert":
+                parsed.append((kind, Factory.from_dict(op["factory"])))
+            elif kind == "delete":
+                parsed.append((kind, op["id"]))
+            else:
+                raise ValueError(f"Unknown delta operation: {kind!r}")
+
+        new = Catalog.__new__(Catalog)
+        new.factories = list(self.factories)
+        new.path = self.path
+        new.signature = self.signature
+        new.positions = dict(self.positions)
+        new.product_index = dict(self.product_index)
+        new.material_index = dict(self.material_index)
+        new.geography_index = dict(self.geography_index)
+        new.cost_tier_index = dict(self.cost_tier_index)
+        new.certification_index = dict(self.certification_index)
+        new._moq_order = list(self._moq_order)
+        new._moq_sorted = list(self._moq_sorted)
+        new._bitmaps = {}
+        new._columns = self._columns.copy() if self._columns is not None else None
+        new._name_index = None
+        new._description_index = None
+        new._owned = set()
+        for kind, value in parsed:
+            if kind == "upsert":
+                new._upsert(value)
+            else:
+                new._delete(value)
+        new._owned = None
+        new.version = next_catalog_version()
+        return new
+
+    def _postings(self, index, key):
+        # Posting list of `key` that may be modified: during a delta, lists still
+        # shared with the previous version are copied on first write
+        postings = index.get(key)
+        if postings is None:
+            postings = index[key] = []
+        elif self._owned is not None and id(postings) not in self._owned:
+            postings = index[key] = list(postings)
+        if self._owned is not None:
+            self._owned.add(id(postings))
+        return postings
+
+    def _upsert(self, factory):
+        pos = self.positions.get(factory.id)
+        if pos is None:
+            pos = len(self.factories)
+            self.factories.append(factory)
+            if self._columns is not None:
+                self._columns.append(factory)
+        else:
+            self._unindex(pos, self.factories[pos])
+            self.factories[pos] = factory
+            if self._columns is not None:
+                self._columns.set_row(pos, factory)
+        self._index(pos, factory)
+
+    def _delete(self, factory_id):
+        # Deleting an unknown id is a no-op so deltas can be replayed safely
+        pos = self.positions.get(factory_id)
+        if pos is None:
+            return
+        self._unindex(pos, self.factories[pos])
+        last = len(self.factories) - 1
+        if pos != last:
+            moved = self.factories[last]
+            self._unindex(last, moved)
+            self.factories[pos] = moved
+            self._index(pos, moved)
+        self.factories.pop()
+        if self._columns is not None:
+            self._columns.swap_remove(pos)
+
+    def __len__(self):
+        return len(self.factories)
+
+    def __iter__(self):
+        return iter(self.factories)
+
+    @property
+    def columns(self):
+        """Columnar NumPy view of the catalog, built on first use."""
+        if self._columns is None:
+            from columnar import ColumnarCatalog
+            self._columns = ColumnarCatalog(self.factories)
+        return self._columns
+
+    @property
+    def name_index(self):
+        """Exact and fuzzy factory-name lookup, built on first use."""
+        if self._name_index is None:
+            from name_index import FactoryNameIndex
+            self._name_index = FactoryNameIndex(self.factories)
+        return self._name_index
+
+    @property
+    def description_index(self):
+        """TF-IDF index for free-text product descriptions, built on first use."""
+        if self._description_index is None:
+            from text_index import DescriptionIndex
+            self._description_index = DescriptionIndex(self.factories)
+        return self._description_index
+
+    def geography_postings(self, geography):
+        """Positions whose geography matches `geography`, including region expansion."""
+        postings = []
+        for key in resolve_geography(geography, self.geography_index):
+            postings.extend(self.geography_index[key])
+        return postings
+
+    def _moq_cutoff(self, limit):
+        # Number of factories with moq_min <= limit
+        return bisect.bisect_right(self._moq_sorted, limit)
+
+    def moq_postings(self, moq):
+        """Positions that earn MOQ points, i.e. moq >= moq_min * 0.5."""
+        return self._moq_order[:self._moq_cutoff(2 * moq)]
+
+    def _cached_bitmap(self, key, postings):
+        bitmap = self._bitmaps.get(key)
+        if bitmap is None:
+            if len(self._bitmaps) >= MAX_CACHED_BITMAPS:
+                self._bitmaps.clear()
+            bitmap = self._bitmaps[key] = _bitmap(postings(), len(self.factories))
+        return bitmap
+
+    def constraint_bitmap(self, req, constraints):
+        """Bitmap (bit i = position i) of the factories meeting every mandatory constraint.
+
+        `constraints` names the hard requirements: "geography" (factory must be
+        in the requested geography or region), "certifications" (must hold
+        every requested certification) and "moq" (moq_min must not exceed the
+        requested quantity). A constraint the request leaves empty is ignored.
+        Per-value bitmaps are cached until the catalog changes, so a request
+        costs a few big-integer ANDs.
+        """
+        unknown = set(constraints) - CONSTRAINTS
+        if unknown:
+            raise ValueError(f"Unknown constraints: {sorted(unknown)}")
+
+        allowed = (1 << len(self.factories)) - 1
+        if "moq" in constraints:
+            cutoff = self._moq_cutoff(req.moq)
+            allowed &= self._cached_bitmap(("moq", cutoff), lambda: self._moq_order[:cutoff])
+        if "certifications" in constraints:
+            for certification in {c.casefold() for c in req.certifications}:
+                if not allowed:
+                    break
+                allowed &= self._cached_bitmap(
+                    ("certification", certification),
+                    lambda: self.certification_index.get(certification, ()),
+                )
+        if "geography" in constraints and req.geography and allowed:
+            locations = resolve_geography(req.geography, self.geography_index)
+            allowed &= self._cached_bitmap(
+                ("geography", locations),
+                lambda: [pos for location in locations for pos in self.geography_index[location]],
+            )
+        return allowed
+
+    def candidates(self, req):
+        """Sorted positions of every factory that can score above zero for `req`."""
+        matched = set(self.product_index.get(req.product_type, ()))
+        for material in req.materials:
+            matched.update(self.material_index.get(material, ()))
+        matched.update(self.geography_postings(req.geography))
+        if req.budget_tier:
+            matched.update(self.cost_tier_index.get(req.budget_tier, ()))
+        matched.update(self.moq_postings(req.moq))
+        return sorted(matched)
+
+
+def _bitmap(positions, size):
+    # Set bits in a bytearray and convert once; OR-ing ints bit by bit is quadratic
+    data = bytearray((size + 7) // 8)
+    for pos in positions:
+        data[pos >> 3] |= 1 << (pos & 7)
+    return int.from_bytes(data, "little")
+
+
+def bitmap_positions(bitmap):
+    """Ascending positions of the set bits of a position bitmap."""
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+    for i, byte in enumerate(data):
+        while byte:
+            low = byte & -byte
+            yield i * 8 + low.bit_length() - 1
+            byte ^= low
+
+
+def _add_posting(postings, pos):
+    if not postings or postings[-1] < pos:
+        postings.append(pos)
+    else:
+        bisect.insort(postings, pos)
+
+
+class LiveCatalog:
+    """A JSON catalog that deltas can be applied to while it is being read.
+
+    Reads go to the current Catalog version. apply_delta builds the next
+    version copy-on-write and publishes it with a single reference swap, so
+    a reader that took view() keeps a consistent version (factories, indexes
+    and positions together) for as long as it holds it. Attribute reads on
+    the LiveCatalog itself are forwarded to the current version.
+    """
+
+    def __init__(self, catalog):
+        self._current = catalog
+        self._lock = threading.Lock()
+
+    def view(self):
+        return self._current
+
+    def apply_delta(self, ops):
+        """Apply upsert/delete operations (see Catalog.with_delta) and return the new catalog version."""
+        # Writers are serialised so no delta is built from a version another one replaces
+        with self._lock:
+            self._current = self._current.with_delta(ops)
+            return self._current.version
+
+    def __getattr__(self, name):
+        if name == "_current":
+            raise AttributeError(name)
+        return getattr(self._current, name)
+
+    def __len__(self):
+        return len(self._current)
+
+    def __iter__(self):
+        return iter(self._current)
+
+
+def load_delta(path):
+    """Read a JSON Lines delta file of upsert/delete operations."""
+    with open(path, "r") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def apply_delta_file(delta_path, path=None):
+    """Apply a delta file to the cached JSON catalog for `path` and return the new version."""
+    key = _resolve(path)
+    if key.endswith(SNAPSHOT_SUFFIXES + SQLITE_SUFFIXES):
+        raise ReadOnlyCatalogError(
+            f"{key} is a compiled catalog; apply the delta to the JSON catalog and recompile it"
+        )
+    return get_catalog(path).apply_delta(load_delta(delta_path))
+
+
+# Process-wide cache: resolved path -> Catalog
+_cache = {}
+_cache_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "reloads": 0}
+
+
+def _resolve(path):
+    if path is None:
+        path = DEFAULT_CATALOG_PATH
+    return str(Path(path).resolve())
+
+
+def _signature(path):
+    # mtime alone misses same-second rewrites on coarse filesystems, so key on size too
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _parse(path):
+    with open(path, "r") as f:
+        return [Factory.from_dict(record) for record in json.load(f)]
+
+
+STREAM_CHUNK_SIZE = 1 << 16
+_decoder = json.JSONDecoder()
+
+
+def iter_factories(path=None, chunk_size=STREAM_CHUNK_SIZE):
+    """Yield Factory records from `path` one at a time with bounded memory.
+
+    Accepts JSON Lines (one object per line) or a top-level JSON array, which
+    is decoded incrementally from fixed-size chunks rather than parsed whole.
+    """
+    with open(_resolve(path), "r") as f:
+        head = f.read(chunk_size)
+        stripped = head.lstrip()
+        if stripped.startswith("["):
+            yield from _iter_json_array(f, stripped[1:], chunk_size)
+        else:
+            yield from _iter_json_lines(f, head)
+
+
+def _iter_json_lines(f, head):
+    buffered = head + f.readline()
+    for line in buffered.splitlines():
+        if line.strip():
+            yield Factory.from_dict(json.loads(line))
+    for line in f:
+        if line.strip():
+            yield Factory.from_dict(json.loads(line))
+
+
+def _iter_json_array(f, buf, chunk_size):
+    pos = 0
+    eof = False
+    while True:
+        # Skip separators between array elements
+        while pos < len(buf) and buf[pos] in " \t\r\n,":
+            pos += 1
+        if pos < len(buf) and buf[pos] == "]":
+            return
+        if pos < len(buf):
+            try:
+                record, end = _decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                yield Factory.from_dict(record)
+                pos = end
+                continue
+        elif eof:
+            raise ValueError("Unterminated JSON array in factory catalog")
+
+        # Need more input: drop consumed text and read the next chunk
+        chunk = f.read(chunk_size)
+        buf = buf[pos:] + chunk
+        pos = 0
+        eof = not chunk
+
+
+def get_catalog(path=None):
+    """Return the cached Catalog for `path`, re-parsing only if the file changed."""
+    key = _resolve(path)
+    signature = _signature(key)
+
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None and cached.signature == signature:
+            _stats["hits"] += 1
+            return cached
+
+    if key.endswith(SNAPSHOT_SUFFIXES):
+        from snapshot import load_snapshot
+        catalog = load_snapshot(key, signature=signature)
+    elif key.endswith(SQLITE_SUFFIXES):
+        from sqlite_store import load_sqlite_catalog
+        catalog = load_sqlite_catalog(key, signature=signature)
+    else:
+        catalog = LiveCatalog(Catalog(_parse(key), path=key, signature=signature))
+
+    with _cache_lock:
+        if cached is None:
+            _stats["misses"] += 1
+        else:
+            _stats["reloads"] += 1
+        _cache[key] = catalog
+    return catalog
+
+
+def invalidate_catalog_cache(path=None):
+    """Drop the cached catalog for `path`, or every cached catalog if no path is given."""
+    with _cache_lock:
+        if path is None:
+            _cache.clear()
+        else:
+            _cache.pop(_resolve(path), None)
+
+
+def catalog_cache_stats():
+    """Return a snapshot of the hit/miss/reload counters."""
+    with _cache_lock:
+        stats = dict(_stats)
+        stats["entries"] = len(_cache)
+    return stats
+
+
+def reset_catalog_cache_stats():
+    with _cache_lock:
+        for key in _stats:
+            _stats[key] = 0
@@ -0,0 +1,215 @@
+import bisect
+
+import numpy as np
+from geography import resolve_geography
+from model.factory import as_factory
+from factories import (
+    PRODUCT_WEIGHT,
+    MATERIAL_WEIGHT,
+    MOQ_WEIGHT,
+    MOQ_NEGOTIABLE_WEIGHT,
+    GEOGRAPHY_WEIGHT,
+    BUDGET_WEIGHT,
+)
+
+
+def _words(vocab):
+    return max(1, (len(vocab) + 63) // 64)
+
+
+def _encode(values, vocab, words):
+    """Pack the vocabulary codes of `values` into a uint64 bitmask row."""
+    row = np.zeros(words, dtype=np.uint64)
+    for value in values:
+        code = vocab.get(value)
+        if code is not None:
+            row[code // 64] |= np.uint64(1) << np.uint64(code % 64)
+    return row
+
+
+class ColumnarCatalog:
+    """Column-oriented view of a factory list for vectorized scoring.
+
+    Product types and materials are integer-coded and stored as uint64
+    bitmask arrays (one row per factory, one column per 64 vocabulary
+    entries); geography and cost tier are stored as small integer codes.
+    """
+
+    def __init__(self, factories):
+        factories = [as_factory(f) for f in factories]
+        self.size = len(factories)
+
+        self.product_vocab = {v: i for i, v in enumerate(sorted({p for f in factories for p in f.product_types}))}
+        self.material_vocab = {v: i for i, v in enumerate(sorted({m for f in factories for m in f.materials}))}
+        self.geography_vocab = {v: i for i, v in enumerate(sorted({f.geography.lower() for f in factories}))}
+        self.cost_tier_vocab = {v: i for i, v in enumerate(sorted({f.cost_tier for f in factories}))}
+
+        product_words = _words(self.product_vocab)
+        material_words = _words(self.material_vocab)
+        self.product_bits = np.zeros((self.size, product_words), dtype=np.uint64)
+        self.material_bits = np.zeros((self.size, material_words), dtype=np.uint64)
+        self.moq_min = np.zeros(self.size, dtype=np.int64)
+        self.geography = np.zeros(self.size, dtype=np.int32)
+        self.cost_tier = np.zeros(self.size, dtype=np.int32)
+        # Rank of each factory id in sorted order, used to break score ties
+        by_id = sorted(range(self.size), key=lambda p: factories[p].id)
+        self.id_rank = np.empty(self.size, dtype=np.int64)
+        self.id_rank[by_id] = np.arange(self.size)
+        # Ids in rank order, so deltas can re-rank with a bisect
+        self._sorted_ids = [factories[p].id for p in by_id]
+
+        for pos, f in enumerate(factories):
+            self.product_bits[pos] = _encode(f.product_types, self.product_vocab, product_words)
+            self.material_bits[pos] = _encode(f.materials, self.material_vocab, material_words)
+            self.moq_min[pos] = f.moq_min
+            self.geography[pos] = self.geography_vocab[f.geography.lower()]
+            self.cost_tier[pos] = self.cost_tier_vocab[f.cost_tier]
+
+    @classmethod
+    def from_arrays(cls, vocab, arrays):
+        """Wrap existing arrays (e.g. memory-mapped snapshot views) without copying."""
+        self = cls.__new__(cls)
+        for attr in ("product_vocab", "material_vocab", "geography_vocab", "cost_tier_vocab"):
+            setattr(self, attr, {value: code for code, value in enumerate(vocab[attr])})
+        for attr in ("product_bits", "material_bits", "moq_min", "geography", "cost_tier", "id_rank"):
+            setattr(self, attr, arrays[attr])
+        self.size = len(self.moq_min)
+        self._sorted_ids = None
+        return self
+
+    def copy(self):
+        """Independent copy that set_row/append/swap_remove can patch without touching this one."""
+        new = ColumnarCatalog.__new__(ColumnarCatalog)
+        for attr in ("product_vocab", "material_vocab", "geography_vocab", "cost_tier_vocab"):
+            setattr(new, attr, dict(getattr(self, attr)))
+        for attr in ("product_bits", "material_bits", "moq_min", "geography", "cost_tier", "id_rank"):
+            setattr(new, attr, np.array(getattr(self, attr)))
+        new.size = self.size
+        new._sorted_ids = list(self._sorted_ids)
+        return new
+
+    def _code(self, vocab, value):
+        code = vocab.get(value)
+        if code is None:
+            code = vocab[value] = len(vocab)
+        return code
+
+    def _widen(self, attr, vocab):
+        # Add bitmask words when new vocabulary codes no longer fit
+        bits = getattr(self, attr)
+        missing = _words(vocab) - bits.shape[1]
+        if missing > 0:
+            setattr(self, attr, np.hstack([bits, np.zeros((len(bits), missing), dtype=np.uint64)]))
+
+    def set_row(self, pos, factory):
+        """Re-encode the row at `pos` for `factory`, which keeps the id already there."""
+        f = as_factory(factory)
+        for value in f.product_types:
+            self._code(self.product_vocab, value)
+        for value in f.materials:
+            self._code(self.material_vocab, value)
+        self._widen("product_bits", self.product_vocab)
+        self._widen("material_bits", self.material_vocab)
+        self.product_bits[pos] = _encode(f.product_types, self.product_vocab, self.product_bits.shape[1])
+        self.material_bits[pos] = _encode(f.materials, self.material_vocab, self.material_bits.shape[1])
+        self.moq_min[pos] = f.moq_min
+        self.geography[pos] = self._code(self.geography_vocab, f.geography.lower())
+        self.cost_tier[pos] = self._code(self.cost_tier_vocab, f.cost_tier)
+
+    def append(self, factory):
+        """Add a row for a factory whose id is not in the catalog yet."""
+        f = as_factory(factory)
+        rank = bisect.bisect_left(self._sorted_ids, f.id)
+        self._sorted_ids.insert(rank, f.id)
+        self.id_rank[self.id_rank >= rank] += 1
+        self.id_rank = np.append(self.id_rank, rank)
+        for attr in ("product_bits", "material_bits"):
+            bits = getattr(self, attr)
+            setattr(self, attr, np.vstack([bits, np.zeros((1, bits.shape[1]), dtype=np.uint64)]))
+        for attr in ("moq_min", "geography", "cost_tier"):
+            setattr(self, attr, np.append(getattr(self, attr), np.zeros(1, dtype=getattr(self, attr).dtype)))
+        self.size += 1
+        self.set_row(self.size - 1, f)
+
+    def swap_remove(self, pos):
+        """Drop the row at `pos`, moving the last row into its place (as Catalog deletes do)."""
+        rank = int(self.id_rank[pos])
+        del self._sorted_ids[rank]
+        self.id_rank[self.id_rank > rank] -= 1
+        last = self.size - 1
+        for attr in ("product_bits", "material_bits", "moq_min", "geography", "cost_tier", "id_rank"):
+            array = getattr(self, attr)
+            array[pos] = array[last]
+            setattr(self, attr, array[:last])
+        self.size = last
+
+    def __len__(self):
+        return self.size
+
+    def _codes(self, vocab, values):
+        # -1 marks values that are missing from the catalog vocabulary
+        return np.array([vocab.get(v, -1) if v else -1 for v in values], dtype=np.int64)
+
+    def _product_match(self, reqs):
+        codes = self._codes(self.product_vocab, [r.product_type for r in reqs])
+        known = codes >= 0
+        safe = np.where(known, codes, 0)
+        bits = np.uint64(1) << (safe % 64).astype(np.uint64)
+        # (n, k) gather of the word holding each request's bit, transposed to (k, n)
+        hit = (self.product_bits[:, safe // 64] & bits) != 0
+        return hit.T & known[:, None]
+
+    def _material_match(self, reqs):
+        words = self.material_bits.shape[1]
+        masks = np.stack([_encode(r.materials, self.material_vocab, words) for r in reqs])
+        # One (k, n) temporary per bitmask word rather than a (k, n, words) cube
+        hit = np.zeros((len(reqs), self.size), dtype=bool)
+        for w in range(words):
+            hit |= (self.material_bits[None, :, w] & masks[:, w, None]) != 0
+        return hit
+
+    def _geography_match(self, reqs):
+        # Resolve each request once into a set of geography codes, then gather by code
+        by_code = np.zeros((len(reqs), len(self.geography_vocab)), dtype=bool)
+        for row, req in enumerate(reqs):
+            for key in resolve_geography(req.geography, self.geography_vocab):
+                by_code[row, self.geography_vocab[key]] = True
+        return by_code[:, self.geography]
+
+    def _budget_match(self, reqs):
+        codes = self._codes(self.cost_tier_vocab, [r.budget_tier for r in reqs])
+        return (self.cost_tier[None, :] == codes[:, None]) & (codes[:, None] >= 0)
+
+    def score_batch(self, reqs):
+        """(len(reqs), len(catalog)) score matrix, row i equal to score(reqs[i])."""
+        moq = np.array([r.moq for r in reqs], dtype=np.int64)[:, None]
+        scores = self._product_match(reqs) * PRODUCT_WEIGHT
+        scores += self._material_match(reqs) * MATERIAL_WEIGHT
+        # req.moq >= moq_min * 0.5 is rewritten as 2 * req.moq >= moq_min to stay in integers
+        scores += np.where(
+            moq >= self.moq_min,
+            MOQ_WEIGHT,
+            np.where(2 * moq >= self.moq_min, MOQ_NEGOTIABLE_WEIGHT, 0),
+        )
+        scores += self._geography_match(reqs) * GEOGRAPHY_WEIGHT
+        scores += self._budget_match(reqs) * BUDGET_WEIGHT
+        return scores
+
+    def score(self, req):
+        """Scores for every factory, identical to score_factory(f, req)[0]."""
+        return self.score_batch([req])[0]
+
+    def top_positions(self, scores, top_n):
+        """Positions of the top_n entries of each score row: highest score first, then lowest id."""
+        scores = np.atleast_2d(scores)
+        k = min(top_n, self.size)
+        if k <= 0:
+            return np.zeros((scores.shape[0], 0), dtype=np.int64)
+        # id_rank < size, so this key is unique per row and orders by (-score, id)
+        key = -scores.astype(np.int64) * self.size + self.id_rank
+        if k < self.size:
+            part = np.argpartition(key, k - 1, axis=1)[:, :k]
+        else:
+            part = np.broadcast_to(np.arange(self.size), key.shape)
+        order = np.take_along_axis(key, part, axis=1).argsort(axis=1)
+        return np.take_along_axis(part, order, axis=1)
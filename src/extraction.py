@@ -0,0 +1,155 @@
+import json
+
+from llm import RFQ_TRIGGER, extract_requirements_update
+from local_extractor import get_local_extractor
+from model.requirements import ManufacturingRequirements
+
+LIST_FIELDS = ("materials", "certifications")
+FIELDS = tuple(ManufacturingRequirements.model_fields)
+REQUIRED_FIELDS = frozenset({"product_type", "moq"})
+# Free text the local rules never read; only the model fills it in
+MODEL_FIELDS = frozenset({"product_description"})
+
+
+def _clean(field, value):
+    """Coerce one extracted field value; None means cleared.
+
+    Raises ValueError for a value that cannot be coerced ("2k" for moq, a blank string).
+    """
+    if value is None:
+        return None
+    if field in LIST_FIELDS:
+        values = value if isinstance(value, list) else [value]
+        return [str(v).strip() for v in values if v is not None and str(v).strip()] or None
+    if field == "moq":
+        try:
+            return int(float(value))
+        except (TypeError, ValueError, OverflowError):
+            raise ValueError(f"Unreadable moq: {value!r}") from None
+    value = str(value).strip()
+    if not value:
+        raise ValueError(f"Blank {field}")
+    return value
+
+
+def merge_requirements(state, update):
+    """Apply an extraction update to a partial state dict, in place; returns the changed fields.
+
+    Fields missing from `update` are kept; a null (or an empty list) clears the
+    field. A value that cannot be coerced keeps the field as it was, so a
+    misread never erases a known value.
+    """
+    changed = []
+    for field in FIELDS:
+        if field not in update:
+            continue
+        try:
+            value = _clean(field, update[field])
+        except ValueError:
+            continue
+        if value is None:
+            if state.pop(field, None) is not None:
+                changed.append(field)
+        elif state.get(field) != value:
+            state[field] = value
+            changed.append(field)
+    return changed
+
+
+class RequirementsTracker:
+    """Requirements extracted incrementally as a conversation grows.
+
+    Each update() first reads the new buyer messages with the local
+    rule-based extractor and keeps the fields it is confident about. Only if
+    some field is left unresolved (mentioned but not understood, a required
+    field still unknown, or no product description yet while the buyer has
+    said something new) is the model asked, for just those fields,
+    with the messages added since the previous update and a compact JSON of
+    the fields known so far. The prompt therefore grows with the new turns,
+    not with the whole conversation.
+
+    `local` is True for the catalog's LocalExtractor, a LocalExtractor, or
+    False to send every update to the model.
+    """
+
+    def __init__(self, extract=extract_requirements_update, local=True):
+        self.state = {}
+        self.requirements = None
+        self.processed = 0
+        self.model_calls = 0
+        self._extract = extract
+        self._local = local
+
+    def state_json(self):
+        return json.dumps(self.state, separators=(",", ":"), sort_keys=True)
+
+    def pending_text(self, messages):
+        """The unprocessed turns as 'Role: content' lines (system prompt and RFQ triggers skipped)."""
+        return "\n".join(
+            f"{m['role'].capitalize()}: {m['content']}"
+            for m in messages[self.processed:]
+            if m["role"] != "system" and not m["content"].startswith(RFQ_TRIGGER)
+        )
+
+    def _apply_local(self, messages, extractor):
+        """Merge the confident fields of the new buyer messages; return the fields left unresolved."""
+        unresolved = set()
+        context = None
+        for i, m in enumerate(messages):
+            if m["role"] == "assistant":
+                # The question a buyer message answers, e.g. "How many units?"
+                context = m["content"]
+            if i < self.processed or m["role"] != "user":
+                continue
+            result = extractor.extract(m["content"], context)
+            confident = result.confident_fields()
+            restated = set()
+            for field in LIST_FIELDS:
+                if field not in confident:
+                    continue
+                current = self.state.get(field, [])
+                if result.additive or not current:
+                    confident[field] = list(dict.fromkeys(current + confident[field]))
+                elif set(confident[field]) != set(current):
+                    # A different list without "also"/"add" may replace the old one
+                    # ("switch to denim"); the model returns the full list
+                    del confident[field]
+                    restated.add(field)
+            merge_requirements(self.state, confident)
+            unresolved -= confident.keys()
+            unresolved.update(result.unresolved)
+            unresolved |= restated
+        return unresolved
+
+    def update(self, messages):
+        """Bring the requirements up to date with `messages`.
+
+        Returns the current ManufacturingRequirements, or None while
+        product_type or moq is still unknown. If extraction fails the turns
+        stay pending and are sent again next time.
+        """
+        text = self.pending_text(messages)
+        if text:
+            extractor = get_local_extractor() if self._local is True else self._local or None
+            # None asks the model for every field; a list, for just those
+            fields = None
+            if extractor is not None:
+                wanted = REQUIRED_FIELDS
+                if any(m["role"] == "user" for m in messages[self.processed:]):
+                    wanted |= MODEL_FIELDS
+                fields = sorted(self._apply_local(messages, extractor) | (wanted - self.state.keys()))
+            if fields is None or fields:
+                update = json.loads(self._extract(self.state_json(), text, fields=fields))
+                if not isinstance(update, dict):
+                    raise ValueError(f"Expected a JSON object of field updates, got {update!r}")
+                if fields:
+                    # Locally confident fields are not the model's to overwrite
+                    update = {f: v for f, v in update.items() if f in fields or f in MODEL_FIELDS}
+                merge_requirements(self.state, update)
+                self.model_calls += 1
+            if REQUIRED_FIELDS <= self.state.keys():
+                self.requirements = ManufacturingRequirements(**self.state)
+            else:
+                self.requirements = None
+        self.processed = len(messages)
+        return self.requirements
@@ -1,71 +1,338 @@
-import json
-import os
-from pathlib import Path
+import heapq
+from catalog import get_catalog, bitmap_positions
+from geography import geography_matches
+from model.factory import as_factory, MATERIAL_VOCABULARY, CERTIFICATION_VOCABULARY
+
+# Score weights for each criterion in score_factory
+PRODUCT_WEIGHT = 3
+MATERIAL_WEIGHT = 2
+MOQ_WEIGHT = 2
+MOQ_NEGOTIABLE_WEIGHT = 1
+GEOGRAPHY_WEIGHT = 1
+BUDGET_WEIGHT = 1
+# Opt-in: product_description is similar to the factory's products (see text_index)
+DESCRIPTION_WEIGHT = 2
 
 def load_factories(path=None):
-    if path is None:
-        # Get the path relative to this file
-        base_dir = Path(__file__).parent.parent
-        path = base_dir / "data" / "factories.json"
-    with open(path, "r") as f:
-        return json.load(f)
+    # Served from the process-wide catalog cache; the file is only re-parsed when it changes.
+    # A fresh list each call: the catalog's own list is what its indexes point into,
+    # so sorting or appending to it would corrupt them. The records are shared; treat them as read-only.
+    return list(get_catalog(path).view().factories)
 
-def score_factory(factory, req):
+def resolve_factory_name(name, path=None):
+    """Look a factory up by (possibly inexact) name: (factory, candidates), see FactoryNameIndex.resolve."""
+    return get_catalog(path).name_index.resolve(name)
+
+# Bits of the component mask returned by score_components
+PRODUCT_MATCH = 1
+MATERIAL_MATCH = 2
+MOQ_MATCH = 4
+MOQ_NEGOTIABLE = 8
+GEOGRAPHY_MATCH = 16
+BUDGET_MATCH = 32
+DESCRIPTION_MATCH = 64
+
+def covers_certifications(factory, req):
+    """Whether the factory holds every certification the request asks for."""
+    required, complete = CERTIFICATION_VOCABULARY.lookup(tuple(req.certifications))
+    # A certification no record carries cannot be covered
+    return complete and as_factory(factory).certification_bits & required == required
+
+def score_components(factory, req):
+    """Numeric half of score_factory: (score, component bitmask), no strings built."""
+    factory = as_factory(factory)
     score = 0
+    mask = 0
+
+    if req.product_type in factory.product_types:
+        score += PRODUCT_WEIGHT
+        mask |= PRODUCT_MATCH
+
+    if factory.material_bits & MATERIAL_VOCABULARY.lookup(tuple(req.materials))[0]:
+        score += MATERIAL_WEIGHT
+        mask |= MATERIAL_MATCH
+
+    if req.moq >= factory.moq_min:
+        score += MOQ_WEIGHT
+        mask |= MOQ_MATCH
+    elif req.moq >= factory.moq_min * 0.5:
+        score += MOQ_NEGOTIABLE_WEIGHT
+        mask |= MOQ_NEGOTIABLE
+
+    if req.geography and geography_matches(req.geography, factory.geography):
+        score += GEOGRAPHY_WEIGHT
+        mask |= GEOGRAPHY_MATCH
+
+    if req.budget_tier and req.budget_tier == factory.cost_tier:
+        score += BUDGET_WEIGHT
+        mask |= BUDGET_MATCH
+
+    return score, mask
+
+def render_reasons(factory, req, mask):
+    """Human-readable reasons for the components set in `mask`."""
+    factory = as_factory(factory)
     reasons = []
 
     # Check product type match
-    if req.product_type in factory["product_types"]:
-        score += 3
+    if mask & PRODUCT_MATCH:
         reasons.append(f"Specializes in {req.product_type}")
 
     # Check material compatibility
-    material_matches = set(req.materials) & set(factory["materials"])
-    if material_matches:
-        score += 2
+    if mask & MATERIAL_MATCH:
+        material_matches = set(req.materials) & set(factory.materials)
         reasons.append(f"Works with {', '.join(material_matches)}")
 
-    # Check MOQ capability
-    if req.moq >= factory["moq_min"]:
-        score += 2
-        reasons.append(f"Can handle MOQ of {req.moq} units (minimum: {factory['moq_min']})")
-    else:
-        # Still consider if close to minimum
-        if req.moq >= factory["moq_min"] * 0.5:
-            score += 1
-            reasons.append(f"MOQ negotiable (you need {req.moq}, minimum is {factory['moq_min']})")
-
-    # Check geography match (flexible matching)
-    if req.geography:
-        req_geo_lower = req.geography.lower()
-        factory_geo_lower = factory["geography"].lower()
-        if req_geo_lower in factory_geo_lower or factory_geo_lower in req_geo_lower:
-            score += 1
-            reasons.append(f"Located in {factory['geography']}")
+    # Check MOQ capability, still considering orders close to the minimum
+    if mask & MOQ_MATCH:
+        reasons.append(f"Can handle MOQ of {req.moq} units (minimum: {factory.moq_min})")
+    elif mask & MOQ_NEGOTIABLE:
+        reasons.append(f"MOQ negotiable (you need {req.moq}, minimum is {factory.moq_min})")
+
+    # Check geography match (region hierarchy plus flexible name matching)
+    if mask & GEOGRAPHY_MATCH:
+        reasons.append(f"Located in {factory.geography}")
 
     # Check budget tier alignment
-    if req.budget_tier and req.budget_tier == factory["cost_tier"]:
-        score += 1
+    if mask & BUDGET_MATCH:
         reasons.append(f"Matches {req.budget_tier} budget tier")
 
+    # Check free-text description similarity (only scored with use_description)
+    if mask & DESCRIPTION_MATCH:
+        reasons.append(f"Makes products similar to {req.product_description}")
+
     # Add certification info
-    if factory["certifications"]:
-        reasons.append(f"Certified: {', '.join(factory['certifications'])}")
+    if factory.certifications:
+        reasons.append(f"Certified: {', '.join(factory.certifications)}")
 
-    return score, reasons
+    return reasons
 
-def recommend_factories(req, top_n=3):
-    factories = load_factories()
-    scored = []
+def score_factory(factory, req):
+    factory = as_factory(factory)
+    score, mask = score_components(factory, req)
+    return score, render_reasons(factory, req, mask)
+
+def render_results(scored, req):
+    """Turn (factory, score, mask) winners into result dicts, rendering reasons only now."""
+    return [
+        {"factory": f, "score": score, "reasons": render_reasons(f, req, mask)}
+        for f, score, mask in scored
+    ]
+
+class _Ranked:
+    """Heap entry ordered so the weakest result sits on top: lower score, then higher id."""
+
+    __slots__ = ("score", "factory_id", "result")
+
+    def __init__(self, score, factory_id, result):
+        self.score = score
+        self.factory_id = factory_id
+        self.result = result
+
+    def __lt__(self, other):
+        return (self.score, other.factory_id) < (other.score, self.factory_id)
+
+def _beats(score, factory_id, weakest):
+    return (score, weakest.factory_id) > (weakest.score, factory_id)
+
+def _push_top_n(heap, top_n, score, factory_id, result):
+    """Keep the top_n strongest results in a bounded min-heap; O(top_n) memory."""
+    if len(heap) < top_n:
+        heapq.heappush(heap, _Ranked(score, factory_id, result))
+    elif _beats(score, factory_id, heap[0]):
+        heapq.heapreplace(heap, _Ranked(score, factory_id, result))
+
+def _drain_top_n(heap):
+    # Strongest first: highest score, then lowest factory id
+    return [entry.result for entry in sorted(heap, reverse=True)]
 
-    for f in factories:
-        score, reasons = score_factory(f, req)
+def _ranked_candidates(catalog, req, description=()):
+    """Yield (upper_bound, position) for every candidate, strongest bound first.
+
+    The bound adds the fixed weights of the indexed criteria a factory is known
+    to meet (including a description match for positions in `description`),
+    plus the full MOQ weight, so it never undershoots the final score.
+    Factories that only qualify through MOQ all share the same bound and are
+    generated last, and only if the caller is still iterating.
+
+    Positions are grouped into one bucket per bound (there are only a
+    handful of distinct bounds), and a bucket is put in id order lazily,
+    through a heap, only once the caller reaches it; an early exit in the
+    first bucket never orders the rest.
+    """
+    bounds = {}
+    for pos in catalog.product_index.get(req.product_type, ()):
+        bounds[pos] = PRODUCT_WEIGHT
+    material_postings = set()
+    for material in req.materials:
+        material_postings.update(catalog.material_index.get(material, ()))
+    for pos in material_postings:
+        bounds[pos] = bounds.get(pos, 0) + MATERIAL_WEIGHT
+    for pos in catalog.geography_postings(req.geography):
+        bounds[pos] = bounds.get(pos, 0) + GEOGRAPHY_WEIGHT
+    if req.budget_tier:
+        for pos in catalog.cost_tier_index.get(req.budget_tier, ()):
+            bounds[pos] = bounds.get(pos, 0) + BUDGET_WEIGHT
+    for pos in description:
+        bounds[pos] = bounds.get(pos, 0) + DESCRIPTION_WEIGHT
+
+    buckets = {}
+    for pos, bound in bounds.items():
+        buckets.setdefault(bound, []).append(pos)
+    for bound in sorted(buckets, reverse=True):
+        for pos in _in_id_order(catalog, buckets.pop(bound)):
+            yield bound + MOQ_WEIGHT, pos
+
+    moq_only = [pos for pos in catalog.moq_postings(req.moq) if pos not in bounds]
+    for pos in _in_id_order(catalog, moq_only):
+        yield MOQ_WEIGHT, pos
+
+def _in_id_order(catalog, positions):
+    # heapify is linear, so a caller that stops after a few positions never pays for a full sort
+    id_key = catalog.id_key
+    heap = [(id_key(pos), pos) for pos in positions]
+    heapq.heapify(heap)
+    while heap:
+        yield heapq.heappop(heap)[1]
+
+# With hard constraints, survivors are scored directly (skipping candidate ranking)
+# once they are at most this fraction of the catalog
+CONSTRAINT_DIRECT_FRACTION = 8
+
+def _description_matches(catalog, req, use_description):
+    """Positions whose products match req.product_description, or None when not scoring it."""
+    if not use_description or not req.product_description:
+        return None
+    return set(catalog.description_index.matches(req.product_description).tolist())
+
+def _score_position(catalog, pos, req, description):
+    f = catalog.factories[pos]
+    score, mask = score_components(f, req)
+    if description and pos in description:
+        score += DESCRIPTION_WEIGHT
+        mask |= DESCRIPTION_MATCH
+    return f, score, mask
+
+def recommend_factories(req, top_n=3, backend="indexed", source=None, path=None, workers=None, shards=None,
+                        constraints=None, use_description=False):
+    # `constraints` names requirement fields that are mandatory rather than
+    # merely scored ("geography", "certifications", "moq"); see Catalog.constraint_bitmap.
+    # `use_description` also scores req.product_description against the catalog's
+    # TF-IDF description index (DESCRIPTION_WEIGHT when similar enough).
+    if constraints and (source is not None or workers is not None or shards is not None or backend != "indexed"):
+        raise ValueError("constraints are only supported by the indexed backend")
+    if use_description and (source is not None or workers is not None or shards is not None):
+        raise ValueError("use_description needs an in-process catalog, not a stream or worker pool")
+
+    # `source` is any iterable of factory records, e.g. catalog.iter_factories(path);
+    # it is scored in a single pass holding only the top_n results in memory.
+    if source is not None:
+        return _recommend_stream(source, req, top_n)
+
+    # `path` may point at a JSON catalog, a compiled .snap snapshot or a SQLite store.
+    # Score against one version throughout, even if a delta is published meanwhile.
+    catalog = get_catalog(path).view()
+    if workers is not None or shards is not None:
+        # Sharded scoring in a process pool that is reused across calls
+        from parallel import get_sharded_scorer
+        return get_sharded_scorer(catalog, shards=shards, workers=workers).recommend(req, top_n)
+    if backend == "vectorized":
+        return _recommend_vectorized(catalog, req, top_n, use_description)
+    if backend != "indexed":
+        raise ValueError(f"Unknown scoring backend: {backend}")
+    if catalog.storage == "sqlite":
+        if constraints or use_description:
+            raise ValueError("constraints and use_description are not supported by the SQLite catalog")
+        # Filtering is pushed down into indexed SQL queries
+        return catalog.recommend(req, top_n)
+    if top_n <= 0:
+        return []
+
+    description = _description_matches(catalog, req, use_description)
+    allowed = None
+    if constraints:
+        allowed = catalog.constraint_bitmap(req, constraints)
+        survivors = allowed.bit_count()
+        if survivors == 0:
+            return []
+        if survivors <= top_n or survivors * CONSTRAINT_DIRECT_FRACTION <= len(catalog):
+            # Few enough survivors that ranking every candidate would cost more than scoring them
+            heap = []
+            for pos in bitmap_positions(allowed):
+                f, score, mask = _score_position(catalog, pos, req, description)
+                if score > 0:
+                    _push_top_n(heap, top_n, score, f.id, (f, score, mask))
+            return render_results(_drain_top_n(heap), req)
+        allowed = allowed.to_bytes((len(catalog) + 7) // 8, "little")
+
+    heap = []
+    for bound, pos in _ranked_candidates(catalog, req, description or ()):
+        if allowed is not None and not allowed[pos >> 3] >> (pos & 7) & 1:
+            continue
+        # WAND-style early exit: candidates arrive in bound order, so once the
+        # best remaining bound cannot displace the k-th result nothing can
+        if len(heap) == top_n and not _beats(bound, catalog.factories[pos].id, heap[0]):
+            break
+        f, score, mask = _score_position(catalog, pos, req, description)
+        if score > 0:
+            _push_top_n(heap, top_n, score, f.id, (f, score, mask))
+
+    return render_results(_drain_top_n(heap), req)
+
+def _recommend_stream(source, req, top_n):
+    heap = []
+    if top_n <= 0:
+        return heap
+    for f in source:
+        f = as_factory(f)
+        score, mask = score_components(f, req)
         if score > 0:
-            scored.append({
-                "factory": f,
-                "score": score,
-                "reasons": reasons
-            })
-
-    scored.sort(key=lambda x: x["score"], reverse=True)
-    return scored[:top_n]
+            _push_top_n(heap, top_n, score, f.id, (f, score, mask))
+    return render_results(_drain_top_n(heap), req)
+
+# Upper bound on score-matrix cells held in memory at once by recommend_factories_batch
+BATCH_MAX_CELLS = 4_000_000
+
+def recommend_factories_batch(reqs, top_n=3, chunk_size=None, path=None, use_description=False):
+    """Recommend factories for many requirements at once, returned in input order.
+
+    The catalog is loaded and columnised once; each chunk of requirements is
+    scored against every factory as a single matrix. `chunk_size` defaults to
+    as many requirements as fit in BATCH_MAX_CELLS score cells.
+    """
+    reqs = list(reqs)
+    catalog = get_catalog(path).view()
+    columns = catalog.columns
+    if chunk_size is None:
+        chunk_size = max(1, BATCH_MAX_CELLS // max(1, len(columns)))
+
+    results = []
+    for start in range(0, len(reqs), chunk_size):
+        chunk = reqs[start:start + chunk_size]
+        scores = columns.score_batch(chunk)
+        descriptions = [_add_description_scores(catalog, req, row, use_description) for req, row in zip(chunk, scores)]
+        order = columns.top_positions(scores, top_n)
+        for req, row, top, description in zip(chunk, scores, order, descriptions):
+            results.append(_render_top(catalog, req, row, top, description))
+    return results
+
+def _recommend_vectorized(catalog, req, top_n, use_description=False):
+    columns = catalog.columns
+    scores = columns.score(req)
+    description = _add_description_scores(catalog, req, scores, use_description)
+    return _render_top(catalog, req, scores, columns.top_positions(scores, top_n)[0], description)
+
+def _add_description_scores(catalog, req, scores, use_description):
+    # Adds the description weight into a score row in place; returns the matched positions
+    description = _description_matches(catalog, req, use_description)
+    if description:
+        scores[list(description)] += DESCRIPTION_WEIGHT
+    return description
+
+def _render_top(catalog, req, scores, order, description=None):
+    scored = []
+    for pos in order:
+        if scores[pos] <= 0:
+            break
+        scored.append(_score_position(catalog, pos, req, description))
+    return render_results(scored, req)
@@ -0,0 +1,73 @@
+from functools import lru_cache
+
+# Region -> countries (as they appear in the factory catalog). Shared by the
+# deterministic scorer and the LLM system prompt so both apply the same rules.
+REGIONS = {
+    "Asia": [
+        "China", "Vietnam", "Bangladesh", "India", "Indonesia", "Sri Lanka", "Pakistan",
+        "Thailand", "Cambodia", "South Korea", "Japan", "Philippines", "Malaysia", "Taiwan",
+    ],
+    "Europe": [
+        "Europe", "Portugal", "Italy", "Spain", "France", "Germany", "Poland", "Romania",
+        "Bulgaria", "United Kingdom",
+    ],
+    "USA": ["USA"],
+    "North America": ["USA", "Canada", "Mexico"],
+    "South America": ["Peru", "Brazil", "Argentina", "Colombia"],
+    "Africa": ["South Africa", "Morocco", "Egypt", "Ethiopia", "Kenya"],
+}
+
+# Alternative names buyers use for a region
+REGION_ALIASES = {
+    "America": "USA",
+    "United States": "USA",
+    "US": "USA",
+    "Latin America": "South America",
+}
+
+
+def _normalize(value):
+    return " ".join(value.lower().split())
+
+
+_REGION_LOOKUP = {_normalize(name): name for name in REGIONS}
+_REGION_LOOKUP.update({_normalize(alias): region for alias, region in REGION_ALIASES.items()})
+
+
+@lru_cache(maxsize=1024)
+def region_members(geography):
+    """Lowercased country names covered by a requested region, or an empty set."""
+    region = _REGION_LOOKUP.get(_normalize(geography))
+    if region is None:
+        return frozenset()
+    return frozenset(_normalize(country) for country in REGIONS[region])
+
+
+@lru_cache(maxsize=8192)
+def geography_matches(requested, factory_geography):
+    """Whether a factory location satisfies a requested geography.
+
+    A factory matches if its location is in the requested region, or if either
+    name contains the other (so "china" matches "China" and "Southern China").
+    Cached per (requested, location) pair, so per-factory calls are a dict hit.
+    """
+    req = _normalize(requested)
+    location = _normalize(factory_geography)
+    return location in region_members(requested) or req in location or location in req
+
+
+def resolve_geography(requested, locations):
+    """Resolve a requested geography once into the subset of `locations` it matches."""
+    if not requested:
+        return frozenset()
+    return frozenset(location for location in locations if geography_matches(requested, location))
+
+
+def region_prompt_rules():
+    """Bullet lines describing the region rules for the LLM system prompt."""
+    lines = []
+    for region, countries in REGIONS.items():
+        aliases = [alias for alias, target in REGION_ALIASES.items() if target == region]
+        names = " or ".join(f'"{name}"' for name in [region] + aliases)
+        lines.append(f"  * For {names} preference: ONLY recommend factories in {', '.join(countries)}")
+    return "\n".join(lines)
@@ -1,9 +1,10 @@
-import os
-from openai import OpenAI
-from dotenv import load_dotenv
+from llm_cache import acached_completion, cached_completion, cached_stream
+from llm_clients import async_openai_client, openai_client
 
-load_dotenv()
-_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+_client = openai_client()
+
+# Reply prefix the assistant uses to ask the app for an RFQ email
+RFQ_TRIGGER = "GENERATE_RFQ:"
 
 SYSTEM_PROMPT = """
 You are an AI manufacturing concierge.
@@ -11,10 +12,8 @@ Your job is to ask concise, practical questions to understand
 manufacturing requirements. Avoid technical jargon.
 """
 
-EXTRACTION_PROMPT = """
-Extract manufacturing requirements from the conversation below.
-Return ONLY valid JSON with these exact fields:
-
+# Field definitions and mapping rules shared by full and incremental extraction
+REQUIREMENT_FIELDS = """
 {
   "product_type": "string (broad category: electronics, consumer_goods, industrial, apparel, jeans, fashion, etc.)",
   "product_description": "string (specific product the user wants to make, e.g., jackets, kitchen organizers, phone cases, denim jeans)",
@@ -35,19 +34,104 @@ Important mapping rules:
 - geography: Map to specific regions from the conversation
 - certifications: Extract any mentioned certifications or use empty array []
 - budget_tier: Map cost mentions to "low", "medium", or "high", or use null if not mentioned
+"""
+
+EXTRACTION_PROMPT = """
+Extract manufacturing requirements from the conversation below.
+Return ONLY valid JSON with these exact fields:
+""" + REQUIREMENT_FIELDS + """
+Return ONLY the JSON, no explanations.
+"""
+
+UPDATE_PROMPT = """
+You keep a buyer's manufacturing requirements up to date during a conversation.
+You are given the CURRENT requirements as JSON (fields not yet known are omitted)
+and the NEW messages since they were extracted. Requirement fields:
+""" + REQUIREMENT_FIELDS + """
+Return ONLY a JSON object with the fields the new messages add or change.
+- Omit fields the new messages do not mention
+- For list fields return the complete updated list, not just the new items
+- Use null only when the user withdraws a requirement
+- Return {} if nothing changed
+- If FIELDS TO RESOLVE is given, return only those fields
 
 Return ONLY the JSON, no explanations.
 """
 
-def chat(messages):
-    response = _client.chat.completions.create(
+def chat(messages, cache=None):
+    # Sampled at the default temperature, so only cached when cache=True
+    return cached_completion(
+        _client,
+        cache=cache,
+        model="gpt-4o-mini",
+        messages=messages
+    )
+
+def chat_stream(messages, cache=None):
+    """Yield the assistant reply to `messages` as content deltas."""
+    return cached_stream(
+        _client,
+        cache=cache,
+        model="gpt-4o-mini",
+        messages=messages
+    )
+
+def split_rfq_trigger(deltas):
+    """Read only as much of a streamed reply as it takes to spot the RFQ trigger.
+
+    Returns (is_trigger, head, rest): the text read so far and an iterator
+    over the remaining deltas. Usually decided by the first delta, since any
+    reply that stops matching the trigger's prefix cannot be one.
+    """
+    deltas = iter(deltas)
+    head = ""
+    for delta in deltas:
+        head += delta
+        if len(head) >= len(RFQ_TRIGGER) or not RFQ_TRIGGER.startswith(head):
+            break
+    return head.startswith(RFQ_TRIGGER), head, deltas
+
+def extract_requirements(conversation_text, cache=None):
+    return cached_completion(
+        _client,
+        cache=cache,
+        model="gpt-4o-mini",
+        messages=[
+            {"role": "system", "content": EXTRACTION_PROMPT},
+            {"role": "user", "content": conversation_text}
+        ],
+        temperature=0,
+        response_format={"type": "json_object"}
+    )
+
+def extract_requirements_update(state_json, new_messages_text, fields=None, cache=None):
+    content = f"CURRENT:\n{state_json}\n\nNEW MESSAGES:\n{new_messages_text}"
+    if fields:
+        content = f"FIELDS TO RESOLVE: {', '.join(fields)}\n\n{content}"
+    return cached_completion(
+        _client,
+        cache=cache,
+        model="gpt-4o-mini",
+        messages=[
+            {"role": "system", "content": UPDATE_PROMPT},
+            {"role": "user", "content": content}
+        ],
+        temperature=0,
+        response_format={"type": "json_object"}
+    )
+
+async def achat(messages, cache=None):
+    return await acached_completion(
+        async_openai_client(),
+        cache=cache,
         model="gpt-4o-mini",
         messages=messages
     )
-    return response.choices[0].message.content
 
-def extract_requirements(conversation_text):
-    response = _client.chat.completions.create(
+async def aextract_requirements(conversation_text, cache=None):
+    return await acached_completion(
+        async_openai_client(),
+        cache=cache,
         model="gpt-4o-mini",
         messages=[
             {"role": "system", "content": EXTRACTION_PROMPT},
@@ -56,4 +140,3 @@ def extract_requirements(conversation_text):
         temperature=0,
         response_format={"type": "json_object"}
     )
-    return response.choices[0].message.content
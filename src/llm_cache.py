@@ -0,0 +1,268 @@
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+from cachetools import TTLCache
+
+from rate_limit import acreate_completion, create_completion
+
+
+def _user_cache_dir():
+    # %LOCALAPPDATA% on Windows, ~/Library/Caches on macOS, $XDG_CACHE_HOME or ~/.cache elsewhere
+    if sys.platform == "win32" and os.getenv("LOCALAPPDATA"):
+        return Path(os.environ["LOCALAPPDATA"])
+    if sys.platform == "darwin":
+        return Path.home() / "Library" / "Caches"
+    return Path(os.getenv("XDG_CACHE_HOME") or Path.home() / ".cache")
+
+
+# Outside the source tree, so neither the app nor the tests write into the checkout
+DEFAULT_CACHE_PATH = _user_cache_dir() / "glass-factory" / "llm_cache.sqlite"
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MEMORY_ENTRIES = 512
+DEFAULT_MAX_BYTES = 64 * 2**20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    content TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed);
+CREATE INDEX IF NOT EXISTS idx_responses_created ON responses (created);
+"""
+
+
+def request_key(params):
+    """sha256 over the canonical JSON of every request parameter, messages included."""
+    payload = json.dumps(params, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def is_deterministic(params):
+    # The API samples at temperature 1 unless told otherwise
+    return params.get("temperature", 1) == 0 and params.get("n", 1) == 1
+
+
+class LLMCache:
+    """Content-addressed cache of chat completion responses.
+
+    Entries are keyed on a hash of the model, the request parameters and the
+    messages, and kept in two tiers: an in-process LRU (with TTL) in front of
+    a SQLite file that survives restarts and is shared by every process
+    using the same path. The disk tier expires rows after `ttl` seconds and
+    drops the least recently used ones once it holds more than `max_bytes`.
+
+    The size of the disk tier is counted once when the file is opened and
+    then kept as a running total, so a put never scans the table. Other
+    processes writing the same file are picked up by a recount whenever the
+    total reaches `max_bytes`.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL_SECONDS,
+                 memory_entries=DEFAULT_MEMORY_ENTRIES, max_bytes=DEFAULT_MAX_BYTES, timer=time.time):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._timer = timer
+        self._memory = TTLCache(maxsize=memory_entries, ttl=ttl, timer=timer)
+        self._lock = threading.Lock()
+        self._conn = None
+        self._size = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _db(self):
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # One connection shared across threads, serialised by self._lock
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+            self._size = self._total(self._conn)
+        return self._conn
+
+    @staticmethod
+    def _total(db):
+        return db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def get(self, key):
+        """Cached content for `key`, or None."""
+        with self._lock:
+            content = self._memory.get(key)
+            if content is not None:
+                self.hits += 1
+                return content
+
+            now = self._timer()
+            db = self._db()
+            row = db.execute("SELECT content, created, size FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._size -= row[2]
+                self.misses += 1
+                return None
+            db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self._memory[key] = row[0]
+            self.hits += 1
+            self.disk_hits += 1
+            return row[0]
+
+    def put(self, key, model, content):
+        with self._lock:
+            now = self._timer()
+            self._memory[key] = content
+            db = self._db()
+            size = len(content.encode("utf-8"))
+            old = db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)", (key, model, content, size, now, now))
+            self._size += size - (old[0] if old else 0)
+            self._evict(db, now)
+
+    def _evict(self, db, now):
+        cutoff = now - self.ttl
+        (expired,) = db.execute("SELECT COALESCE(SUM(size), 0) FROM responses WHERE created < ?", (cutoff,)).fetchone()
+        if expired:
+            db.execute("DELETE FROM responses WHERE created < ?", (cutoff,))
+            self._size -= expired
+        if self._size <= self.max_bytes:
+            return
+        # Other processes may have written or evicted since the last count
+        self._size = self._total(db)
+        if self._size <= self.max_bytes:
+            return
+        # Drop least recently used rows until the store fits again
+        excess = self._size - self.max_bytes
+        stale = []
+        for key, size in db.execute("SELECT key, size FROM responses ORDER BY accessed"):
+            stale.append((key,))
+            excess -= size
+            self._size -= size
+            if excess <= 0:
+                break
+        db.executemany("DELETE FROM responses WHERE key = ?", stale)
+        for (key,) in stale:
+            self._memory.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._db().execute("DELETE FROM responses")
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._db().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": entries,
+                "disk_bytes": size,
+            }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_default_cache():
+    """The process-wide cache, at $LLM_CACHE_PATH if set; None when $LLM_CACHE_DISABLED is set."""
+    global _default_cache
+    if os.getenv("LLM_CACHE_DISABLED"):
+        return None
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = LLMCache(os.getenv("LLM_CACHE_PATH") or DEFAULT_CACHE_PATH)
+        return _default_cache
+
+
+def _store_for(params, cache, store):
+    """The LLMCache to use for a request with `params`, or None to go straight to the API."""
+    use_cache = is_deterministic(params) if cache is None else cache
+    if not use_cache:
+        return None
+    return store if store is not None else get_default_cache()
+
+
+def cached_completion(client, cache=None, store=None, **params):
+    """Message content of client.chat.completions.create(**params), through the
+    cache and the shared rate limiter (rate_limit.create_completion).
+
+    `cache` is None (cache only deterministic calls), True (also cache sampling
+    calls) or False (always call the API). `store` overrides the default LLMCache.
+    """
+    store = _store_for(params, cache, store)
+    if store is None:
+        return create_completion(client, **params).choices[0].message.content
+
+    key = request_key(params)
+    content = store.get(key)
+    if content is None:
+        content = create_completion(client, **params).choices[0].message.content
+        if content is not None:
+            store.put(key, params.get("model", ""), content)
+    return content
+
+
+def cached_stream(client, cache=None, store=None, **params):
+    """Yield the content deltas of a streamed completion, through the cache.
+
+    Same policy as cached_completion. A cache hit yields the whole stored
+    response as a single delta; a stream is only stored once it has been
+    read to the end.
+    """
+    store = _store_for(params, cache, store)
+    key = request_key(params) if store is not None else None
+    if store is not None:
+        content = store.get(key)
+        if content is not None:
+            yield content
+            return
+
+    parts = []
+    for chunk in create_completion(client, stream=True, **params):
+        # The final chunk carries no choices when usage reporting is on
+        if chunk.choices and chunk.choices[0].delta.content:
+            parts.append(chunk.choices[0].delta.content)
+            yield parts[-1]
+    if store is not None:
+        store.put(key, params.get("model", ""), "".join(parts))
+
+
+async def acached_completion(client, cache=None, store=None, **params):
+    """Async cached_completion for an AsyncOpenAI client.
+
+    Cache lookups stay synchronous: they are local SQLite reads, far shorter
+    than the API round trip they save.
+    """
+    store = _store_for(params, cache, store)
+    if store is None:
+        return (await acreate_completion(client, **params)).choices[0].message.content
+
+    key = request_key(params)
+    content = store.get(key)
+    if content is None:
+        content = (await acreate_completion(client, **params)).choices[0].message.content
+        if content is not None:
+            store.put(key, params.get("model", ""), content)
+    return content
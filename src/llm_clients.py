@@ -0,0 +1,59 @@
+import asyncio
+import os
+import threading
+import weakref
+
+from dotenv import load_dotenv
+from openai import AsyncOpenAI, OpenAI
+
+load_dotenv()
+
+# Concurrent LLM requests gather_limited allows by default
+DEFAULT_CONCURRENCY = 8
+
+_sync_client = None
+_async_clients = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def openai_client():
+    """The process-wide synchronous OpenAI client.
+
+    Clients are built with max_retries=0: rate_limit.RateLimiter retries every
+    call, and retrying in both places would multiply attempts.
+    """
+    global _sync_client
+    with _lock:
+        if _sync_client is None:
+            _sync_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+        return _sync_client
+
+
+def async_openai_client():
+    """The shared AsyncOpenAI client for the running event loop.
+
+    Its connection pool belongs to the loop it was first used on, so each
+    loop (e.g. each asyncio.run) gets one client, reused by every coroutine
+    on that loop, and dropped with the loop.
+    """
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_clients.get(loop)
+        if client is None:
+            client = _async_clients[loop] = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=0)
+        return client
+
+
+async def gather_limited(*aws, limit=DEFAULT_CONCURRENCY, return_exceptions=False):
+    """asyncio.gather with at most `limit` of the awaitables running at once.
+
+    Results come back in argument order. Pass coroutines (not tasks) so the
+    ones waiting for a slot have not started yet.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(aw):
+        async with semaphore:
+            return await aw
+
+    return await asyncio.gather(*(run(aw) for aw in aws), return_exceptions=return_exceptions)
@@ -0,0 +1,348 @@
+import re
+import threading
+
+from catalog import get_catalog
+from geography import REGION_ALIASES, REGIONS
+from model.requirements import ManufacturingRequirements
+
+# Confidence at which a locally extracted field is used without asking the model
+CONFIDENT = 0.8
+EXPLICIT = 0.95     # stated outright: "2000 units", "ISO9001", "low budget"
+MATCHED = 0.9       # a single catalog term
+INFERRED = 0.7      # plausible but not certain: a bare number with no unit or question
+AMBIGUOUS = 0.5     # several conflicting values, or a term that is also an everyday word
+NEGATED = 0.3       # the value appears after "not", "drop", ... or in a message that withdraws something
+
+# Longest vocabulary phrase, in words, tried at each position ("south africa", "iso 9001")
+MAX_PHRASE_WORDS = 4
+# Words just before a value that may negate it, including removal and switch
+# verbs ("drop the GOTS requirement", "switch to denim") that replace what was asked before
+NEGATIONS = frozenset({
+    "not", "no", "except", "excluding", "without", "avoid", "but", "nor", "never", "cannot", "longer",
+    "drop", "dropped", "dropping", "remove", "removed", "removing", "delete", "cancel", "scrap", "skip",
+    "forget", "exclude", "switch", "switching", "swap", "replace", "replacing", "change", "changing", "instead",
+})
+NEGATION_WINDOW = 3
+# "don't", "doesnt", "can t": folded to "do not", "does not", "ca not" before tokenising
+_CONTRACTION = re.compile(
+    r"\b(do|does|did|wo|ca|is|are|was|were|have|has|had|should|would|could|need)n(?:['\u2019`\u00b4]|\s)?t\b", re.I
+)
+# Anywhere in a message, these withdraw what it names: "We don't need cotton anymore", "use denim instead"
+_WITHDRAWAL = re.compile(r"\b(?:any\s*more|no longer|instead|rather than)\b", re.I)
+# An addition to list fields rather than a replacement: "Also add stretch denim"
+_ADDITION = re.compile(r"\b(?:also|add|adding|plus|as well|too|in addition|another)\b", re.I)
+# Materials that are also everyday words ("narrow it down")
+EVERYDAY_WORDS = frozenset({"down", "modal"})
+# Words just before a two-letter place name ("US") that make it where to source
+# from, rather than, say, the buyer's own country ("We are a US company")
+SOURCING_CUES = (
+    "made in", "manufactured in", "produced in", "sourced from", "from", "based in", "located in",
+    "factories in", "factory in", "manufacturers in", "manufacturer in", "suppliers in", "supplier in",
+)
+
+QUANTITY_UNITS = (
+    "units", "unit", "pieces", "piece", "pcs", "pc", "pairs", "pair", "items", "item",
+    "garments", "garment", "dozen", "qty",
+)
+# Mentions that mean the buyer talked about a field even if no value was recognised
+FIELD_CUES = {
+    "materials": ("material", "fabric", "made of", "made from", "made with", "textile"),
+    "certifications": ("certif", "compliance", "compliant", "standard", "audit"),
+    "geography": ("made in", "manufactured in", "produced in", "based in", "located", "country", "region"),
+    "budget_tier": ("budget", "cost", "price", "pricing", "spend", "cheap", "expensive"),
+    "moq": ("units", "pieces", "quantity", "moq", "minimum order", "how many"),
+}
+QUANTITY_QUESTION = re.compile(r"how many|quantit|\bunits\b|\bmoq\b|minimum order|volume", re.I)
+
+MULTIPLIERS = {"hundred": 100, "k": 1000, "thousand": 1000, "hundred thousand": 100_000, "mn": 10**6, "million": 10**6}
+_NUMBER = (
+    r"(\d{1,3}(?:,\d{3})+|\d+(?:\.\d+)?)\s*("
+    + "|".join(m.replace(" ", r"\s+") for m in sorted(MULTIPLIERS, key=len, reverse=True))
+    + r")?\b"
+)
+# A count followed directly by a unit or a catalog product, with only catalog
+# materials in between: "2000 units", "3000 denim jeans", but not "2 styles of jeans"
+_UNIT_QUANTITY = re.compile(
+    _NUMBER + r"\s*(?:(?:{materials})\s+)*(?:" + "|".join(QUANTITY_UNITS) + r"|{products})\b", re.I
+)
+_CUE_QUANTITY = re.compile(
+    r"(?:moq|minimum order(?: quantity)?|order quantity|quantity|order of|run of|volume)\s*"
+    r"(?:of|is|:|=|around|about|approx\.?|approximately)?\s*(?:around|about|roughly)?\s*" + _NUMBER,
+    re.I,
+)
+_BARE_NUMBER = re.compile(r"(?<![\w.])" + _NUMBER)
+
+BUDGET_TIERS = {
+    "low": ("low", "lower", "lowest"),
+    "medium": ("medium", "mid", "moderate", "average", "mid range", "midrange", "middle"),
+    "high": ("high", "higher", "highest", "premium"),
+}
+BUDGET_SYNONYMS = {
+    "low": ("cheap", "affordable", "inexpensive", "economical", "budget friendly", "low cost", "tight budget"),
+    "medium": ("mid range", "mid tier", "reasonable", "moderately priced"),
+    "high": ("luxury", "high end", "money is no object"),
+}
+_BUDGET_NOUNS = r"(?:budget|cost|costs|price|prices|pricing|tier|end|range|spend)"
+
+_WORD = re.compile(r"[0-9A-Za-z]+")
+
+
+def _stem(word):
+    # Plural folding only, so "jeans"/"jean" and "jackets"/"jacket" meet
+    if len(word) > 4 and word.endswith("es") and word[-3] in "sxz":
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def _key(words):
+    """Lookup key of a word sequence: casefolded, plural-folded and joined, so
+    "ISO 9001", "iso9001" and "OEKO-TEX" / "oekotex" share a key."""
+    return "".join(_stem(w.casefold()) for w in words)
+
+
+def _phrase_words(value):
+    return _WORD.findall(value.replace("_", " "))
+
+
+class LocalExtraction:
+    """Fields recognised in one message, each with a confidence in [0, 1].
+
+    `unresolved` lists the fields the message talks about but that could not
+    be read with confidence; those are the ones worth asking the model about.
+    `additive` is True when the message adds to list fields ("also add
+    cotton") rather than restating them.
+    """
+
+    def __init__(self, fields, confidence, unresolved, additive=False):
+        self.fields = fields
+        self.confidence = confidence
+        self.unresolved = unresolved
+        self.additive = additive
+
+    def confident_fields(self, threshold=CONFIDENT):
+        return {f: v for f, v in self.fields.items() if self.confidence.get(f, 0) >= threshold}
+
+    @property
+    def requirements(self):
+        """The confident fields as ManufacturingRequirements, or None without product_type and moq."""
+        fields = self.confident_fields()
+        if "product_type" not in fields or "moq" not in fields:
+            return None
+        return ManufacturingRequirements(**fields)
+
+    def __repr__(self):
+        return (
+            f"LocalExtraction(fields={self.fields!r}, confidence={self.confidence!r}, "
+            f"unresolved={self.unresolved!r}, additive={self.additive!r})"
+        )
+
+
+class LocalExtractor:
+    """Rule-based requirement extraction with the catalog's own vocabulary.
+
+    Product types, materials, certifications and geographies come from the
+    catalog indexes (plus the region names in geography), so anything the
+    recommender can match on is recognised under the same spelling it is
+    indexed by. Quantities and budget words are parsed with regexes. Each
+    field gets a confidence; nothing here calls the network.
+    """
+
+    def __init__(self, product_types, materials, certifications, geographies):
+        self.vocab = {}
+        for field, values in (
+            ("product_type", product_types),
+            ("materials", materials),
+            ("certifications", certifications),
+            ("geography", geographies),
+        ):
+            for phrase, value in values:
+                words = _phrase_words(phrase)
+                if words:
+                    self.vocab.setdefault(_key(words), (field, value, len(words) <= 1 and len(phrase) <= 2))
+        product_words = sorted({re.escape(w) for value, _ in product_types for w in _phrase_words(value)}, key=len)
+        material_words = sorted({re.escape(w) for phrase, _ in materials for w in _phrase_words(phrase)}, key=len)
+        self._unit_quantity = re.compile(
+            _UNIT_QUANTITY.pattern
+            .replace("{products}", "|".join(w + "s?" for w in product_words) or "(?!)")
+            .replace("{materials}", "|".join(material_words) or "(?!)"),
+            re.I,
+        )
+
+    @classmethod
+    def from_catalog(cls, catalog):
+        def canonical(index, attr):
+            # Index keys may be folded; take the spelling from a factory that carries the value
+            values = []
+            for key, postings in index.items():
+                if len(postings):
+                    f = catalog.factories[postings[0]]
+                    raw = getattr(f, attr)
+                    raw = raw if isinstance(raw, (list, tuple)) else [raw]
+                    values.append(next((v for v in raw if v.casefold() == key.casefold()), key))
+            return values
+
+        geographies = [(g, g) for g in canonical(catalog.geography_index, "geography")]
+        geographies += [(region, region) for region in REGIONS]
+        geographies += [(alias, region) for alias, region in REGION_ALIASES.items()]
+        return cls(
+            product_types=[(p, p) for p in catalog.product_index],
+            materials=[(m, m) for m in catalog.material_index],
+            certifications=[(c, c) for c in canonical(catalog.certification_index, "certifications")],
+            geographies=geographies,
+        )
+
+    def _terms(self, text):
+        """(field, value, negated, doubtful) for each vocabulary phrase in `text`, longest match first.
+
+        Doubtful terms are materials that are also everyday words and
+        two-letter place names without a sourcing cue.
+        """
+        words = _WORD.findall(_CONTRACTION.sub(r"\1 not", text))
+        found = []
+        i = 0
+        while i < len(words):
+            for n in range(min(MAX_PHRASE_WORDS, len(words) - i), 0, -1):
+                entry = self.vocab.get(_key(words[i:i + n]))
+                if entry is None:
+                    continue
+                field, value, short = entry
+                # Two-letter names ("US") only count when written in capitals, not "us"
+                if short and not words[i].isupper():
+                    continue
+                before = {w.casefold() for w in words[max(0, i - NEGATION_WINDOW):i]}
+                doubtful = field == "materials" and _key(words[i:i + n]) in EVERYDAY_WORDS
+                if field == "geography" and short:
+                    doubtful = not _sourcing_cue(words[:i])
+                found.append((field, value, bool(before & NEGATIONS), doubtful))
+                i += n - 1
+                break
+            i += 1
+        return found
+
+    def _quantity(self, text, context):
+        """(moq, confidence) or (None, 0)."""
+        explicit = [_number(m) for m in self._unit_quantity.finditer(text) if not _is_standard(text, m)]
+        explicit += [_number(m) for m in _CUE_QUANTITY.finditer(text)]
+        explicit = list(dict.fromkeys(q for q in explicit if q))
+        if explicit:
+            return explicit[-1], EXPLICIT if len(explicit) == 1 else AMBIGUOUS
+
+        bare = []
+        for m in _BARE_NUMBER.finditer(text):
+            if _is_standard(text, m):
+                continue
+            quantity = _number(m)
+            if quantity:
+                bare.append(quantity)
+        bare = list(dict.fromkeys(bare))
+        if len(bare) != 1:
+            return (bare[-1], AMBIGUOUS) if bare else (None, 0.0)
+        # A bare number answering "How many units?" is as good as one with a unit
+        if context and QUANTITY_QUESTION.search(context):
+            return bare[0], MATCHED
+        return bare[0], INFERRED
+
+    def _budget(self, text):
+        """(tier, confidence) or (None, 0)."""
+        folded = " ".join(_WORD.findall(text.casefold()))
+        hits = {}
+        for tier, words in BUDGET_TIERS.items():
+            alternatives = "|".join(re.escape(w) for w in words)
+            if re.search(rf"\b(?:{alternatives}) {_BUDGET_NOUNS}\b", folded) or re.search(
+                rf"\b{_BUDGET_NOUNS} (?:is |of |tier |around )?(?:{alternatives})\b", folded
+            ):
+                hits[tier] = EXPLICIT
+        for tier, words in BUDGET_SYNONYMS.items():
+            if tier not in hits and any(re.search(rf"\b{re.escape(w)}\b", folded) for w in words):
+                hits[tier] = MATCHED
+        if not hits:
+            return None, 0.0
+        if len(hits) > 1:
+            return None, AMBIGUOUS
+        (tier, confidence), = hits.items()
+        return tier, confidence
+
+    def extract(self, text, context=None):
+        """Extract requirement fields from one buyer message.
+
+        `context` is the assistant message it answers, which lets a bare
+        number reply to "How many units?" count as the quantity.
+        """
+        fields, confidence = {}, {}
+        values = {}
+        for field, value, negated, doubtful in self._terms(text):
+            score = NEGATED if negated else AMBIGUOUS if doubtful else MATCHED
+            entries = values.setdefault(field, {})
+            entries[value] = min(entries.get(value, 1.0), score)
+
+        for field, entries in values.items():
+            if field in ("materials", "certifications"):
+                # Keep the confident values; a doubtful one still marks the list for review
+                fields[field] = [v for v, score in entries.items() if score >= CONFIDENT] or list(entries)
+                confidence[field] = min(entries.values())
+            else:
+                fields[field] = next(iter(entries))
+                confidence[field] = min(entries.values()) if len(entries) == 1 else AMBIGUOUS
+
+        moq, moq_confidence = self._quantity(text, context)
+        if moq is not None:
+            fields["moq"], confidence["moq"] = moq, moq_confidence
+        tier, tier_confidence = self._budget(text)
+        if tier_confidence:
+            if tier is not None:
+                fields["budget_tier"] = tier
+            confidence["budget_tier"] = tier_confidence
+
+        if _WITHDRAWAL.search(text):
+            # Which of the named values is withdrawn is the model's call
+            confidence = {f: min(score, NEGATED) for f, score in confidence.items()}
+
+        folded = text.casefold()
+        unresolved = [f for f, score in confidence.items() if score < CONFIDENT]
+        unresolved += [
+            f for f, cues in FIELD_CUES.items()
+            if f not in confidence and any(cue in folded for cue in cues)
+        ]
+        return LocalExtraction(fields, confidence, unresolved, additive=_ADDITION.search(text) is not None)
+
+
+def _sourcing_cue(words):
+    # "made in the US", "factories in US": a cue ending just before the name, past an optional "the"
+    before = [w.casefold() for w in words[-4:]]
+    if before and before[-1] == "the":
+        before.pop()
+    phrase = " ".join(before)
+    return any(phrase == cue or phrase.endswith(" " + cue) for cue in SOURCING_CUES)
+
+
+def _is_standard(text, match):
+    # "ISO 9001 certified jeans" names a standard, not 9001 jeans
+    return re.search(r"iso\s*$", text[:match.start()], re.I) is not None
+
+
+def _number(match):
+    digits, multiplier = match.group(1), match.group(2)
+    try:
+        value = float(digits.replace(",", ""))
+    except ValueError:
+        return None
+    if multiplier:
+        value *= MULTIPLIERS[" ".join(multiplier.casefold().split())]
+    return int(value) if value >= 1 else None
+
+
+_extractors = {}
+_lock = threading.Lock()
+
+
+def get_local_extractor(path=None):
+    """LocalExtractor for the cached catalog at `path`, rebuilt when the catalog version changes."""
+    catalog = get_catalog(path).view()
+    key = str(catalog.path)
+    with _lock:
+        entry = _extractors.get(key)
+        if entry is None or entry[0] != catalog.version:
+            entry = _extractors[key] = (catalog.version, LocalExtractor.from_catalog(catalog))
+        return entry[1]
@@ -0,0 +1,159 @@
+import sys
+import threading
+from functools import lru_cache
+
+FIELDS = ("id", "name", "product_types", "materials", "moq_min", "geography", "certifications", "cost_tier")
+LIST_FIELDS = ("product_types", "materials", "certifications")
+
+# Identical vocabulary tuples (e.g. ("denim", "cotton")) are shared across records
+_tuple_pool = {}
+
+
+def _intern_tuple(values):
+    key = tuple(sys.intern(v) for v in values)
+    return _tuple_pool.setdefault(key, key)
+
+
+class Vocabulary:
+    """Assigns each distinct value a bit so value sets become integer bitmasks.
+
+    Bits are handed out on first sight and never change, so a mask computed at
+    load time and one computed for a request stay comparable with a single `&`.
+    Only records allocate bits (mask, at load); request values go through
+    lookup, which never does, so free text from users or the model cannot
+    grow the vocabulary.
+    """
+
+    def __init__(self, fold=None):
+        self._fold = fold
+        self._bits = {}
+        self._lock = threading.Lock()
+        self.mask = lru_cache(maxsize=8192)(self._mask)
+        self._lookup = lru_cache(maxsize=8192)(self._lookup_mask)
+
+    def bit(self, value):
+        if self._fold is not None:
+            value = self._fold(value)
+        bit = self._bits.get(value)
+        if bit is None:
+            with self._lock:
+                bit = self._bits.setdefault(value, 1 << len(self._bits))
+        return bit
+
+    def _mask(self, values):
+        # `values` must be hashable (a tuple); interned record tuples make this a cache hit
+        mask = 0
+        for value in values:
+            mask |= self.bit(value)
+        return mask
+
+    def lookup(self, values):
+        """(mask, complete) for request `values`: bits of the known values, and
+        whether every value is known. Unknown values get no bit, since no
+        record carries them."""
+        # Keyed on the vocabulary size too, so values allocated since are seen
+        return self._lookup(values, len(self._bits))
+
+    def _lookup_mask(self, values, size):
+        mask = 0
+        complete = True
+        for value in values:
+            bit = self._bits.get(self._fold(value) if self._fold is not None else value)
+            if bit is None:
+                complete = False
+            else:
+                mask |= bit
+        return mask, complete
+
+    def __len__(self):
+        return len(self._bits)
+
+
+MATERIAL_VOCABULARY = Vocabulary()
+# Certification codes are compared case-insensitively ("iso9001" covers "ISO9001")
+CERTIFICATION_VOCABULARY = Vocabulary(fold=str.casefold)
+
+
+class Factory:
+    """Compact factory record.
+
+    Vocabulary strings are interned and list fields are stored as shared
+    tuples, so repeated values like "ISO9001" or "cotton" cost one object per
+    catalog instead of one per factory. Materials and certifications are also
+    encoded as vocabulary bitmasks at construction, so overlap tests are a
+    single `&`. Dict-style access (factory["name"],
+    "moq_min" in factory, .get) is kept as a compatibility shim and returns
+    list fields as fresh lists, matching the JSON records.
+    """
+
+    __slots__ = FIELDS + ("material_bits", "certification_bits")
+
+    def __init__(self, id, name, product_types, materials, moq_min, geography, certifications, cost_tier):
+        self.id = sys.intern(id)
+        self.name = name
+        self.product_types = _intern_tuple(product_types)
+        self.materials = _intern_tuple(materials)
+        self.moq_min = moq_min
+        self.geography = sys.intern(geography)
+        self.certifications = _intern_tuple(certifications)
+        self.cost_tier = sys.intern(cost_tier)
+        self.material_bits = MATERIAL_VOCABULARY.mask(self.materials)
+        self.certification_bits = CERTIFICATION_VOCABULARY.mask(self.certifications)
+
+    @classmethod
+    def from_dict(cls, data):
+        # id and name are optional so partially specified factories can still be scored
+        return cls(
+            id=data.get("id", ""),
+            name=data.get("name", ""),
+            product_types=data["product_types"],
+            materials=data["materials"],
+            moq_min=data["moq_min"],
+            geography=data["geography"],
+            certifications=data["certifications"],
+            cost_tier=data["cost_tier"],
+        )
+
+    def __reduce__(self):
+        # Rebuild through __init__ so bitmasks use the receiving process's vocabulary
+        return Factory, tuple(getattr(self, field) for field in FIELDS)
+
+    def to_dict(self):
+        return {field: self[field] for field in FIELDS}
+
+    # Dict compatibility shim
+
+    def __getitem__(self, key):
+        if key not in FIELDS:
+            raise KeyError(key)
+        value = getattr(self, key)
+        return list(value) if key in LIST_FIELDS else value
+
+    def get(self, key, default=None):
+        return self[key] if key in FIELDS else default
+
+    def __contains__(self, key):
+        return key in FIELDS
+
+    def keys(self):
+        return iter(FIELDS)
+
+    def items(self):
+        return ((field, self[field]) for field in FIELDS)
+
+    def __eq__(self, other):
+        if isinstance(other, Factory):
+            return all(getattr(self, f) == getattr(other, f) for f in FIELDS)
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Factory(id={self.id!r}, name={self.name!r})"
+
+
+def as_factory(value):
+    """Return `value` as a Factory, converting plain dict records."""
+    return value if isinstance(value, Factory) else Factory.from_dict(value)
@@ -0,0 +1,174 @@
+import bisect
+import heapq
+import itertools
+import re
+from array import array
+from collections import Counter, defaultdict
+
+# Minimum similarity for a fuzzy match, and how far ahead of the runner-up the
+# best candidate must be before it is returned without asking
+MIN_SIMILARITY = 0.7
+AMBIGUITY_MARGIN = 0.1
+# Candidates that get a full similarity score after cheap overlap counting
+MAX_CANDIDATES = 16
+# Postings longer than this (common words like "apparel") only help rank, not generate, candidates
+MAX_POSTING = 1024
+# Rarest query trigrams used to generate candidates when no token matches exactly
+MAX_TRIGRAM_PROBES = 6
+# Posting entries counted per query to generate candidates, rarest lists first
+MAX_COUNTED = 2048
+
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_name(name):
+    """Casefold, drop punctuation and collapse whitespace: '**Dhaka Denim Works.**' -> 'dhaka denim works'."""
+    return " ".join(_NON_WORD.sub(" ", name.casefold()).split())
+
+
+def name_trigrams(normalized):
+    """Trigrams of each space-padded token, so '1' and '12' never share a trigram."""
+    # Windows over the whole padded name, minus those centred on a space, which
+    # would span two tokens; `normalized` has single spaces, so the rest are exactly
+    # the trigrams of the padded tokens
+    padded = f" {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2) if padded[i + 1] != " "}
+
+
+def _overlap_similarity(shared, query_size, name_size):
+    # Best of Dice and the two containment ratios, so a name quoted inside extra
+    # words ("Dhaka Denim Works please") and a shortened name ("Dhaka Denim") both score 1
+    if not shared:
+        return 0.0
+    return max(2 * shared / (query_size + name_size), shared / name_size, shared / query_size)
+
+
+class FactoryNameIndex:
+    """Exact and fuzzy lookup of factories by name.
+
+    Normalised names (and ids) resolve through a dict. Anything else is
+    matched through token and trigram indexes: rare tokens (or, failing that,
+    the rarest trigrams) generate a handful of candidates, which are scored
+    on both whole-token and trigram overlap. The best is returned only if it
+    is clearly ahead; otherwise the close candidates come back as an
+    ambiguity list instead of a guess.
+
+    Each name's token and trigram counts are stored at build time, and the
+    overlap with a query is counted by bisecting the sorted posting lists,
+    so scoring a candidate builds no sets. Queries made only of common words
+    count just the first MAX_POSTING entries of each list, which bounds the
+    work; such a query can then only yield an ambiguity list.
+    """
+
+    def __init__(self, factories):
+        self.factories = factories
+        self.names = []
+        exact = defaultdict(list)
+        token_index = defaultdict(list)
+        trigram_index = defaultdict(list)
+        # Distinct tokens and trigrams of each name, the denominators of the overlap scores
+        self.token_counts = array("I")
+        self.trigram_counts = array("I")
+        for pos, f in enumerate(factories):
+            key = normalize_name(f.name)
+            tokens = set(key.split())
+            grams = name_trigrams(key)
+            self.names.append(key)
+            self.token_counts.append(len(tokens))
+            self.trigram_counts.append(len(grams))
+            exact[key].append(pos)
+            exact[normalize_name(f.id)].append(pos)
+            for token in tokens:
+                token_index[token].append(pos)
+            for gram in grams:
+                trigram_index[gram].append(pos)
+        # Plain dicts, so lookups of unknown keys never insert empty lists
+        self.exact = dict(exact)
+        self.tokens = dict(token_index)
+        self.trigrams = dict(trigram_index)
+
+    def resolve(self, name):
+        """Return (factory, candidates).
+
+        A confident match gives (factory, [factory]); an ambiguous one gives
+        (None, close candidates, best first); no plausible match gives (None, []).
+        """
+        key = normalize_name(name)
+        if not key:
+            return None, []
+        positions = self.exact.get(key)
+        if positions is not None:
+            matches = [self.factories[pos] for pos in dict.fromkeys(positions)]
+            return (matches[0], matches) if len(matches) == 1 else (None, matches)
+
+        scored, complete = self._fuzzy(key)
+        if not scored or scored[0][0] < MIN_SIMILARITY:
+            return None, []
+        best = scored[0][0]
+        close = [self.factories[pos] for score, pos in scored if best - score < AMBIGUITY_MARGIN]
+        # If equally good candidates were cut off, a single survivor is not a safe pick
+        if len(close) == 1 and complete:
+            return close[0], close
+        return None, close
+
+    def _count(self, postings, head=None):
+        """Per-position hit counts over the selective posting lists, or {} if none is selective.
+
+        Lists are taken rarest first until MAX_COUNTED entries have been
+        counted. With `head`, long lists are not skipped but only their first
+        `head` entries counted.
+        """
+        selected = []
+        budget = MAX_COUNTED
+        for posting in sorted(postings, key=len):
+            if head is not None:
+                posting = posting[:head]
+            elif len(posting) > MAX_POSTING or (selected and len(posting) > budget):
+                break
+            selected.append(posting)
+            budget -= len(posting)
+        return Counter(itertools.chain.from_iterable(selected))
+
+    def _fuzzy(self, key):
+        """(similarity, position) of the best candidates, most similar first, and
+        whether every candidate tied with the leaders was scored."""
+        tokens = set(key.split())
+        grams = name_trigrams(key)
+        token_postings = [self.tokens[t] for t in tokens if t in self.tokens]
+        gram_postings = [self.trigrams[g] for g in grams if g in self.trigrams]
+        counts = self._count(token_postings)
+        capped = False
+        if not counts:
+            # No distinctive whole token (e.g. a typo in it): probe the rarest trigrams instead
+            rare = sorted(gram_postings, key=len)[:MAX_TRIGRAM_PROBES]
+            counts = self._count(rare)
+            if not counts:
+                # Only common words ("golden apparel"): count the head of each list; the
+                # candidates are then a sample, so the result is never complete
+                lists = token_postings or rare
+                counts = self._count(lists, head=MAX_COUNTED // len(lists) if lists else 0)
+                capped = True
+        if not counts:
+            return [], True
+
+        ranked = heapq.nlargest(MAX_CANDIDATES + 1, counts, key=counts.get)
+        complete = not capped and (
+            len(ranked) <= MAX_CANDIDATES or counts[ranked[MAX_CANDIDATES]] < counts[ranked[0]]
+        )
+        scored = []
+        for pos in ranked[:MAX_CANDIDATES]:
+            token_score = _overlap_similarity(_shared(token_postings, pos), len(tokens), self.token_counts[pos])
+            gram_score = _overlap_similarity(_shared(gram_postings, pos), len(grams), self.trigram_counts[pos])
+            scored.append(((token_score + gram_score) / 2, pos))
+        scored.sort(key=lambda s: (-s[0], self.factories[s[1]].id))
+        return scored, complete
+
+
+def _shared(postings, pos):
+    # How many of the sorted posting lists contain `pos`
+    shared = 0
+    for posting in postings:
+        i = bisect.bisect_left(posting, pos)
+        if i < len(posting) and posting[i] == pos:
+            shared += 1
+    return shared
@@ -0,0 +1,110 @@
+import atexit
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from columnar import ColumnarCatalog
+from factories import score_components, render_results, _push_top_n, _drain_top_n
+
+# Per-worker state, filled once by _init_worker when the worker starts: the
+# shards that worker owns, keyed by shard index
+_worker_shards = None
+
+
+def _init_worker(shards):
+    global _worker_shards
+    _worker_shards = {
+        shard_index: (offset, [f.id for f in factories], ColumnarCatalog(factories))
+        for shard_index, offset, factories in shards
+    }
+
+
+def _score_shard(shard_index, req, top_n):
+    """Local top-N of one shard as (score, factory_id, global_position) tuples."""
+    offset, ids, columns = _worker_shards[shard_index]
+    scores = columns.score(req)
+    return [
+        (int(scores[pos]), ids[pos], offset + int(pos))
+        for pos in columns.top_positions(scores, top_n)[0]
+        if scores[pos] > 0
+    ]
+
+
+class ShardedScorer:
+    """Worker processes holding a catalog split into contiguous shards.
+
+    Shard i is owned by worker i % workers. Each worker is a single-process
+    pool whose initializer receives only the shards it owns, so memory and
+    startup grow with the catalog size rather than workers x catalog size,
+    and a request for a shard is always sent to its owner. Afterwards a
+    request only ships the requirements and top_n.
+    """
+
+    def __init__(self, catalog, shards=None, workers=None):
+        self.catalog = catalog
+        self.version = catalog.version
+        self.workers = workers or os.cpu_count() or 1
+        self.shards = max(1, min(shards or self.workers, len(catalog) or 1))
+
+        factories = list(catalog.factories)
+        bounds = [len(factories) * i // self.shards for i in range(self.shards + 1)]
+        owned = [[] for _ in range(min(self.workers, self.shards))]
+        for i in range(self.shards):
+            owned[i % len(owned)].append((i, bounds[i], factories[bounds[i]:bounds[i + 1]]))
+        self._pools = [
+            ProcessPoolExecutor(max_workers=1, initializer=_init_worker, initargs=(shards,))
+            for shards in owned
+        ]
+
+    def recommend(self, req, top_n=3):
+        if top_n <= 0:
+            return []
+        futures = [
+            self._pools[i % len(self._pools)].submit(_score_shard, i, req, top_n)
+            for i in range(self.shards)
+        ]
+
+        # Merge the shard-local top-Ns with the same (score, id) ordering
+        heap = []
+        for future in futures:
+            for score, factory_id, pos in future.result():
+                _push_top_n(heap, top_n, score, factory_id, pos)
+
+        scored = []
+        for pos in _drain_top_n(heap):
+            f = self.catalog.factories[pos]
+            scored.append((f, *score_components(f, req)))
+        return render_results(scored, req)
+
+    def shutdown(self):
+        for pool in self._pools:
+            pool.shutdown(cancel_futures=True)
+
+
+# One live pool per (catalog, shards, workers) configuration
+_scorers = {}
+_scorers_lock = threading.Lock()
+
+
+def get_sharded_scorer(catalog, shards=None, workers=None):
+    """Return the pool for this configuration, replacing pools built for a stale catalog version."""
+    catalog = catalog.view()
+    key = (catalog.path, shards, workers)
+    with _scorers_lock:
+        scorer = _scorers.get(key)
+        if scorer is not None and scorer.catalog is catalog and scorer.version == catalog.version:
+            return scorer
+        if scorer is not None:
+            scorer.shutdown()
+        scorer = _scorers[key] = ShardedScorer(catalog, shards=shards, workers=workers)
+        return scorer
+
+
+def shutdown_pools():
+    with _scorers_lock:
+        for scorer in _scorers.values():
+            scorer.shutdown()
+        _scorers.clear()
+
+
+atexit.register(shutdown_pools)
@@ -0,0 +1,304 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+
+from openai import APIConnectionError, APIStatusError, RateLimitError
+from tenacity import AsyncRetrying, Retrying, retry_if_exception, wait_random_exponential
+
+# Default quota (gpt-4o-mini, usage tier 1); override with LLM_RPM / LLM_TPM
+DEFAULT_RPM = 500
+DEFAULT_TPM = 200_000
+# Completion tokens reserved for a request that sets no max_tokens; corrected from usage afterwards
+DEFAULT_COMPLETION_TOKENS = 512
+# Attempts per call for rate limits and server errors, and for connection failures
+MAX_ATTEMPTS = 6
+CONNECTION_ATTEMPTS = 3
+# Jittered exponential backoff: uniform(0, BACKOFF_BASE * 2**n), capped at BACKOFF_MAX seconds
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+
+
+class TokenBucket:
+    """Token bucket refilled at `per_minute`, holding at most one minute's worth.
+
+    reserve() always takes the tokens, letting the balance go negative, and
+    returns how long the caller must wait before using them; callers are thus
+    served in arrival order and never wake up only to find the tokens gone.
+    """
+
+    def __init__(self, per_minute, clock=time.monotonic):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount=1):
+        """Take `amount` tokens; return the seconds to wait before they are available."""
+        with self._lock:
+            self._refill()
+            # A request larger than the whole bucket would otherwise never fit
+            self._tokens -= min(amount, self.capacity)
+            return max(0.0, -self._tokens / self.rate)
+
+    def refund(self, amount):
+        """Return `amount` unused tokens (negative to charge more after the fact)."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + amount)
+
+
+class AdaptiveConcurrency:
+    """In-flight request cap adjusted by AIMD.
+
+    Each success raises the cap by 1/cap (about +1 per round of requests);
+    a throttled request halves it. Only requests admitted since the last
+    decrease can trigger another, so a burst of 429s from requests that were
+    already in flight counts as one signal. Usable from threads (acquire)
+    and coroutines (aacquire) at the same time.
+    """
+
+    def __init__(self, initial=8, minimum=1, maximum=64, decrease=0.5):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self.in_flight = 0
+        # Bumped on every decrease; acquire() hands it out as the request's ticket
+        self._generation = 0
+        self._cond = threading.Condition()
+        self._async_waiters = deque()
+
+    def _try_acquire(self):
+        if self.in_flight < int(self.limit):
+            self.in_flight += 1
+            return True
+        return False
+
+    def _wake(self):
+        self._cond.notify_all()
+        while self._async_waiters:
+            loop, future = self._async_waiters.popleft()
+            try:
+                loop.call_soon_threadsafe(_resolve, future)
+            except RuntimeError:
+                # The waiter's loop has closed
+                pass
+
+    def acquire(self):
+        """Wait for a slot; returns the ticket to pass to on_throttle."""
+        with self._cond:
+            while not self._try_acquire():
+                self._cond.wait()
+            return self._generation
+
+    async def aacquire(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                if self._try_acquire():
+                    return self._generation
+                future = loop.create_future()
+                self._async_waiters.append((loop, future))
+            await future
+
+    def release(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._wake()
+
+    def on_success(self):
+        with self._cond:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._wake()
+
+    def on_throttle(self, ticket):
+        with self._cond:
+            if ticket == self._generation:
+                self.limit = max(self.minimum, self.limit * self.decrease)
+                self._generation += 1
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+def estimate_tokens(params):
+    """Rough token cost of a request: ~4 characters per prompt token plus the completion budget."""
+    chars = sum(len(str(m.get("content") or "")) for m in params.get("messages", ()))
+    completion = params.get("max_completion_tokens") or params.get("max_tokens") or DEFAULT_COMPLETION_TOKENS
+    return chars // 4 + completion
+
+
+def retry_after(exc):
+    """Seconds the server asked us to wait (Retry-After / retry-after-ms), or None."""
+    response = getattr(exc, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            value = headers["retry-after"]
+            try:
+                return float(value)
+            except ValueError:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+def is_retryable(exc):
+    if isinstance(exc, RateLimitError):
+        # An exhausted quota does not come back by waiting
+        return getattr(exc, "code", None) != "insufficient_quota"
+    if isinstance(exc, APIConnectionError):
+        return True
+    if isinstance(exc, APIStatusError):
+        return exc.status_code in (408, 409) or exc.status_code >= 500
+    return False
+
+
+_backoff = wait_random_exponential(multiplier=BACKOFF_BASE, max=BACKOFF_MAX)
+
+
+def _wait(retry_state):
+    backoff = _backoff(retry_state)
+    requested = retry_after(retry_state.outcome.exception())
+    if requested is None:
+        return backoff
+    # Honour the server's delay, plus jitter so throttled callers do not all return at once
+    return requested + random.uniform(0, BACKOFF_BASE)
+
+
+def _stop(retry_state):
+    exc = retry_state.outcome.exception()
+    attempts = CONNECTION_ATTEMPTS if isinstance(exc, APIConnectionError) else MAX_ATTEMPTS
+    return retry_state.attempt_number >= attempts
+
+
+class RateLimiter:
+    """Client-side limits shared by every OpenAI call in the process.
+
+    A request first reserves one request and its estimated tokens from the
+    per-minute buckets, then takes an adaptive concurrency slot, and is
+    retried with jittered exponential backoff (or the server's Retry-After)
+    on 429s, 5xx and connection errors. Streams hold their slot only until
+    the response starts.
+    """
+
+    def __init__(self, rpm=DEFAULT_RPM, tpm=DEFAULT_TPM, concurrency=None,
+                 clock=time.monotonic, sleep=time.sleep, asleep=asyncio.sleep):
+        self.requests = TokenBucket(rpm, clock=clock)
+        self.tokens = TokenBucket(tpm, clock=clock)
+        self.concurrency = concurrency if concurrency is not None else AdaptiveConcurrency()
+        self._sleep = sleep
+        self._asleep = asleep
+        self.throttled = 0
+        self.retries = 0
+
+    def _retry_options(self):
+        return dict(retry=retry_if_exception(is_retryable), wait=_wait, stop=_stop,
+                    before_sleep=self._before_retry, reraise=True)
+
+    def _before_retry(self, retry_state):
+        self.retries += 1
+
+    def _reserve(self, estimate):
+        return max(self.requests.reserve(1), self.tokens.reserve(estimate))
+
+    def _record(self, estimate, response):
+        self.concurrency.on_success()
+        usage = getattr(response, "usage", None)
+        if usage is not None and getattr(usage, "total_tokens", None) is not None:
+            self.tokens.refund(estimate - usage.total_tokens)
+
+    def _record_error(self, exc, ticket):
+        if isinstance(exc, RateLimitError):
+            self.throttled += 1
+            self.concurrency.on_throttle(ticket)
+
+    def call(self, create, **params):
+        """create(**params) under the limits, with retries."""
+        estimate = estimate_tokens(params)
+        for attempt in Retrying(sleep=self._sleep, **self._retry_options()):
+            with attempt:
+                delay = self._reserve(estimate)
+                if delay:
+                    self._sleep(delay)
+                ticket = self.concurrency.acquire()
+                try:
+                    response = create(**params)
+                except Exception as exc:
+                    self._record_error(exc, ticket)
+                    raise
+                finally:
+                    self.concurrency.release()
+                self._record(estimate, response)
+        return response
+
+    async def acall(self, create, **params):
+        """Async call() for a coroutine `create`."""
+        estimate = estimate_tokens(params)
+        async for attempt in AsyncRetrying(sleep=self._asleep, **self._retry_options()):
+            with attempt:
+                delay = self._reserve(estimate)
+                if delay:
+                    await self._asleep(delay)
+                ticket = await self.concurrency.aacquire()
+                try:
+                    response = await create(**params)
+                except Exception as exc:
+                    self._record_error(exc, ticket)
+                    raise
+                finally:
+                    self.concurrency.release()
+                self._record(estimate, response)
+        return response
+
+    def stats(self):
+        return {
+            "concurrency_limit": self.concurrency.limit,
+            "in_flight": self.concurrency.in_flight,
+            "throttled": self.throttled,
+            "retries": self.retries,
+        }
+
+
+_default_limiter = None
+_default_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """The process-wide limiter, sized from $LLM_RPM and $LLM_TPM."""
+    global _default_limiter
+    with _default_lock:
+        if _default_limiter is None:
+            _default_limiter = RateLimiter(
+                rpm=int(os.getenv("LLM_RPM") or DEFAULT_RPM),
+                tpm=int(os.getenv("LLM_TPM") or DEFAULT_TPM),
+            )
+        return _default_limiter
+
+
+def create_completion(client, limiter=None, **params):
+    """client.chat.completions.create(**params) through the shared rate limiter."""
+    return (limiter or get_rate_limiter()).call(client.chat.completions.create, **params)
+
+
+async def acreate_completion(client, limiter=None, **params):
+    """Async create_completion for an AsyncOpenAI client."""
+    return await (limiter or get_rate_limiter()).acall(client.chat.completions.create, **params)
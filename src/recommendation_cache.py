@@ -0,0 +1,130 @@
+import hashlib
+import json
+import threading
+
+from cachetools import TTLCache
+
+from catalog import get_catalog
+from factories import recommend_factories
+from model.requirements import ManufacturingRequirements
+
+DEFAULT_MAXSIZE = 4096
+DEFAULT_TTL_SECONDS = 15 * 60
+
+
+def _fold(value):
+    return " ".join(value.casefold().split()) if isinstance(value, str) else value
+
+
+def canonical_requirements(req):
+    """Requirements reduced to what the recommendation depends on.
+
+    Only differences scoring ignores are normalised away: geography and
+    certifications are compared case-insensitively, so they are case-folded,
+    and list order and duplicates are dropped. Product type, materials and
+    budget tier match case-sensitively and are kept as given. Equal
+    canonical forms therefore always mean equal results, while the cache
+    still scores the caller's own requirements.
+    """
+    return ManufacturingRequirements(
+        product_type=req.product_type,
+        product_description=req.product_description,
+        materials=sorted(set(req.materials)),
+        moq=req.moq,
+        geography=_fold(req.geography) or None,
+        certifications=sorted({_fold(c) for c in req.certifications}),
+        budget_tier=req.budget_tier,
+    )
+
+
+def requirements_key(req, use_description=False):
+    """Stable hash of the scoring-relevant fields of canonicalised requirements.
+
+    product_description only affects results when it is scored, so it is only
+    part of the key then.
+    """
+    canonical = canonical_requirements(req)
+    payload = canonical.model_dump(exclude=None if use_description else {"product_description"})
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class RecommendationCache:
+    """LRU + TTL cache in front of recommend_factories.
+
+    Keys combine the canonical requirements hash with the catalog path and
+    version, so a reloaded or delta-patched catalog never serves stale
+    results; when a new version of a path is seen, that path's entries for
+    older versions are dropped and other paths keep theirs.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL_SECONDS):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self._versions = {}
+        self.hits = 0
+        self.misses = 0
+
+    def recommend(self, req, top_n=3, path=None, backend="indexed", use_description=False):
+        catalog = get_catalog(path)
+        key = (requirements_key(req, use_description), top_n, backend, catalog.path, catalog.version)
+
+        with self._lock:
+            if self._versions.get(catalog.path, catalog.version) != catalog.version:
+                self._evict_stale(catalog.path, catalog.version)
+            self._versions[catalog.path] = catalog.version
+
+            results = self._cache.get(key)
+            if results is not None:
+                self.hits += 1
+                return _copy(results)
+            self.misses += 1
+
+        results = recommend_factories(req, top_n=top_n, backend=backend, path=path, use_description=use_description)
+        with self._lock:
+            self._cache[key] = results
+        return _copy(results)
+
+    def _evict_stale(self, path, version):
+        # Key layout: (requirements hash, top_n, backend, catalog path, catalog version)
+        stale = [key for key in self._cache if key[3] == path and key[4] != version]
+        for key in stale:
+            self._cache.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._versions.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._cache),
+                "maxsize": self._cache.maxsize,
+                "ttl": self._cache.ttl,
+            }
+
+
+def _copy(results):
+    # Callers get their own lists so mutating a result cannot corrupt the cache
+    return [dict(r, reasons=list(r["reasons"])) for r in results]
+
+
+# Shared by every Streamlit session in the process
+_shared_cache = RecommendationCache()
+
+
+def cached_recommend_factories(req, top_n=3, path=None, backend="indexed", use_description=False):
+    """recommend_factories through the process-wide recommendation cache."""
+    return _shared_cache.recommend(req, top_n=top_n, path=path, backend=backend, use_description=use_description)
+
+
+def recommendation_cache_stats():
+    return _shared_cache.stats()
+
+
+def clear_recommendation_cache():
+    _shared_cache.clear()
@@ -0,0 +1,295 @@
+"""Compiled binary catalog snapshots.
+
+Layout: 8-byte magic, little-endian uint64 header length, JSON header, then
+64-byte aligned array sections (columns, string table, posting lists) that
+load_snapshot maps as zero-copy NumPy views.
+
+    python src/snapshot.py [catalog.json] [out.snap]
+"""
+import json
+import mmap
+import struct
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from catalog import Catalog, DEFAULT_CATALOG_PATH, ReadOnlyCatalogError
+from columnar import ColumnarCatalog
+from model.factory import Factory
+
+MAGIC = b"GFSNAP01"
+FORMAT_VERSION = 1
+SNAPSHOT_SUFFIX = ".snap"
+DEFAULT_SNAPSHOT_PATH = DEFAULT_CATALOG_PATH.with_suffix(SNAPSHOT_SUFFIX)
+_ALIGN = 64
+
+_LIST_FIELDS = ("product_types", "materials", "certifications")
+_INDEXES = (
+    ("product", "product_vocab"),
+    ("material", "material_vocab"),
+    ("geography", "geography_vocab"),
+    ("cost_tier", "cost_tier_vocab"),
+)
+
+
+def _vocab_list(vocab):
+    return [value for value, _ in sorted(vocab.items(), key=lambda item: item[1])]
+
+
+class _StringTable:
+    def __init__(self):
+        self.codes = {}
+        self.strings = []
+
+    def add(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.strings)
+            self.strings.append(value)
+        return code
+
+    def arrays(self):
+        encoded = [s.encode("utf-8") for s in self.strings]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def _csr(rows):
+    offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum([len(r) for r in rows], out=offsets[1:])
+    items = np.fromiter((v for r in rows for v in r), dtype=np.int64, count=int(offsets[-1]))
+    return offsets, items
+
+
+def compile_snapshot(path=None, out_path=None):
+    """Compile a JSON catalog into a binary snapshot file and return its path."""
+    source = Path(path) if path is not None else DEFAULT_CATALOG_PATH
+    out_path = Path(out_path) if out_path is not None else source.with_suffix(SNAPSHOT_SUFFIX)
+
+    with open(source, "r") as f:
+        factories = [Factory.from_dict(record) for record in json.load(f)]
+    catalog = Catalog(factories)
+    columns = catalog.columns
+
+    strings = _StringTable()
+    arrays = {
+        "id": np.array([strings.add(f.id) for f in factories], dtype=np.int64),
+        "name": np.array([strings.add(f.name) for f in factories], dtype=np.int64),
+        "geography_name": np.array([strings.add(f.geography) for f in factories], dtype=np.int64),
+        "product_bits": columns.product_bits,
+        "material_bits": columns.material_bits,
+        "moq_min": columns.moq_min,
+        "geography": columns.geography,
+        "cost_tier": columns.cost_tier,
+        "id_rank": columns.id_rank,
+        "moq_order": np.array(catalog._moq_order, dtype=np.int64),
+        "moq_sorted": np.array(catalog._moq_sorted, dtype=np.int64),
+    }
+    for field in _LIST_FIELDS:
+        arrays[f"{field}_offsets"], arrays[f"{field}_items"] = _csr(
+            [[strings.add(v) for v in getattr(f, field)] for f in factories]
+        )
+
+    # Posting lists in columnar vocabulary order, so code i owns postings[offsets[i]:offsets[i+1]]
+    python_indexes = {
+        "product": catalog.product_index,
+        "material": catalog.material_index,
+        "geography": catalog.geography_index,
+        "cost_tier": catalog.cost_tier_index,
+    }
+    for name, vocab_attr in _INDEXES:
+        vocab = _vocab_list(getattr(columns, vocab_attr))
+        arrays[f"{name}_postings_offsets"], arrays[f"{name}_postings"] = _csr(
+            [python_indexes[name].get(value, ()) for value in vocab]
+        )
+    arrays["strings"], arrays["string_offsets"] = strings.arrays()
+
+    header = {
+        "format": FORMAT_VERSION,
+        "size": len(factories),
+        "vocab": {vocab_attr: _vocab_list(getattr(columns, vocab_attr)) for _, vocab_attr in _INDEXES},
+        "arrays": {},
+    }
+    # Header size depends on the offsets it records, so lay sections out relative
+    # to the end of a provisional header and iterate until it stops growing
+    header_len = 0
+    while True:
+        offset = _align(len(MAGIC) + 8 + header_len)
+        for name, array in arrays.items():
+            header["arrays"][name] = {"offset": offset, "dtype": array.dtype.str, "shape": list(array.shape)}
+            offset = _align(offset + array.nbytes)
+        encoded = json.dumps(header).encode("utf-8")
+        if len(encoded) <= header_len:
+            break
+        header_len = len(encoded) + 64
+
+    tmp_path = out_path.with_name(out_path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", header_len))
+        f.write(encoded.ljust(header_len, b" "))
+        for name, array in arrays.items():
+            f.seek(header["arrays"][name]["offset"])
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.truncate(offset)
+    # Atomic replace so processes mapping the old snapshot keep a consistent file
+    tmp_path.replace(out_path)
+    return out_path
+
+
+def _align(offset):
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+class _SnapshotRecords:
+    """Read-only sequence that materialises Factory records from the string table on access."""
+
+    def __init__(self, arrays, cost_tiers):
+        self._a = arrays
+        self._cost_tiers = cost_tiers
+        self._size = len(arrays["id"])
+
+    def __len__(self):
+        return self._size
+
+    def _string(self, code):
+        offsets = self._a["string_offsets"]
+        return self._a["strings"][offsets[code]:offsets[code + 1]].tobytes().decode("utf-8")
+
+    def _list(self, field, pos):
+        offsets = self._a[f"{field}_offsets"]
+        items = self._a[f"{field}_items"][offsets[pos]:offsets[pos + 1]]
+        return [self._string(code) for code in items]
+
+    def __getitem__(self, pos):
+        if isinstance(pos, slice):
+            return [self[p] for p in range(*pos.indices(self._size))]
+        if pos < 0:
+            pos += self._size
+        if not 0 <= pos < self._size:
+            raise IndexError("factory position out of range")
+        a = self._a
+        return Factory(
+            id=self._string(a["id"][pos]),
+            name=self._string(a["name"][pos]),
+            product_types=self._list("product_types", pos),
+            materials=self._list("materials", pos),
+            moq_min=int(a["moq_min"][pos]),
+            geography=self._string(a["geography_name"][pos]),
+            certifications=self._list("certifications", pos),
+            cost_tier=self._cost_tiers[a["cost_tier"][pos]],
+        )
+
+    def __iter__(self):
+        for pos in range(self._size):
+            yield self[pos]
+
+
+class _PostingIndex:
+    """Mapping view from a vocabulary value to its posting-list slice."""
+
+    def __init__(self, vocab, offsets, postings):
+        self._codes = {value: code for code, value in enumerate(vocab)}
+        self._offsets = offsets
+        self._postings = postings
+
+    def get(self, value, default=()):
+        code = self._codes.get(value)
+        if code is None:
+            return default
+        return self._postings[self._offsets[code]:self._offsets[code + 1]]
+
+    def __getitem__(self, value):
+        postings = self.get(value, None)
+        if postings is None:
+            raise KeyError(value)
+        return postings
+
+    def __contains__(self, value):
+        return value in self._codes
+
+    def __iter__(self):
+        return iter(self._codes)
+
+    def items(self):
+        for value in self._codes:
+            yield value, self.get(value)
+
+
+class SnapshotCatalog(Catalog):
+    """Catalog backed by a memory-mapped snapshot instead of parsed JSON."""
+
+    def __init__(self, path, signature=None):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a factory catalog snapshot")
+        (header_len,) = struct.unpack_from("<Q", self._mmap, len(MAGIC))
+        start = len(MAGIC) + 8
+        header = json.loads(self._mmap[start:start + header_len])
+        if header["format"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format {header['format']}")
+
+        self.arrays = {}
+        for name, spec in header["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"], dtype=np.int64))
+            view = np.frombuffer(self._mmap, dtype=dtype, count=count, offset=spec["offset"])
+            self.arrays[name] = view.reshape(spec["shape"])
+        self.vocab = header["vocab"]
+
+        super().__init__(
+            _SnapshotRecords(self.arrays, self.vocab["cost_tier_vocab"]),
+            path=str(path),
+            signature=signature,
+        )
+        self._columns = ColumnarCatalog.from_arrays(self.vocab, self.arrays)
+
+    def _build_indexes(self):
+        # Everything was prebuilt by compile_snapshot; just bind views
+        a = self.arrays
+        self.positions = None
+        self._bitmaps = {}
+        self._certification_index = None
+        for name, vocab_attr in _INDEXES:
+            index = _PostingIndex(self.vocab[vocab_attr], a[f"{name}_postings_offsets"], a[f"{name}_postings"])
+            setattr(self, f"{name}_index", index)
+        self.id_rank = a["id_rank"]
+        self._moq_order = a["moq_order"]
+        self._moq_sorted = a["moq_sorted"]
+
+    def id_key(self, pos):
+        # Precomputed id ranks avoid materialising records just to break ties
+        return self.id_rank[pos]
+
+    def with_delta(self, ops):
+        raise ReadOnlyCatalogError(f"{self.path} is a read-only snapshot; apply the delta to the JSON catalog and recompile")
+
+    apply_delta = with_delta
+
+    @property
+    def certification_index(self):
+        # Not stored in the snapshot; only constraint queries need it, so build on first use
+        if self._certification_index is None:
+            index = {}
+            for pos, f in enumerate(self.factories):
+                for certification in {c.casefold() for c in f.certifications}:
+                    index.setdefault(certification, []).append(pos)
+            self._certification_index = index
+        return self._certification_index
+
+    def _moq_cutoff(self, limit):
+        return int(np.searchsorted(self._moq_sorted, limit, side="right"))
+
+
+def load_snapshot(path=None, signature=None):
+    """Memory-map a compiled snapshot and return it as a SnapshotCatalog."""
+    return SnapshotCatalog(path if path is not None else DEFAULT_SNAPSHOT_PATH, signature=signature)
+
+
+if __name__ == "__main__":
+    out = compile_snapshot(*sys.argv[1:3])
+    print(f"Wrote {out}")
@@ -0,0 +1,306 @@
+"""SQLite-backed factory catalog.
+
+The store keeps one row per factory plus normalized product type, material
+and certification tables, all indexed, so the filterable parts of
+score_factory run as indexed SQL and Python only scores the surviving
+candidates. Several processes can open the same file read-only.
+
+    python src/sqlite_store.py [catalog.json] [out.sqlite]
+"""
+import itertools
+import json
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+
+from catalog import DEFAULT_CATALOG_PATH, SQLITE_SUFFIXES, ReadOnlyCatalogError, next_catalog_version
+from geography import resolve_geography
+from model.factory import Factory
+from factories import (
+    PRODUCT_WEIGHT,
+    MATERIAL_WEIGHT,
+    MOQ_WEIGHT,
+    GEOGRAPHY_WEIGHT,
+    BUDGET_WEIGHT,
+    score_components,
+    render_results,
+    _beats,
+    _push_top_n,
+    _drain_top_n,
+)
+
+SCHEMA = """
+CREATE TABLE factories (
+    pos INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    moq_min INTEGER NOT NULL,
+    geography TEXT NOT NULL,
+    geography_key TEXT NOT NULL,
+    cost_tier TEXT NOT NULL,
+    product_types_json TEXT NOT NULL,
+    materials_json TEXT NOT NULL,
+    certifications_json TEXT NOT NULL
+);
+CREATE TABLE factory_product_types (value TEXT NOT NULL, pos INTEGER NOT NULL, PRIMARY KEY (value, pos)) WITHOUT ROWID;
+CREATE TABLE factory_materials (value TEXT NOT NULL, pos INTEGER NOT NULL, PRIMARY KEY (value, pos)) WITHOUT ROWID;
+CREATE TABLE factory_certifications (value TEXT NOT NULL, pos INTEGER NOT NULL, PRIMARY KEY (value, pos)) WITHOUT ROWID;
+CREATE INDEX idx_factories_geography ON factories (geography_key, pos);
+CREATE INDEX idx_factories_cost_tier ON factories (cost_tier, pos);
+CREATE INDEX idx_factories_moq ON factories (moq_min, id);
+"""
+
+_LIST_TABLES = (
+    ("product_types", "factory_product_types"),
+    ("materials", "factory_materials"),
+    ("certifications", "factory_certifications"),
+)
+
+
+def build_sqlite_catalog(path=None, out_path=None):
+    """Load a JSON catalog into a new SQLite store and return its path."""
+    source = Path(path) if path is not None else DEFAULT_CATALOG_PATH
+    out_path = Path(out_path) if out_path is not None else source.with_suffix(".sqlite")
+
+    with open(source, "r") as f:
+        records = json.load(f)
+
+    tmp_path = out_path.with_name(out_path.name + ".tmp")
+    tmp_path.unlink(missing_ok=True)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript(SCHEMA)
+        conn.executemany(
+            "INSERT INTO factories VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                (
+                    pos, r["id"], r["name"], r["moq_min"], r["geography"], r["geography"].lower(),
+                    r["cost_tier"], json.dumps(r["product_types"]), json.dumps(r["materials"]),
+                    json.dumps(r["certifications"]),
+                )
+                for pos, r in enumerate(records)
+            ),
+        )
+        for field, table in _LIST_TABLES:
+            conn.executemany(
+                f"INSERT OR IGNORE INTO {table} VALUES (?, ?)",
+                ((value, pos) for pos, r in enumerate(records) for value in r[field]),
+            )
+        conn.execute("ANALYZE")
+        conn.commit()
+    finally:
+        conn.close()
+    tmp_path.replace(out_path)
+    return out_path
+
+
+def _row_to_factory(row):
+    return Factory(
+        id=row[1],
+        name=row[2],
+        moq_min=row[3],
+        geography=row[4],
+        cost_tier=row[5],
+        product_types=json.loads(row[6]),
+        materials=json.loads(row[7]),
+        certifications=json.loads(row[8]),
+    )
+
+
+_FACTORY_COLUMNS = "pos, id, name, moq_min, geography, cost_tier, product_types_json, materials_json, certifications_json"
+
+
+class SqliteCatalog:
+    """Catalog stored in SQLite; factories are fetched on demand rather than held in memory."""
+
+    storage = "sqlite"
+
+    def __init__(self, path, signature=None):
+        self.path = str(path)
+        self.signature = signature
+        self.version = next_catalog_version()
+        self._local = threading.local()
+        self._factories = None
+        self._columns = None
+        self._name_index = None
+        self.geography_keys = [
+            row[0] for row in self._conn().execute("SELECT DISTINCT geography_key FROM factories")
+        ]
+
+    def _conn(self):
+        # sqlite3 connections are per-thread; open a read-only one lazily in each
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            self._local.conn = conn
+        return conn
+
+    def view(self):
+        return self
+
+    def with_delta(self, ops):
+        raise ReadOnlyCatalogError(f"{self.path} is a read-only SQLite store; apply the delta to the JSON catalog and rebuild it")
+
+    apply_delta = with_delta
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM factories").fetchone()[0]
+
+    @property
+    def factories(self):
+        """Every factory in position order; loads the whole store into memory."""
+        if self._factories is None:
+            rows = self._conn().execute(f"SELECT {_FACTORY_COLUMNS} FROM factories ORDER BY pos")
+            self._factories = [_row_to_factory(row) for row in rows]
+        return self._factories
+
+    @property
+    def columns(self):
+        if self._columns is None:
+            from columnar import ColumnarCatalog
+            self._columns = ColumnarCatalog(self.factories)
+        return self._columns
+
+    @property
+    def name_index(self):
+        if self._name_index is None:
+            from name_index import FactoryNameIndex
+            self._name_index = FactoryNameIndex(self.factories)
+        return self._name_index
+
+    def fetch(self, positions):
+        """Factory records for `positions`, keyed by position."""
+        positions = list(positions)
+        fetched = {}
+        # Stay well below SQLite's bound-parameter limit
+        for start in range(0, len(positions), 500):
+            chunk = positions[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._conn().execute(
+                f"SELECT {_FACTORY_COLUMNS} FROM factories WHERE pos IN ({placeholders})", chunk
+            )
+            for row in rows:
+                fetched[row[0]] = _row_to_factory(row)
+        return fetched
+
+    def _criteria(self, req):
+        """(weight, matching positions query, predicate on `f` excluding them, params) per indexed criterion."""
+        criteria = []
+        if req.product_type:
+            criteria.append((
+                PRODUCT_WEIGHT,
+                "SELECT pos FROM factory_product_types WHERE value = ?",
+                "NOT EXISTS (SELECT 1 FROM factory_product_types AS t WHERE t.value = ? AND t.pos = f.pos)",
+                [req.product_type],
+            ))
+        if req.materials:
+            placeholders = ",".join("?" * len(req.materials))
+            criteria.append((
+                MATERIAL_WEIGHT,
+                f"SELECT DISTINCT pos FROM factory_materials WHERE value IN ({placeholders})",
+                f"NOT EXISTS (SELECT 1 FROM factory_materials AS t"
+                f" WHERE t.value IN ({placeholders}) AND t.pos = f.pos)",
+                list(req.materials),
+            ))
+        geography_keys = sorted(resolve_geography(req.geography, self.geography_keys))
+        if geography_keys:
+            placeholders = ",".join("?" * len(geography_keys))
+            criteria.append((
+                GEOGRAPHY_WEIGHT,
+                f"SELECT pos FROM factories WHERE geography_key IN ({placeholders})",
+                f"f.geography_key NOT IN ({placeholders})",
+                geography_keys,
+            ))
+        if req.budget_tier:
+            criteria.append((
+                BUDGET_WEIGHT,
+                "SELECT pos FROM factories WHERE cost_tier = ?",
+                "f.cost_tier != ?",
+                [req.budget_tier],
+            ))
+        return criteria
+
+    def indexed_bounds(self, req):
+        """Cursor over (upper_bound, pos, id) for factories matching an indexed criterion, strongest first.
+
+        Bounds are summed in SQL from index lookups and include the full MOQ
+        weight. Rows are read lazily, so a caller that stops early never
+        brings the rest into Python.
+        """
+        criteria = self._criteria(req)
+        if not criteria:
+            return iter(())
+        union = " UNION ALL ".join(f"SELECT pos, {weight} AS w FROM ({query})" for weight, query, _, _ in criteria)
+        query = f"""
+            SELECT m.bound + {MOQ_WEIGHT}, m.pos, f.id
+            FROM (SELECT pos, SUM(w) AS bound FROM ({union}) GROUP BY pos) AS m
+            JOIN factories AS f ON f.pos = m.pos
+            ORDER BY m.bound DESC, f.id
+        """
+        return self._conn().execute(query, [p for _, _, _, params in criteria for p in params])
+
+    def moq_only(self, req, limit):
+        """Best `limit` factories that only qualify through MOQ: full MOQ fits first, then by id.
+
+        Factories matching an indexed criterion are excluded in SQL, against
+        the same indexes. Each MOQ band is walked in id order and stops after
+        `limit` rows, so nothing is sorted.
+        """
+        criteria = self._criteria(req)
+        exclusions = "".join(f" AND {predicate}" for _, _, predicate, _ in criteria)
+        params = [p for _, _, _, params in criteria for p in params]
+        bands = (("f.moq_min <= ?", [req.moq]), ("f.moq_min > ? AND f.moq_min <= ?", [req.moq, 2 * req.moq]))
+        found = []
+        for band, band_params in bands:
+            if len(found) >= limit:
+                break
+            rows = self._conn().execute(
+                f"SELECT {_FACTORY_COLUMNS} FROM factories AS f WHERE {band}{exclusions} ORDER BY f.id LIMIT ?",
+                band_params + params + [limit - len(found)],
+            )
+            found.extend((row[0], _row_to_factory(row)) for row in rows)
+        return found
+
+    def recommend(self, req, top_n=3):
+        if top_n <= 0:
+            return []
+        heap = []
+
+        def push(f):
+            score, mask = score_components(f, req)
+            if score > 0:
+                _push_top_n(heap, top_n, score, f.id, (f, score, mask))
+
+        bounds = self.indexed_bounds(req)
+        # Fetch and score in bound order until no remaining candidate can displace the k-th result
+        batch_size = max(top_n, 64)
+        while True:
+            batch = list(itertools.islice(bounds, batch_size))
+            if not batch:
+                break
+            fetched = self.fetch(pos for _, pos, _ in batch)
+            stop = False
+            for bound, pos, factory_id in batch:
+                if len(heap) == top_n and not _beats(bound, factory_id, heap[0]):
+                    stop = True
+                    break
+                push(fetched[pos])
+            if stop:
+                break
+
+        # MOQ-only factories can score at most MOQ_WEIGHT; only look them up if that could matter
+        if len(heap) < top_n or heap[0].score <= MOQ_WEIGHT:
+            for _, f in self.moq_only(req, limit=top_n):
+                push(f)
+
+        return render_results(_drain_top_n(heap), req)
+
+
+def load_sqlite_catalog(path, signature=None):
+    return SqliteCatalog(path, signature=signature)
+
+
+if __name__ == "__main__":
+    out = build_sqlite_catalog(*sys.argv[1:3])
+    print(f"Wrote {out}")
@@ -0,0 +1,151 @@
+import itertools
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+
+import numpy as np
+
+# Cosine similarity at which a free-text product description counts as a match
+DESCRIPTION_THRESHOLD = 0.15
+# Trigrams only smooth over spelling variants; whole words should dominate, so
+# "organizers" does not match "organic" on shared trigrams alone
+TRIGRAM_WEIGHT = 0.3
+# Product types are what a description names most often, so they outweigh materials and names
+PRODUCT_TYPE_WEIGHT = 2
+
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+
+
+def _stem(word):
+    # Plural folding only: "jackets" -> "jacket", "dresses" -> "dress"
+    if len(word) > 4 and word.endswith("es") and word[-3] in "sxz":
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+@lru_cache(maxsize=65536)
+def text_terms(text):
+    """(term, weight) pairs of the stemmed words and character trigrams of `text`.
+
+    Words catch vocabulary ("jeans" / "jean"); trigrams of each space-padded
+    word add partial credit for compounds ("winterwear", "stretch_denim") at
+    TRIGRAM_WEIGHT. Cached because catalog vocabulary and name words repeat
+    heavily.
+    """
+    terms = Counter()
+    for word in _words(text):
+        if word.isdigit():
+            # Numbers ("Plant 12", "500 units") say nothing about the product
+            continue
+        word = _stem(word)
+        terms[word] += 1
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            terms["#" + padded[i:i + 3]] += TRIGRAM_WEIGHT
+    return tuple(terms.items())
+
+
+def _words(text):
+    return _NON_WORD.sub(" ", text.casefold()).split()
+
+
+class DescriptionIndex:
+    """TF-IDF vectors of each factory's product types, materials and name.
+
+    The L2-normalised factory x term matrix is stored column-major (CSC: each
+    term owns a slice of factory rows and weights), so matching a description
+    is one sparse matrix-vector product that only touches the query's terms,
+    computed with np.bincount. NumPy only; nothing leaves the process.
+    """
+
+    def __init__(self, factories):
+        self.size = len(factories)
+        self.vocab = {}
+        # Term arrays per component: the (product_types, materials) pair, which
+        # repeats across the catalog, and each name word
+        self._components = {}
+        parts, lengths = [], []
+        for f in factories:
+            components = [self._component((f.product_types, f.materials))]
+            components.extend(self._component(word) for word in _words(f.name) if not word.isdigit())
+            parts.extend(components)
+            lengths.append(sum(len(c[0]) for c in components))
+
+        nnz = sum(lengths)
+        rows = np.repeat(np.arange(self.size, dtype=np.int64), lengths)
+        cols = np.fromiter(itertools.chain.from_iterable(c[0] for c in parts), dtype=np.int64, count=nnz)
+        weights = np.fromiter(itertools.chain.from_iterable(c[1] for c in parts), dtype=np.float64, count=nnz)
+        # A term can come from several components ("denim" material and "Denim" in
+        # the name); merge those into one entry. Keys sort by column then row, so
+        # the merged entries are already in CSC order.
+        keys, inverse = np.unique(cols * max(1, self.size) + rows, return_inverse=True)
+        tf = np.bincount(inverse, weights=weights)
+        cols, rows = np.divmod(keys, max(1, self.size))
+        del self._components
+
+        # Smoothed idf, as in scikit-learn: rare terms weigh more, no term weighs zero
+        df = np.bincount(cols, minlength=len(self.vocab))
+        self.idf = np.log((1 + self.size) / (1 + df)) + 1
+        data = tf * self.idf[cols]
+        norms = np.sqrt(np.bincount(rows, weights=data * data, minlength=self.size))
+        data /= np.where(norms > 0, norms, 1)[rows]
+
+        self.rows = rows
+        self.data = data.astype(np.float32)
+        self.col_ptr = np.zeros(len(self.vocab) + 1, dtype=np.int64)
+        np.cumsum(df, out=self.col_ptr[1:])
+
+    def _component(self, key):
+        component = self._components.get(key)
+        if component is None:
+            if isinstance(key, tuple):
+                product_types, materials = key
+                texts = [(text, PRODUCT_TYPE_WEIGHT) for text in product_types] + [(text, 1) for text in materials]
+            else:
+                texts = [(key, 1)]
+            terms = Counter()
+            for text, scale in texts:
+                for term, weight in text_terms(text):
+                    terms[term] += weight * scale
+            cols = tuple(self.vocab.setdefault(term, len(self.vocab)) for term in terms)
+            component = self._components[key] = (cols, tuple(terms.values()))
+        return component
+
+    def __len__(self):
+        return self.size
+
+    def query_vector(self, text):
+        """Normalised {column: weight} for the known terms of `text`.
+
+        Terms the catalog has never seen still count towards the norm (at the
+        idf of an unseen term), so "kitchen organizers" is not judged on its
+        few trigrams that happen to occur in "organic".
+        """
+        weights = {}
+        unseen = 0.0
+        unseen_idf = math.log(1 + self.size) + 1
+        for term, count in text_terms(text):
+            col = self.vocab.get(term)
+            if col is not None:
+                weights[col] = count * self.idf[col]
+            else:
+                unseen += (count * unseen_idf) ** 2
+        norm = math.sqrt(sum(w * w for w in weights.values()) + unseen)
+        return {col: w / norm for col, w in weights.items()} if weights else {}
+
+    def similarity(self, text):
+        """Cosine similarity of `text` to every factory, as a float array in position order."""
+        query = self.query_vector(text)
+        if not query:
+            return np.zeros(self.size, dtype=np.float32)
+        slices = [slice(self.col_ptr[col], self.col_ptr[col + 1]) for col in query]
+        rows = np.concatenate([self.rows[s] for s in slices])
+        weights = np.concatenate([self.data[s] * np.float32(query[col]) for col, s in zip(query, slices)])
+        return np.bincount(rows, weights=weights, minlength=self.size).astype(np.float32)
+
+    def matches(self, text, threshold=DESCRIPTION_THRESHOLD):
+        """Positions whose similarity to `text` reaches `threshold`, ascending."""
+        return np.flatnonzero(self.similarity(text) >= threshold)
@@ -9,6 +9,14 @@ import pytest
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 
+@pytest.fixture(autouse=True, scope="session")
+def llm_cache_path(tmp_path_factory):
+    """Point the default LLM response cache at a temporary file for the whole session"""
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setenv("LLM_CACHE_PATH", str(tmp_path_factory.mktemp("llm_cache") / "llm_cache.sqlite"))
+        yield
+
+
 @pytest.fixture
 def sample_factory():
     """Sample factory data for testing"""
@@ -0,0 +1,307 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import json
+import pytest
+from catalog import (
+    iter_factories,
+    get_catalog,
+    invalidate_catalog_cache,
+    catalog_cache_stats,
+    reset_catalog_cache_stats,
+)
+from factories import load_factories, recommend_factories
+from model.requirements import ManufacturingRequirements
+
+
+@pytest.fixture
+def catalog_file(tmp_path, sample_factory):
+    """Write a one-factory catalog to a temporary file"""
+    path = tmp_path / "factories.json"
+    path.write_text(json.dumps([sample_factory]))
+    invalidate_catalog_cache()
+    reset_catalog_cache_stats()
+    yield path
+    invalidate_catalog_cache()
+
+
+class TestCatalogCache:
+    """Test the process-wide catalog cache"""
+
+    def test_first_load_is_miss(self, catalog_file):
+        """Test that the first load parses the file"""
+        catalog = get_catalog(catalog_file)
+        assert len(catalog) == 1
+        stats = catalog_cache_stats()
+        assert stats["misses"] == 1
+        assert stats["hits"] == 0
+
+    def test_repeat_load_is_hit(self, catalog_file):
+        """Test that unchanged files are served from cache"""
+        first = load_factories(catalog_file)
+        second = load_factories(catalog_file)
+        assert first == second
+        assert catalog_cache_stats()["hits"] == 1
+
+    def test_returned_list_is_callers_own(self):
+        """Test that reordering the loaded list leaves the cached catalog's indexes intact"""
+        req = ManufacturingRequirements(product_type="jeans", moq=2000, geography="Bangladesh")
+        expected = recommend_factories(req)
+        load_factories().sort(key=lambda f: f.id, reverse=True)
+        assert recommend_factories(req) == expected
+
+    def test_file_change_triggers_reload(self, catalog_file, sample_factory, jeans_factory):
+        """Test that a modified file is re-parsed"""
+        get_catalog(catalog_file)
+        catalog_file.write_text(json.dumps([sample_factory, jeans_factory]))
+
+        catalog = get_catalog(catalog_file)
+        assert len(catalog) == 2
+        assert catalog_cache_stats()["reloads"] == 1
+
+    def test_explicit_invalidation(self, catalog_file):
+        """Test that invalidation forces a fresh parse"""
+        first = get_catalog(catalog_file)
+        invalidate_catalog_cache(catalog_file)
+        second = get_catalog(catalog_file)
+
+        assert first is not second
+        assert catalog_cache_stats()["misses"] == 2
+
+    def test_missing_file_raises(self, tmp_path):
+        """Test that a missing catalog file raises"""
+        with pytest.raises(FileNotFoundError):
+            get_catalog(tmp_path / "missing.json")
+
+
+class TestCatalogIndexes:
+    """Test inverted-index candidate generation"""
+
+    def _full_scan(self, catalog, req):
+        from factories import score_factory
+        return [pos for pos, f in enumerate(catalog.factories) if score_factory(f, req)[0] > 0]
+
+    def test_candidates_cover_every_positive_score(self, jeans_requirements, sample_requirements):
+        """Test that candidate generation never drops a factory that would score"""
+        catalog = get_catalog()
+        for req in (jeans_requirements, sample_requirements):
+            candidates = set(catalog.candidates(req))
+            assert set(self._full_scan(catalog, req)) <= candidates
+
+    def test_selective_query_skips_non_matching(self):
+        """Test that factories sharing nothing with the request are not candidates"""
+        from model.requirements import ManufacturingRequirements
+        catalog = get_catalog()
+        req = ManufacturingRequirements(
+            product_type="jeans",
+            materials=["denim"],
+            moq=1,
+            geography="Bangladesh",
+        )
+
+        candidates = catalog.candidates(req)
+        assert len(candidates) < len(catalog)
+        assert candidates == self._full_scan(catalog, req)
+
+    def test_geography_postings_case_insensitive(self):
+        """Test that geography lookups follow the substring rule"""
+        catalog = get_catalog()
+        assert catalog.geography_postings("china") == catalog.geography_postings("CHINA")
+        assert catalog.geography_postings(None) == []
+
+
+class TestStreamingLoader:
+    """Test iter_factories for JSON arrays and JSON Lines"""
+
+    def test_json_array_small_chunks(self, tmp_path):
+        """Test incremental array decoding when records straddle chunk boundaries"""
+        factories = load_factories()
+        path = tmp_path / "factories.json"
+        path.write_text(json.dumps([f.to_dict() for f in factories], indent=2))
+
+        assert list(iter_factories(path, chunk_size=7)) == factories
+
+    def test_json_lines(self, tmp_path):
+        """Test JSON Lines input, ignoring blank lines"""
+        factories = load_factories()
+        path = tmp_path / "factories.jsonl"
+        path.write_text("\n".join(json.dumps(f.to_dict()) for f in factories) + "\n\n")
+
+        assert list(iter_factories(path, chunk_size=10)) == factories
+
+    def test_empty_array(self, tmp_path):
+        """Test that an empty array yields nothing"""
+        path = tmp_path / "empty.json"
+        path.write_text("[ ]")
+
+        assert list(iter_factories(path)) == []
+
+    def test_truncated_array_raises(self, tmp_path, sample_factory):
+        """Test that a truncated file is reported rather than silently cut short"""
+        path = tmp_path / "truncated.json"
+        path.write_text("[" + json.dumps(sample_factory) + ', {"id": ')
+
+        with pytest.raises(ValueError):
+            list(iter_factories(path, chunk_size=4))
+
+    def test_recommend_from_stream(self, tmp_path, jeans_requirements):
+        """Test that streamed scoring matches the in-memory recommendation"""
+        path = tmp_path / "factories.jsonl"
+        path.write_text("\n".join(json.dumps(f.to_dict()) for f in load_factories()))
+
+        streamed = recommend_factories(jeans_requirements, top_n=5, source=iter_factories(path))
+        assert streamed == recommend_factories(jeans_requirements, top_n=5)
+
+
+class TestCatalogDelta:
+    """Test incremental delta application"""
+
+    @pytest.fixture
+    def catalog(self, tmp_path):
+        path = tmp_path / "factories.json"
+        path.write_text(json.dumps([f.to_dict() for f in load_factories()]))
+        yield get_catalog(path)
+        invalidate_catalog_cache(path)
+
+    def _assert_indexes_fresh(self, catalog):
+        from catalog import Catalog
+        fresh = Catalog(list(catalog.factories))
+        for attr in ("product_index", "material_index", "geography_index", "cost_tier_index",
+                     "certification_index", "positions"):
+            assert getattr(catalog, attr) == getattr(fresh, attr), attr
+        assert catalog._moq_sorted == fresh._moq_sorted
+        assert sorted(zip(catalog._moq_sorted, catalog._moq_order)) == sorted(zip(fresh._moq_sorted, fresh._moq_order))
+
+    def test_upsert_new_factory(self, catalog, jeans_factory, jeans_requirements):
+        """Test that a new factory is indexed and recommendable"""
+        version = catalog.version
+        new_version = catalog.apply_delta([{"op": "upsert", "factory": jeans_factory}])
+
+        assert new_version > version
+        assert catalog.factories[catalog.positions["JEANS001"]].name == "Denim Masters Ltd"
+        self._assert_indexes_fresh(catalog)
+        results = recommend_factories(jeans_requirements, top_n=50, path=catalog.path)
+        assert "JEANS001" in [r["factory"].id for r in results]
+
+    def test_update_existing_factory(self, catalog):
+        """Test that an update replaces the record and its postings"""
+        record = catalog.factories[0].to_dict()
+        record["geography"] = "Peru"
+        record["materials"] = ["alpaca"]
+        catalog.apply_delta([{"op": "upsert", "factory": record}])
+
+        assert catalog.factories[0].geography == "Peru"
+        assert catalog.material_index["alpaca"] == [0]
+        self._assert_indexes_fresh(catalog)
+
+    def test_delete(self, catalog):
+        """Test that deletes swap-remove the record and keep indexes consistent"""
+        size = len(catalog)
+        catalog.apply_delta([{"op": "delete", "id": "A001"}, {"op": "delete", "id": "UNKNOWN"}])
+
+        assert len(catalog) == size - 1
+        assert "A001" not in catalog.positions
+        self._assert_indexes_fresh(catalog)
+
+    def test_invalid_delta_is_not_applied(self, catalog, jeans_factory):
+        """Test that a bad operation leaves the catalog untouched"""
+        version = catalog.version
+        with pytest.raises(ValueError):
+            catalog.apply_delta([{"op": "upsert", "factory": jeans_factory}, {"op": "rename"}])
+        assert catalog.version == version
+        assert "JEANS001" not in catalog.positions
+
+    def test_delta_file(self, catalog, tmp_path, jeans_factory):
+        """Test applying a JSON Lines delta file to the cached catalog"""
+        from catalog import apply_delta_file
+        delta = tmp_path / "delta.jsonl"
+        delta.write_text(
+            json.dumps({"op": "upsert", "factory": jeans_factory}) + "\n"
+            + json.dumps({"op": "delete", "id": "A002"}) + "\n"
+        )
+        apply_delta_file(delta, catalog.path)
+
+        assert "JEANS001" in catalog.positions
+        assert "A002" not in catalog.positions
+        assert get_catalog(catalog.path) is catalog
+        self._assert_indexes_fresh(catalog)
+
+    def test_vectorized_view_follows_delta(self, catalog, jeans_factory, jeans_requirements):
+        """Test that the columnar view is rebuilt after a delta"""
+        before = len(catalog.columns)
+        catalog.apply_delta([{"op": "upsert", "factory": jeans_factory}])
+        assert len(catalog.columns) == before + 1
+        assert recommend_factories(jeans_requirements, top_n=5, path=catalog.path, backend="vectorized") == \
+            recommend_factories(jeans_requirements, top_n=5, path=catalog.path)
+
+    def test_constraint_bitmaps_follow_delta(self, catalog, jeans_factory, jeans_requirements):
+        """Test that cached constraint bitmaps are dropped when the catalog changes"""
+        req = jeans_requirements.model_copy(update={"certifications": ["WRAP"]})
+        constraints = {"geography", "certifications"}
+        before = recommend_factories(req, top_n=50, path=catalog.path, constraints=constraints)
+        catalog.apply_delta([{"op": "upsert", "factory": dict(jeans_factory, certifications=["WRAP"])}])
+        after = recommend_factories(req, top_n=50, path=catalog.path, constraints=constraints)
+
+        assert "JEANS001" not in [r["factory"].id for r in before]
+        assert "JEANS001" in [r["factory"].id for r in after]
+
+    def test_columns_patched_not_rebuilt(self, catalog, jeans_factory):
+        """Test that a built columnar view is patched by a delta and matches a fresh build"""
+        from columnar import ColumnarCatalog
+        from model.requirements import ManufacturingRequirements
+        catalog.columns
+        record = dict(jeans_factory, materials=["denim", "hemp"], geography="Peru", cost_tier="premium")
+        catalog.apply_delta([
+            {"op": "upsert", "factory": record},
+            {"op": "delete", "id": "A001"},
+            {"op": "upsert", "factory": dict(catalog.factories[3].to_dict(), moq_min=7)},
+        ])
+
+        patched = catalog.view()._columns
+        assert patched is not None
+        fresh = ColumnarCatalog(catalog.factories)
+        assert list(patched.id_rank) == list(fresh.id_rank)
+        for f in (catalog.factories[0], catalog.factories[-1]):
+            req = ManufacturingRequirements(product_type=f.product_types[0], materials=f.materials,
+                                            moq=f.moq_min, geography=f.geography, budget_tier=f.cost_tier)
+            assert list(patched.score(req)) == list(fresh.score(req))
+
+    def test_old_version_unchanged(self, catalog, jeans_factory):
+        """Test that a view taken before a delta keeps its factories and postings"""
+        view = catalog.view()
+        size, positions = len(view), dict(view.positions)
+        postings = {key: list(value) for key, value in view.material_index.items()}
+        catalog.apply_delta([{"op": "upsert", "factory": jeans_factory}, {"op": "delete", "id": "A001"}])
+
+        assert catalog.view() is not view
+        assert len(view) == size
+        assert view.positions == positions
+        assert view.material_index == postings
+
+    def test_concurrent_reads_during_deltas(self, catalog, jeans_factory, jeans_requirements):
+        """Test that recommendations running alongside deltas never see a half-applied one"""
+        import threading
+        errors = []
+        done = threading.Event()
+
+        def read():
+            while not done.is_set():
+                try:
+                    recommend_factories(jeans_requirements, top_n=5, path=catalog.path)
+                except Exception as exc:
+                    errors.append(exc)
+                    return
+
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        for t in readers:
+            t.start()
+        ids = [f.id for f in catalog.factories[:20]]
+        for i in range(200):
+            record = dict(jeans_factory, id=f"JEANS{i % 7}")
+            catalog.apply_delta([{"op": "upsert", "factory": record}, {"op": "delete", "id": ids[i % len(ids)]}])
+        done.set()
+        for t in readers:
+            t.join()
+        assert errors == []
+        self._assert_indexes_fresh(catalog)
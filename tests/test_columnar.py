@@ -0,0 +1,112 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import random
+import pytest
+from columnar import ColumnarCatalog
+from factories import score_factory, recommend_factories, recommend_factories_batch, load_factories
+from model.requirements import ManufacturingRequirements
+
+
+def _random_catalog(rng, size, vocab_size):
+    """Random factories with a material vocabulary wider than one bitmask word"""
+    materials = [f"mat_{i}" for i in range(vocab_size)]
+    return [
+        {
+            "id": f"R{i:05d}",
+            "name": f"Random Factory {i}",
+            "product_types": rng.sample(["jeans", "apparel", "fashion", "jackets", "electronics"], 2),
+            "materials": rng.sample(materials, 3),
+            "moq_min": rng.randint(1, 5000),
+            "geography": rng.choice(["China", "Vietnam", "India", "Europe", "USA"]),
+            "certifications": [],
+            "cost_tier": rng.choice(["low", "medium", "high"]),
+        }
+        for i in range(size)
+    ]
+
+
+def _random_requirements(rng, vocab_size):
+    return ManufacturingRequirements(
+        product_type=rng.choice(["jeans", "apparel", "fashion", "toys"]),
+        materials=[f"mat_{rng.randrange(vocab_size)}" for _ in range(2)],
+        moq=rng.randint(0, 6000),
+        geography=rng.choice([None, "china", "Vietnam", "south india", "EUROPE"]),
+        budget_tier=rng.choice([None, "low", "medium", "high"]),
+    )
+
+
+class TestVectorizedScoring:
+    """Test the columnar scorer against score_factory"""
+
+    def test_equivalence_on_catalog(self, sample_requirements, jeans_requirements, minimal_requirements):
+        """Test vectorized scores equal score_factory on the shipped catalog"""
+        factories = load_factories()
+        columns = ColumnarCatalog(factories)
+
+        for req in (sample_requirements, jeans_requirements, minimal_requirements):
+            expected = [score_factory(f, req)[0] for f in factories]
+            assert columns.score(req).tolist() == expected
+
+    def test_equivalence_on_random_catalog(self):
+        """Test equivalence with multi-word bitmasks and random requirements"""
+        rng = random.Random(7)
+        factories = _random_catalog(rng, 500, vocab_size=150)
+        columns = ColumnarCatalog(factories)
+        assert columns.material_bits.shape[1] == 3
+
+        for _ in range(50):
+            req = _random_requirements(rng, 150)
+            expected = [score_factory(f, req)[0] for f in factories]
+            assert columns.score(req).tolist() == expected
+
+    def test_unknown_vocabulary(self):
+        """Test that values missing from the catalog vocabulary never match"""
+        columns = ColumnarCatalog(load_factories())
+        req = ManufacturingRequirements(product_type="spaceships", materials=["unobtainium"], moq=0)
+        assert columns.score(req).max() == 0
+
+    def test_vectorized_backend_matches_indexed(self, jeans_requirements, sample_requirements):
+        """Test that both recommend_factories backends return the same results"""
+        for req in (jeans_requirements, sample_requirements):
+            indexed = recommend_factories(req, top_n=5)
+            vectorized = recommend_factories(req, top_n=5, backend="vectorized")
+            assert vectorized == indexed
+
+    def test_unknown_backend(self, sample_requirements):
+        """Test that an unknown backend name raises"""
+        with pytest.raises(ValueError):
+            recommend_factories(sample_requirements, backend="gpu")
+
+
+class TestBatchRecommendations:
+    """Test recommend_factories_batch"""
+
+    def test_batch_matches_single(self, sample_requirements, jeans_requirements, minimal_requirements):
+        """Test that batch results equal per-request recommend_factories in input order"""
+        reqs = [sample_requirements, jeans_requirements, minimal_requirements]
+
+        batch = recommend_factories_batch(reqs, top_n=4)
+        assert batch == [recommend_factories(r, top_n=4) for r in reqs]
+
+    def test_batch_chunking(self, sample_requirements, jeans_requirements):
+        """Test that chunk size does not change the results"""
+        reqs = [sample_requirements, jeans_requirements] * 5
+
+        assert recommend_factories_batch(reqs, chunk_size=3) == recommend_factories_batch(reqs)
+
+    def test_empty_batch(self):
+        """Test that an empty batch returns an empty list"""
+        assert recommend_factories_batch([]) == []
+
+    def test_score_batch_rows(self):
+        """Test that each score_batch row equals the single-request score"""
+        rng = random.Random(11)
+        columns = ColumnarCatalog(_random_catalog(rng, 200, vocab_size=70))
+        reqs = [_random_requirements(rng, 70) for _ in range(20)]
+
+        matrix = columns.score_batch(reqs)
+        assert matrix.shape == (20, 200)
+        for req, row in zip(reqs, matrix):
+            assert row.tolist() == columns.score(req).tolist()
@@ -0,0 +1,205 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import json
+import pytest
+from extraction import RequirementsTracker, merge_requirements
+from local_extractor import get_local_extractor
+
+
+class ScriptedExtractor:
+    """Returns canned updates and records what each call was sent."""
+
+    def __init__(self, *updates):
+        self.updates = list(updates)
+        self.calls = []
+
+    def __call__(self, state_json, text, fields=None):
+        self.calls.append((json.loads(state_json), text, fields))
+        update = self.updates.pop(0)
+        if isinstance(update, Exception):
+            raise update
+        return json.dumps(update)
+
+
+SYSTEM = {"role": "system", "content": "You are a concierge. " * 200}
+
+
+class TestMergeRequirements:
+    """Test merging extracted field updates"""
+
+    def test_missing_fields_kept(self):
+        """Test that fields absent from the update are untouched"""
+        state = {"product_type": "jeans", "moq": 2000}
+        changed = merge_requirements(state, {"geography": "Bangladesh"})
+        assert state == {"product_type": "jeans", "moq": 2000, "geography": "Bangladesh"}
+        assert changed == ["geography"]
+
+    def test_null_clears_and_lists_replace(self):
+        """Test that null withdraws a field and lists are replaced whole"""
+        state = {"product_type": "jeans", "moq": 2000, "geography": "Asia", "materials": ["denim"]}
+        merge_requirements(state, {"geography": None, "materials": ["denim", "cotton"]})
+        assert "geography" not in state
+        assert state["materials"] == ["denim", "cotton"]
+
+    def test_values_coerced(self):
+        """Test that quantities become ints, blanks are dropped and unknown keys ignored"""
+        state = {}
+        merge_requirements(state, {"moq": "2500", "budget_tier": " ", "certifications": "BSCI", "colour": "blue"})
+        assert state == {"moq": 2500, "certifications": ["BSCI"]}
+
+
+    def test_unreadable_value_keeps_previous(self):
+        """Test that a value that cannot be coerced leaves the known one in place"""
+        state = {"product_type": "jeans", "moq": 2000, "budget_tier": "low"}
+        changed = merge_requirements(state, {"moq": "2k", "budget_tier": " "})
+        assert state == {"product_type": "jeans", "moq": 2000, "budget_tier": "low"}
+        assert changed == []
+        merge_requirements(state, {"moq": None})
+        assert "moq" not in state
+
+class TestRequirementsTracker:
+    """Test incremental extraction over new turns"""
+
+    def test_only_new_turns_sent(self):
+        """Test that each update sends only the unprocessed turns plus the current state"""
+        extractor = ScriptedExtractor(
+            {"product_type": "jeans", "materials": ["denim"]},
+            {"moq": 2000, "geography": "Bangladesh"},
+        )
+        tracker = RequirementsTracker(extract=extractor, local=False)
+        messages = [SYSTEM, {"role": "assistant", "content": "What would you like to make?"},
+                    {"role": "user", "content": "Denim jeans"}]
+        assert tracker.update(messages) is None
+
+        messages += [{"role": "assistant", "content": "How many units, and where?"},
+                     {"role": "user", "content": "2000 units in Bangladesh"}]
+        req = tracker.update(messages)
+
+        first_state, first_text, _ = extractor.calls[0]
+        second_state, second_text, _ = extractor.calls[1]
+        assert first_state == {}
+        assert "concierge" not in first_text
+        assert second_state == {"product_type": "jeans", "materials": ["denim"]}
+        assert second_text == "Assistant: How many units, and where?\nUser: 2000 units in Bangladesh"
+        assert req.product_type == "jeans"
+        assert req.moq == 2000
+        assert req.geography == "Bangladesh"
+        assert req.materials == ["denim"]
+
+    def test_later_turn_changes_field(self):
+        """Test that a later change of mind updates an already-extracted field"""
+        extractor = ScriptedExtractor({"product_type": "jeans", "moq": 2000}, {"moq": 5000})
+        tracker = RequirementsTracker(extract=extractor, local=False)
+        messages = [{"role": "user", "content": "2000 jeans"}]
+        tracker.update(messages)
+        messages.append({"role": "user", "content": "Actually make it 5000"})
+        assert tracker.update(messages).moq == 5000
+
+    def test_no_new_turns_skips_call(self):
+        """Test that an update with nothing new does not call the model"""
+        extractor = ScriptedExtractor({"product_type": "jeans", "moq": 2000})
+        tracker = RequirementsTracker(extract=extractor, local=False)
+        messages = [{"role": "user", "content": "2000 jeans"}]
+        first = tracker.update(messages)
+        messages.append({"role": "assistant", "content": "GENERATE_RFQ: Dhaka Denim Works"})
+        assert tracker.update(messages) is first
+        assert len(extractor.calls) == 1
+
+    def test_failed_extraction_keeps_turns_pending(self):
+        """Test that turns are resent after a failed extraction"""
+        extractor = ScriptedExtractor(ConnectionError("offline"), {"product_type": "jeans", "moq": 2000})
+        tracker = RequirementsTracker(extract=extractor, local=False)
+        messages = [{"role": "user", "content": "2000 jeans"}]
+        with pytest.raises(ConnectionError):
+            tracker.update(messages)
+        assert tracker.update(messages).moq == 2000
+        assert extractor.calls[0][1] == extractor.calls[1][1]
+
+
+class TestLocalFastPath:
+    """Test that the model is only asked about fields the local extractor cannot resolve"""
+
+    def test_explicit_messages_ask_model_only_for_description(self):
+        """Test that a conversation stating every field explicitly only asks the model for the description"""
+        extractor = ScriptedExtractor({"product_description": "denim jeans", "geography": "China"})
+        tracker = RequirementsTracker(extract=extractor, local=get_local_extractor())
+        messages = [
+            SYSTEM,
+            {"role": "assistant", "content": "What would you like to manufacture?"},
+            {"role": "user", "content": "Denim jeans from Bangladesh, BSCI certified, low budget"},
+            {"role": "assistant", "content": "How many units do you need?"},
+            {"role": "user", "content": "2000"},
+        ]
+        req = tracker.update(messages)
+
+        assert [call[2] for call in extractor.calls] == [["product_description"]]
+        assert req.product_description == "denim jeans"
+        assert req.product_type == "jeans"
+        assert req.materials == ["denim"]
+        assert req.moq == 2000
+        assert req.geography == "Bangladesh"
+        assert req.certifications == ["BSCI"]
+        assert req.budget_tier == "low"
+
+        messages.append({"role": "user", "content": "Make it 3000 units"})
+        assert tracker.update(messages).moq == 3000
+        assert len(extractor.calls) == 1
+
+    def test_model_asked_only_for_unresolved_fields(self):
+        """Test that the model is asked for the fields rules could not read, and cannot overwrite the rest"""
+        extractor = ScriptedExtractor({
+            "product_type": "consumer_goods", "moq": 9999, "materials": ["plastic"],
+            "product_description": "kitchen organizers",
+        })
+        tracker = RequirementsTracker(extract=extractor, local=get_local_extractor())
+        messages = [{"role": "user", "content": "1000 units of plastic kitchen organizers made of recycled material"}]
+        req = tracker.update(messages)
+
+        assert extractor.calls[0][2] == ["materials", "product_description", "product_type"]
+        assert extractor.calls[0][0] == {"moq": 1000}
+        assert req.product_type == "consumer_goods"
+        assert req.product_description == "kitchen organizers"
+        assert req.materials == ["plastic"]
+        assert req.moq == 1000
+
+    def test_withdrawal_left_to_model(self):
+        """Test that a withdrawn value is not re-added locally and the model's removal is applied"""
+        extractor = ScriptedExtractor({"certifications": None})
+        tracker = RequirementsTracker(extract=extractor, local=get_local_extractor())
+        tracker.state = {
+            "product_type": "jeans", "moq": 2000, "product_description": "jeans", "certifications": ["GOTS"],
+        }
+        tracker.update([{"role": "user", "content": "Please drop the GOTS requirement"}])
+        assert extractor.calls[0][2] == ["certifications"]
+        assert "certifications" not in tracker.state
+
+    def test_local_lists_accumulate(self):
+        """Test that materials named across several turns are all kept"""
+        extractor = ScriptedExtractor({"product_description": "denim jeans"})
+        tracker = RequirementsTracker(extract=extractor, local=get_local_extractor())
+        messages = [{"role": "user", "content": "3000 denim jeans"}]
+        tracker.update(messages)
+        messages.append({"role": "user", "content": "Also add stretch denim and cotton"})
+        assert tracker.update(messages).materials == ["denim", "stretch_denim", "cotton"]
+
+    def test_restated_list_left_to_model(self):
+        """Test that naming different list values without an addition cue asks the model for the list"""
+        extractor = ScriptedExtractor({"materials": ["denim"]})
+        tracker = RequirementsTracker(extract=extractor, local=get_local_extractor())
+        tracker.state = {"product_type": "jeans", "moq": 2000, "product_description": "jeans"}
+        messages = [{"role": "user", "content": "cotton"}]
+        tracker.update(messages)
+        assert extractor.calls == []
+        messages.append({"role": "user", "content": "Make them denim jeans please"})
+        assert tracker.update(messages).materials == ["denim"]
+        assert "materials" in extractor.calls[-1][2]
+
+    def test_description_passes_filter(self):
+        """Test that the model's product description is kept when it is asked about other fields"""
+        extractor = ScriptedExtractor({"product_description": "winter jackets", "geography": "China"})
+        tracker = RequirementsTracker(extract=extractor, local=get_local_extractor())
+        req = tracker.update([{"role": "user", "content": "2000 units of winter jackets from Bangladesh"}])
+        assert req.product_description == "winter jackets"
+        assert req.geography == "Bangladesh"
@@ -0,0 +1,101 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import pickle
+import pytest
+from model.factory import Factory, as_factory, MATERIAL_VOCABULARY, CERTIFICATION_VOCABULARY
+from factories import score_factory, load_factories, covers_certifications
+from model.requirements import ManufacturingRequirements
+
+
+class TestFactoryRecord:
+    """Test the compact Factory record"""
+
+    def test_round_trip(self, sample_factory):
+        """Test that from_dict/to_dict preserve the JSON record"""
+        factory = Factory.from_dict(sample_factory)
+        assert factory.to_dict() == sample_factory
+        assert factory == sample_factory
+
+    def test_dict_shim(self, sample_factory):
+        """Test dict-style access for existing callers"""
+        factory = Factory.from_dict(sample_factory)
+        assert factory["name"] == "Test Manufacturing Co"
+        assert factory["materials"] == ["plastic", "metal"]
+        assert isinstance(factory["certifications"], list)
+        assert "moq_min" in factory
+        assert factory.get("missing", "default") == "default"
+        with pytest.raises(KeyError):
+            factory["missing"]
+
+    def test_no_instance_dict(self, sample_factory):
+        """Test that records use __slots__ rather than a per-instance dict"""
+        factory = Factory.from_dict(sample_factory)
+        assert not hasattr(factory, "__dict__")
+
+    def test_vocabulary_is_shared(self):
+        """Test that repeated vocabulary values are shared across the catalog"""
+        factories = load_factories()
+        iso = [f for f in factories if "ISO9001" in f.certifications]
+        assert len(iso) > 1
+        first = next(c for c in iso[0].certifications if c == "ISO9001")
+        assert all(any(c is first for c in f.certifications) for f in iso)
+
+    def test_as_factory(self, sample_factory):
+        """Test that as_factory converts dicts and passes records through"""
+        factory = as_factory(sample_factory)
+        assert isinstance(factory, Factory)
+        assert as_factory(factory) is factory
+
+    def test_score_accepts_both(self, sample_factory, sample_requirements):
+        """Test that score_factory gives the same result for dicts and records"""
+        assert score_factory(sample_factory, sample_requirements) == \
+            score_factory(Factory.from_dict(sample_factory), sample_requirements)
+
+
+class TestVocabularyBits:
+    """Test material and certification bitmask encoding"""
+
+    def test_masks_built_at_load(self, sample_factory):
+        """Test that each record carries bitmasks of its vocabulary"""
+        factory = Factory.from_dict(sample_factory)
+        assert factory.material_bits == MATERIAL_VOCABULARY.bit("plastic") | MATERIAL_VOCABULARY.bit("metal")
+        assert factory.material_bits & MATERIAL_VOCABULARY.mask(("metal", "wood"))
+        assert not factory.material_bits & MATERIAL_VOCABULARY.mask(("wood",))
+
+    def test_bits_are_stable(self):
+        """Test that a value keeps its bit and distinct values never share one"""
+        a = MATERIAL_VOCABULARY.bit("cotton")
+        assert MATERIAL_VOCABULARY.bit("cotton") == a
+        assert MATERIAL_VOCABULARY.bit("unobtainium") & a == 0
+
+    def test_certification_coverage(self, sample_factory):
+        """Test certification coverage is case-insensitive and requires every code"""
+        factory = Factory.from_dict(dict(sample_factory, certifications=["ISO9001", "CE"]))
+        req = ManufacturingRequirements(product_type="widgets", moq=100, certifications=["iso9001"])
+        assert covers_certifications(factory, req)
+        assert not covers_certifications(factory, req.model_copy(update={"certifications": ["ISO9001", "GOTS"]}))
+        assert covers_certifications(factory, req.model_copy(update={"certifications": []}))
+        assert factory.certification_bits == CERTIFICATION_VOCABULARY.mask(("ce", "iso9001"))
+
+    def test_request_lookup_does_not_allocate(self):
+        """Test that request values are looked up without growing the vocabulary"""
+        known = MATERIAL_VOCABULARY.bit("cotton")
+        size = len(MATERIAL_VOCABULARY)
+        assert MATERIAL_VOCABULARY.lookup(("cotton", "request-only-fibre")) == (known, False)
+        assert MATERIAL_VOCABULARY.lookup(("cotton",)) == (known, True)
+        assert len(MATERIAL_VOCABULARY) == size
+
+    def test_lookup_sees_later_allocations(self):
+        """Test that a value unknown at lookup time is found once a record carries it"""
+        assert MATERIAL_VOCABULARY.lookup(("late-fibre",)) == (0, False)
+        bit = MATERIAL_VOCABULARY.bit("late-fibre")
+        assert MATERIAL_VOCABULARY.lookup(("late-fibre",)) == (bit, True)
+
+    def test_pickle_rebuilds_masks(self, sample_factory):
+        """Test that records sent to worker processes re-encode against that process's vocabulary"""
+        factory = Factory.from_dict(sample_factory)
+        clone = pickle.loads(pickle.dumps(factory))
+        assert clone == factory
+        assert clone.material_bits == factory.material_bits
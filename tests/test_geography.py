@@ -0,0 +1,59 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from geography import geography_matches, resolve_geography, region_members, region_prompt_rules
+from factories import score_factory, recommend_factories
+from catalog import get_catalog
+from model.requirements import ManufacturingRequirements
+
+
+class TestGeographyHierarchy:
+    """Test region/country resolution"""
+
+    def test_region_expands_to_countries(self):
+        """Test that a region matches its member countries"""
+        assert geography_matches("Asia", "Bangladesh")
+        assert geography_matches("asia", "Vietnam")
+        assert not geography_matches("Asia", "Peru")
+
+    def test_aliases(self):
+        """Test that region aliases resolve to the same members"""
+        assert region_members("America") == region_members("USA")
+        assert geography_matches("United States", "USA")
+
+    def test_country_names_still_match(self):
+        """Test that plain country names keep the flexible name rule"""
+        assert geography_matches("CHINA", "China")
+        assert geography_matches("china", "Southern China")
+        assert not geography_matches("China", "India")
+
+    def test_resolve_against_catalog(self):
+        """Test resolving a request once into catalog geography codes"""
+        locations = get_catalog().geography_index
+        asia = resolve_geography("Asia", locations)
+        assert {"china", "vietnam", "bangladesh", "india"} <= asia
+        assert "peru" not in asia
+        assert resolve_geography(None, locations) == frozenset()
+
+    def test_prompt_uses_same_regions(self):
+        """Test that prompt rules are generated from the shared region data"""
+        rules = region_prompt_rules()
+        assert '"Asia"' in rules and "Bangladesh" in rules
+
+
+class TestRegionScoring:
+    """Test region preferences in scoring and recommendations"""
+
+    def test_region_scores_geography_point(self, jeans_factory):
+        """Test that a region preference earns the geography point"""
+        req = ManufacturingRequirements(product_type="jeans", materials=["denim"], moq=2500, geography="Asia")
+        score, reasons = score_factory(jeans_factory, req)
+        assert any("Located in Bangladesh" in r for r in reasons)
+
+    def test_region_backends_agree(self):
+        """Test that region expansion is consistent across scoring backends"""
+        req = ManufacturingRequirements(product_type="apparel", materials=["cotton"], moq=800, geography="Asia")
+        expected = recommend_factories(req, top_n=10)
+        assert recommend_factories(req, top_n=10, backend="vectorized") == expected
+        assert all(r["factory"].geography != "Peru" for r in expected[:3])
@@ -4,6 +4,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 from factories import load_factories, recommend_factories
 from model.requirements import ManufacturingRequirements
+from model.factory import Factory
 from llm import extract_requirements
 import pytest
 import json
@@ -146,7 +147,8 @@ class TestEdgeCases:
         factories = load_factories()
         
         assert len(factories) > 0
-        assert all(isinstance(f, dict) for f in factories)
+        assert all(isinstance(f, Factory) for f in factories)
+        assert all(isinstance(f.to_dict(), dict) for f in factories)
     
     def test_empty_materials_list(self):
         """Test recommendations with empty materials list"""
@@ -2,7 +2,7 @@ import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from llm import extract_requirements
+from llm import extract_requirements, split_rfq_trigger
 from model.requirements import ManufacturingRequirements
 import pytest
 import json
@@ -157,3 +157,38 @@ class TestNonManufacturingInput:
         # Should handle gracefully with null/default values
         assert isinstance(data, dict)
         assert "product_type" in data
+
+
+class TestRFQTrigger:
+    """Test early detection of the GENERATE_RFQ reply prefix in a stream"""
+
+    def test_trigger_detected_before_stream_ends(self):
+        """Test that the trigger is recognised without reading the factory name"""
+        deltas = iter(["GENER", "ATE_RFQ", ":", " Dhaka", " Denim", " Works"])
+        is_rfq, head, rest = split_rfq_trigger(deltas)
+
+        assert is_rfq
+        assert head == "GENERATE_RFQ:"
+        assert head + "".join(rest) == "GENERATE_RFQ: Dhaka Denim Works"
+
+    def test_normal_reply_decided_on_first_delta(self):
+        """Test that a reply is known not to be a trigger after its first delta"""
+        deltas = iter(["Here", " are", " the", " top", " 3"])
+        is_rfq, head, rest = split_rfq_trigger(deltas)
+
+        assert not is_rfq
+        assert head == "Here"
+        assert list(rest) == [" are", " the", " top", " 3"]
+
+    def test_reply_sharing_a_prefix(self):
+        """Test that a reply starting like the trigger but diverging is not one"""
+        is_rfq, head, rest = split_rfq_trigger(iter(["GEN", "ERAL", " advice"]))
+        assert not is_rfq
+        assert head + "".join(rest) == "GENERAL advice"
+
+    def test_short_reply(self):
+        """Test that a reply shorter than the trigger ends cleanly"""
+        is_rfq, head, rest = split_rfq_trigger(iter(["GEN"]))
+        assert not is_rfq
+        assert head == "GEN"
+        assert list(rest) == []
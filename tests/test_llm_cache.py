@@ -0,0 +1,249 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import asyncio
+from types import SimpleNamespace
+import pytest
+from llm_cache import LLMCache, acached_completion, cached_completion, cached_stream, request_key
+
+
+class FakeClient:
+    """Stands in for the OpenAI client: answers with a counter so every real call is visible."""
+
+    def __init__(self):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, stream=False, **params):
+        self.calls += 1
+        content = f"response {self.calls}"
+        if stream:
+            return self._chunks(content)
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    def _chunks(self, content):
+        for i in range(0, len(content), 3):
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content[i:i + 3]))])
+        # Usage-only final chunk
+        yield SimpleNamespace(choices=[])
+
+
+class FakeAsyncClient(FakeClient):
+    """Async variant of FakeClient."""
+
+    def __init__(self):
+        super().__init__()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.acreate))
+
+    async def acreate(self, **params):
+        await asyncio.sleep(0)
+        return self.create(**params)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def store(tmp_path, clock):
+    cache = LLMCache(tmp_path / "llm.sqlite", ttl=60, memory_entries=8, timer=clock)
+    yield cache
+    cache.close()
+
+
+MESSAGES = [{"role": "user", "content": "I need 2000 denim jeans"}]
+
+
+class TestRequestKey:
+    """Test content-addressed request keys"""
+
+    def test_key_ignores_argument_order(self):
+        """Test that keyword order does not change the key"""
+        a = request_key({"model": "gpt-4o-mini", "messages": MESSAGES, "temperature": 0})
+        b = request_key({"temperature": 0, "messages": MESSAGES, "model": "gpt-4o-mini"})
+        assert a == b
+
+    def test_key_covers_model_params_and_messages(self):
+        """Test that model, parameters and message content all change the key"""
+        base = {"model": "gpt-4o-mini", "messages": MESSAGES, "temperature": 0}
+        keys = {
+            request_key(base),
+            request_key({**base, "model": "gpt-4o"}),
+            request_key({**base, "temperature": 0.2}),
+            request_key({**base, "messages": [{"role": "user", "content": "I need 2000 jackets"}]}),
+        }
+        assert len(keys) == 4
+
+
+class TestCachedCompletion:
+    """Test the caching policy around chat completions"""
+
+    def test_deterministic_calls_cached_by_default(self, store):
+        """Test that a temperature=0 call is served from cache the second time"""
+        client = FakeClient()
+        first = cached_completion(client, store=store, model="gpt-4o-mini", messages=MESSAGES, temperature=0)
+        second = cached_completion(client, store=store, model="gpt-4o-mini", messages=MESSAGES, temperature=0)
+
+        assert first == second == "response 1"
+        assert client.calls == 1
+
+    def test_sampling_calls_not_cached_by_default(self, store):
+        """Test that sampled calls always reach the API unless opted in"""
+        client = FakeClient()
+        cached_completion(client, store=store, model="gpt-4o-mini", messages=MESSAGES)
+        cached_completion(client, store=store, model="gpt-4o-mini", messages=MESSAGES, temperature=0.7)
+        assert client.calls == 2
+        assert store.stats()["disk_entries"] == 0
+
+    def test_sampling_calls_cached_when_opted_in(self, store):
+        """Test that cache=True caches a sampled call"""
+        client = FakeClient()
+        for _ in range(2):
+            cached_completion(client, cache=True, store=store, model="gpt-4o-mini", messages=MESSAGES, temperature=0.7)
+        assert client.calls == 1
+
+    def test_cache_false_bypasses(self, store):
+        """Test that cache=False always calls the API"""
+        client = FakeClient()
+        for _ in range(2):
+            cached_completion(client, cache=False, store=store, model="gpt-4o-mini", messages=MESSAGES, temperature=0)
+        assert client.calls == 2
+
+
+class TestAsyncCachedCompletion:
+    """Test async completions through the cache"""
+
+    def test_async_shares_cache_with_sync(self, store):
+        """Test that async and sync calls with the same request share one entry"""
+        client = FakeAsyncClient()
+        first = asyncio.run(acached_completion(client, store=store, model="gpt-4o-mini", messages=MESSAGES, temperature=0))
+        second = cached_completion(FakeClient(), store=store, model="gpt-4o-mini", messages=MESSAGES, temperature=0)
+        assert first == second == "response 1"
+        assert client.calls == 1
+
+    def test_async_sampling_not_cached_by_default(self, store):
+        """Test that sampled async calls always reach the API unless opted in"""
+        client = FakeAsyncClient()
+        for _ in range(2):
+            asyncio.run(acached_completion(client, store=store, model="gpt-4o-mini", messages=MESSAGES, temperature=0.7))
+        assert client.calls == 2
+
+
+class TestCachedStream:
+    """Test streamed completions through the cache"""
+
+    def test_stream_yields_deltas_and_caches_whole_reply(self, store):
+        """Test that a deterministic stream yields several deltas and is then served whole from cache"""
+        client = FakeClient()
+        deltas = list(cached_stream(client, store=store, model="gpt-4o-mini", messages=MESSAGES, temperature=0))
+        assert len(deltas) > 1
+        assert "".join(deltas) == "response 1"
+
+        assert list(cached_stream(client, store=store, model="gpt-4o-mini", messages=MESSAGES, temperature=0)) == ["response 1"]
+        assert client.calls == 1
+
+    def test_stream_shares_cache_with_completion(self, store):
+        """Test that a streamed and a blocking call with the same request share one entry"""
+        client = FakeClient()
+        "".join(cached_stream(client, store=store, model="gpt-4o-mini", messages=MESSAGES, temperature=0))
+        assert cached_completion(client, store=store, model="gpt-4o-mini", messages=MESSAGES, temperature=0) == "response 1"
+        assert client.calls == 1
+
+    def test_abandoned_stream_not_cached(self, store):
+        """Test that a stream closed before the end leaves nothing in the cache"""
+        client = FakeClient()
+        stream = cached_stream(client, store=store, model="gpt-4o-mini", messages=MESSAGES, temperature=0)
+        next(stream)
+        stream.close()
+        assert store.stats()["disk_entries"] == 0
+
+    def test_sampling_stream_not_cached_by_default(self, store):
+        """Test that sampled streams always reach the API unless opted in"""
+        client = FakeClient()
+        for _ in range(2):
+            list(cached_stream(client, store=store, model="gpt-4o-mini", messages=MESSAGES))
+        assert client.calls == 2
+
+
+class TestLLMCache:
+    """Test the memory + SQLite response cache"""
+
+    def test_disk_tier_survives_restart(self, tmp_path, clock):
+        """Test that a new cache instance on the same file serves earlier responses"""
+        path = tmp_path / "llm.sqlite"
+        first = LLMCache(path, timer=clock)
+        first.put("k", "gpt-4o-mini", "hello")
+        first.close()
+
+        second = LLMCache(path, timer=clock)
+        assert second.get("k") == "hello"
+        assert second.stats()["disk_hits"] == 1
+        second.close()
+
+    def test_entries_expire_after_ttl(self, store, clock):
+        """Test that entries older than the TTL miss in both tiers"""
+        store.put("k", "gpt-4o-mini", "hello")
+        clock.now += 61
+        assert store.get("k") is None
+        assert store.stats()["disk_entries"] == 0
+
+    def test_size_eviction_drops_least_recently_used(self, tmp_path, clock):
+        """Test that the disk tier evicts least recently used rows beyond max_bytes"""
+        store = LLMCache(tmp_path / "llm.sqlite", max_bytes=250, timer=clock)
+        for key in "abc":
+            store.put(key, "gpt-4o-mini", key * 100)
+            clock.now += 1
+        # Only two 100-byte rows fit; "a" was written first and never read
+        stats = store.stats()
+        assert stats["disk_entries"] == 2
+        assert stats["disk_bytes"] <= 250
+        assert store.get("a") is None
+        assert store.get("c") == "c" * 100
+        store.close()
+
+    def test_put_keeps_running_size_without_scanning(self, tmp_path, clock):
+        """Test that puts track the disk size without summing the whole table"""
+        store = LLMCache(tmp_path / "llm.sqlite", max_bytes=250, timer=clock)
+        statements = []
+        store._db().set_trace_callback(statements.append)
+        store.put("a", "gpt-4o-mini", "a" * 100)
+        store.put("a", "gpt-4o-mini", "a" * 50)
+        store.put("b", "gpt-4o-mini", "b" * 100)
+        assert not [s for s in statements if "SUM(size) FROM responses" in s and "WHERE" not in s]
+        store._db().set_trace_callback(None)
+        assert store._size == store.stats()["disk_bytes"] == 150
+        store.close()
+
+    def test_size_eviction_sees_other_writers(self, tmp_path, clock):
+        """Test that eviction recounts rows written by another cache on the same file"""
+        path = tmp_path / "llm.sqlite"
+        first = LLMCache(path, max_bytes=250, timer=clock)
+        second = LLMCache(path, max_bytes=250, timer=clock)
+        first.put("a", "gpt-4o-mini", "a" * 100)
+        clock.now += 1
+        second.put("b", "gpt-4o-mini", "b" * 100)
+        clock.now += 1
+        # first's running total is stale (100) until the put pushes it to max_bytes
+        first.put("c", "gpt-4o-mini", "c" * 100)
+        first.put("d", "gpt-4o-mini", "d" * 100)
+        assert first.stats()["disk_bytes"] <= 250
+        assert first._size == first.stats()["disk_bytes"]
+        first.close()
+        second.close()
+
+    def test_clear(self, store):
+        """Test that clear empties both tiers"""
+        store.put("k", "gpt-4o-mini", "hello")
+        store.clear()
+        assert store.get("k") is None
@@ -0,0 +1,68 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import asyncio
+import pytest
+from llm_clients import async_openai_client, gather_limited, openai_client
+
+
+class TestSharedClients:
+    """Test the shared OpenAI clients"""
+
+    def test_sync_client_shared(self):
+        """Test that every caller gets the same synchronous client"""
+        import llm
+        import actions
+        assert llm._client is actions._client is openai_client()
+
+    def test_async_client_shared_within_loop(self):
+        """Test that coroutines on one loop share a client and a new loop gets its own"""
+        async def clients():
+            return async_openai_client(), async_openai_client()
+
+        a, b = asyncio.run(clients())
+        c, _ = asyncio.run(clients())
+        assert a is b
+        assert c is not a
+
+
+class TestGatherLimited:
+    """Test bounded-concurrency gathering"""
+
+    def test_results_in_argument_order(self):
+        """Test that results follow argument order, not completion order"""
+        async def work(i):
+            await asyncio.sleep(0.01 * (5 - i))
+            return i
+
+        assert asyncio.run(gather_limited(*(work(i) for i in range(5)), limit=5)) == [0, 1, 2, 3, 4]
+
+    def test_concurrency_bounded(self):
+        """Test that no more than `limit` awaitables run at once, and that they overlap up to it"""
+        running = 0
+        peak = 0
+
+        async def work():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+        asyncio.run(gather_limited(*(work() for _ in range(10)), limit=3))
+        assert peak == 3
+
+    def test_exceptions(self):
+        """Test that errors propagate, or are returned with return_exceptions"""
+        async def fail():
+            raise ValueError("boom")
+
+        async def ok():
+            return 1
+
+        with pytest.raises(ValueError):
+            asyncio.run(gather_limited(ok(), fail()))
+        results = asyncio.run(gather_limited(ok(), fail(), return_exceptions=True))
+        assert results[0] == 1
+        assert isinstance(results[1], ValueError)
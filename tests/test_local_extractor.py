@@ -0,0 +1,119 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import pytest
+from local_extractor import CONFIDENT, LocalExtractor, get_local_extractor
+from catalog import Catalog
+from model.factory import Factory
+
+
+@pytest.fixture
+def extractor():
+    return get_local_extractor()
+
+
+class TestVocabulary:
+    """Test that the vocabulary comes from the catalog"""
+
+    def test_catalog_spellings(self, extractor):
+        """Test that values come back spelled as the catalog indexes them"""
+        result = extractor.extract("Organic cotton jeans, oeko-tex and iso 9001, made in sri lanka")
+        assert result.fields["materials"] == ["organic_cotton"]
+        assert result.fields["certifications"] == ["OEKO-TEX", "ISO9001"]
+        assert result.fields["geography"] == "Sri Lanka"
+        assert result.fields["product_type"] == "jeans"
+
+    def test_custom_catalog(self):
+        """Test that a catalog's own terms are recognised"""
+        factory = Factory(id="X1", name="Plastics Co", product_types=["consumer_goods"], materials=["abs"],
+                          moq_min=100, geography="Poland", certifications=["CE"], cost_tier="low")
+        result = LocalExtractor.from_catalog(Catalog([factory])).extract("500 units of consumer goods in ABS, CE marked")
+        assert result.fields == {"product_type": "consumer_goods", "materials": ["abs"], "certifications": ["CE"], "moq": 500}
+
+    def test_regions_and_aliases(self, extractor):
+        """Test that region names resolve, and 'us' the pronoun is not the USA"""
+        assert extractor.extract("Anywhere in Latin America").fields["geography"] == "South America"
+        assert extractor.extract("Factories in the US please").fields["geography"] == "USA"
+        assert "geography" not in extractor.extract("Can you help us find jeans?").fields
+
+    def test_short_place_name_needs_sourcing_cue(self, extractor):
+        """Test that a two-letter place name without a sourcing cue is left for the model"""
+        result = extractor.extract("We are a US company")
+        assert result.confidence["geography"] < CONFIDENT
+        assert "geography" in result.unresolved
+        assert extractor.extract("Jeans made in the US").confidence["geography"] >= CONFIDENT
+
+
+class TestQuantities:
+    """Test quantity parsing"""
+
+    @pytest.mark.parametrize("text,moq", [
+        ("2000 units", 2000),
+        ("We need 2,500 jackets", 2500),
+        ("5k pcs", 5000),
+        ("MOQ of 800", 800),
+        ("3000 denim jeans", 3000),
+        ("jeans, 2 million pieces", 2_000_000),
+        ("I need 12 million units", 12_000_000),
+        ("3 hundred jackets", 300),
+    ])
+    def test_explicit_quantities(self, extractor, text, moq):
+        """Test that quantities with a unit, product or MOQ cue are confident"""
+        result = extractor.extract(text)
+        assert result.fields["moq"] == moq
+        assert result.confidence["moq"] >= CONFIDENT
+
+    def test_bare_number_needs_question(self, extractor):
+        """Test that a bare number is confident only as an answer to a quantity question"""
+        assert extractor.extract("Around 1000", context="How many units do you need?").confidence["moq"] >= CONFIDENT
+        result = extractor.extract("Around 1000")
+        assert result.confidence["moq"] < CONFIDENT
+        assert "moq" in result.unresolved
+
+    def test_number_not_followed_by_unit_unresolved(self, extractor):
+        """Test that a count of something other than units is not read as the quantity"""
+        result = extractor.extract("We have 2 styles of jeans, 1000 each")
+        assert result.confidence["moq"] < CONFIDENT
+        assert "moq" in result.unresolved
+
+    def test_standards_are_not_quantities(self, extractor):
+        """Test that ISO numbers are not read as order quantities"""
+        assert "moq" not in extractor.extract("ISO 9001 certified jeans").fields
+
+
+class TestConfidence:
+    """Test which fields are left for the model"""
+
+    def test_budget_words(self, extractor):
+        """Test explicit tiers and synonyms, and that quality words are not budgets"""
+        assert extractor.extract("low budget").fields["budget_tier"] == "low"
+        assert extractor.extract("mid-range pricing").fields["budget_tier"] == "medium"
+        assert extractor.extract("something affordable").fields["budget_tier"] == "low"
+        assert "budget_tier" not in extractor.extract("high quality stitching").fields
+
+    def test_doubtful_fields_unresolved(self, extractor):
+        """Test that negated, conflicting, everyday-word and unrecognised mentions go to the model"""
+        assert "geography" in extractor.extract("Anywhere except China").unresolved
+        assert "product_type" in extractor.extract("Jeans and jackets").unresolved
+        assert "materials" in extractor.extract("Let's narrow down the list").unresolved
+        assert "certifications" in extractor.extract("Needs to be Fair Wear certified").unresolved
+
+    @pytest.mark.parametrize("text,field", [
+        ("We don't want China", "geography"),
+        ("We dont want China", "geography"),
+        ("We don't need cotton anymore", "materials"),
+        ("Please drop the GOTS requirement", "certifications"),
+        ("Actually switch to denim jeans please", "materials"),
+    ])
+    def test_withdrawals_unresolved(self, extractor, text, field):
+        """Test that contractions and removal or switch wording send the field to the model"""
+        result = extractor.extract(text)
+        assert result.confidence[field] < CONFIDENT
+        assert field in result.unresolved
+
+    def test_requirements_only_with_required_fields(self, extractor):
+        """Test that requirements are built once product type and quantity are confident"""
+        assert extractor.extract("Denim jeans").requirements is None
+        req = extractor.extract("2000 denim jeans from Bangladesh").requirements
+        assert (req.product_type, req.moq, req.geography) == ("jeans", 2000, "Bangladesh")
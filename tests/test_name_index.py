@@ -0,0 +1,132 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import json
+import pytest
+from catalog import get_catalog, invalidate_catalog_cache
+from factories import resolve_factory_name, load_factories
+from model.factory import Factory
+from name_index import FactoryNameIndex, normalize_name
+
+
+def _ids(candidates):
+    return [f.id for f in candidates]
+
+
+class TestNameResolution:
+    """Test exact and fuzzy factory-name lookup"""
+
+    @pytest.mark.parametrize("name", [
+        "Dhaka Denim Works",
+        "dhaka denim works",
+        "[Dhaka Denim Works]",
+        "**Dhaka Denim Works.**",
+        "A001",
+    ])
+    def test_exact_and_decorated_names(self, name):
+        """Test that case, punctuation, LLM formatting and ids resolve exactly"""
+        factory, candidates = resolve_factory_name(name)
+        assert factory.id == "A001"
+        assert _ids(candidates) == ["A001"]
+
+    @pytest.mark.parametrize("name, expected", [
+        ("Dhaka Denim Werks", "A001"),
+        ("Dhaka Denim", "A001"),
+        ("Dhaka Denim Works in Bangladesh", "A001"),
+        ("Porto Denim", "A043"),
+    ])
+    def test_fuzzy_matches(self, name, expected):
+        """Test that typos, shortened names and extra words still resolve"""
+        factory, _ = resolve_factory_name(name)
+        assert factory is not None and factory.id == expected
+
+    def test_ambiguous_name_is_not_guessed(self):
+        """Test that a name shared by several factories returns candidates, not a pick"""
+        factory, candidates = resolve_factory_name("Jakarta")
+        assert factory is None
+        assert set(_ids(candidates)) == {f.id for f in load_factories() if f.name.startswith("Jakarta")}
+
+    def test_unknown_name(self):
+        """Test that unrelated names do not match anything"""
+        assert resolve_factory_name("Nonexistent Corp") == (None, [])
+        assert resolve_factory_name("  ") == (None, [])
+
+    def test_duplicate_names_are_ambiguous(self, sample_factory):
+        """Test that two factories with the same name are never silently picked"""
+        index = FactoryNameIndex([
+            Factory.from_dict(dict(sample_factory, id="X1")),
+            Factory.from_dict(dict(sample_factory, id="X2")),
+        ])
+        factory, candidates = index.resolve("Test Manufacturing Co")
+        assert factory is None
+        assert _ids(candidates) == ["X1", "X2"]
+
+    def test_normalize_name(self):
+        """Test name normalisation"""
+        assert normalize_name("  **Dhaka   Denim-Works.** ") == "dhaka denim works"
+
+
+class TestNameIndexAtScale:
+    """Test resolution on a large catalog of near-identical names"""
+
+    @pytest.fixture
+    def index(self):
+        records = []
+        for i in range(5000):
+            prefix = ("Blue", "Golden", "River")[i % 3]
+            suffix = ("Mills", "Apparel")[i % 2]
+            records.append({"id": f"S{i:05d}", "name": f"{prefix} {suffix} {i}", "product_types": [],
+                            "materials": [], "moq_min": 100, "geography": "China",
+                            "certifications": [], "cost_tier": "low"})
+        return FactoryNameIndex([Factory.from_dict(r) for r in records])
+
+    def test_typos_resolve_to_the_right_factory(self, index):
+        """Test that a typo in the shared words keeps the distinctive number decisive"""
+        assert index.resolve("Golden Apparrel 1237")[0].name == "Golden Apparel 1237"
+        assert index.resolve("Please use Golden Mills 4000 for this")[0].name == "Golden Mills 4000"
+
+    def test_wrong_words_do_not_resolve(self, index):
+        """Test that a matching number alone is not enough to pick a factory"""
+        assert index.resolve("River Mills 4000")[0] is None
+
+    def test_non_distinctive_query_is_ambiguous(self, index):
+        """Test that names matching thousands of factories never resolve to one"""
+        factory, candidates = index.resolve("Golden Apparel")
+        assert factory is None
+        assert len(candidates) > 1
+
+
+    def test_common_words_count_bounded_postings(self, index, monkeypatch):
+        """Test that candidate generation counts at most MAX_COUNTED posting entries"""
+        import name_index
+        monkeypatch.setattr(name_index, "MAX_COUNTED", 300)
+        counted = []
+        original = name_index.Counter
+        monkeypatch.setattr(name_index, "Counter", lambda entries: counted.append(list(entries)) or original(counted[-1]))
+
+        factory, candidates = index.resolve("Golden Apparel")
+        assert factory is None and 1 < len(candidates) <= name_index.MAX_CANDIDATES
+        assert all(len(entries) <= 300 for entries in counted)
+
+    def test_overlap_sizes_precomputed(self, index):
+        """Test that each name's token and trigram counts are stored at build time"""
+        from name_index import name_trigrams
+        pos = 1237
+        assert index.token_counts[pos] == len(set(index.names[pos].split()))
+        assert index.trigram_counts[pos] == len(name_trigrams(index.names[pos]))
+
+
+class TestNameIndexLifecycle:
+    """Test that the name index follows catalog changes"""
+
+    def test_rebuilt_after_delta(self, tmp_path, jeans_factory):
+        """Test that upserted factories become resolvable"""
+        path = tmp_path / "factories.json"
+        path.write_text(json.dumps([f.to_dict() for f in load_factories()]))
+        try:
+            assert resolve_factory_name("Denim Masters Ltd", path=path)[0] is None
+            get_catalog(path).apply_delta([{"op": "upsert", "factory": jeans_factory}])
+            assert resolve_factory_name("Denim Masters Ltd", path=path)[0].id == "JEANS001"
+        finally:
+            invalidate_catalog_cache(path)
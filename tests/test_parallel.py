@@ -0,0 +1,49 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import pytest
+from catalog import get_catalog
+from factories import recommend_factories
+from parallel import get_sharded_scorer, shutdown_pools
+
+
+@pytest.fixture(autouse=True)
+def _shutdown():
+    yield
+    shutdown_pools()
+
+
+class TestShardedScoring:
+    """Test process-pool sharded recommendations"""
+
+    @pytest.mark.parametrize("shards,workers", [(1, 1), (3, 2), (7, 2)])
+    def test_matches_single_process(self, jeans_requirements, sample_requirements, shards, workers):
+        """Test that merged shard results equal single-process results"""
+        for req in (jeans_requirements, sample_requirements):
+            expected = recommend_factories(req, top_n=5)
+            assert recommend_factories(req, top_n=5, shards=shards, workers=workers) == expected
+
+    def test_pool_reused_across_calls(self, jeans_requirements):
+        """Test that the pool is built once per configuration"""
+        first = get_sharded_scorer(get_catalog(), shards=2, workers=1)
+        second = get_sharded_scorer(get_catalog(), shards=2, workers=1)
+        assert first is second
+
+    def test_more_shards_than_factories(self, jeans_requirements):
+        """Test that shard count is capped at the catalog size"""
+        scorer = get_sharded_scorer(get_catalog(), shards=10_000, workers=1)
+        assert scorer.shards == len(get_catalog())
+        assert scorer.recommend(jeans_requirements, top_n=3) == recommend_factories(jeans_requirements, top_n=3)
+
+    def test_workers_own_disjoint_shards(self):
+        """Test that each worker is handed only the shards it owns"""
+        scorer = get_sharded_scorer(get_catalog(), shards=5, workers=2)
+        assert len(scorer._pools) == 2
+        owned = [pool.submit(_owned_shards).result() for pool in scorer._pools]
+        assert owned == [[0, 2, 4], [1, 3]]
+
+
+def _owned_shards():
+    import parallel
+    return sorted(parallel._worker_shards)
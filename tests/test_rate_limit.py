@@ -0,0 +1,206 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import asyncio
+from types import SimpleNamespace
+import pytest
+from openai import APIConnectionError, BadRequestError, RateLimitError
+from rate_limit import (
+    CONNECTION_ATTEMPTS, AdaptiveConcurrency, RateLimiter, TokenBucket, estimate_tokens, is_retryable, retry_after,
+)
+
+# The errors only read these attributes, whichever HTTP library the SDK version uses
+_REQUEST = SimpleNamespace(method="POST", url="https://api.openai.com/v1/chat/completions")
+
+
+def _status_error(cls, status, headers=None, code=None):
+    response = SimpleNamespace(status_code=status, headers=headers or {}, request=_REQUEST)
+    body = {"code": code} if code else None
+    return cls(f"HTTP {status}", response=response, body=body)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FlakyCreate:
+    """Raises the given errors in turn, then answers."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self, **params):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return SimpleNamespace(usage=SimpleNamespace(total_tokens=100))
+
+
+@pytest.fixture
+def sleeps():
+    return []
+
+
+@pytest.fixture
+def limiter(sleeps):
+    return RateLimiter(rpm=600, tpm=60_000, clock=Clock(), sleep=sleeps.append)
+
+
+class TestTokenBucket:
+    """Test the per-minute token bucket"""
+
+    def test_burst_then_wait(self):
+        """Test that a full bucket serves a minute's worth at once, then paces at the refill rate"""
+        clock = Clock()
+        bucket = TokenBucket(60, clock=clock)
+        assert bucket.reserve(60) == 0
+        assert bucket.reserve(1) == pytest.approx(1.0)
+        assert bucket.reserve(1) == pytest.approx(2.0)
+
+        clock.now += 2
+        assert bucket.reserve(1) == pytest.approx(1.0)
+
+    def test_oversized_request_fits(self):
+        """Test that a request larger than the bucket waits for a full bucket instead of forever"""
+        bucket = TokenBucket(60, clock=Clock())
+        assert bucket.reserve(1000) == 0
+        assert bucket.reserve(1000) == pytest.approx(60.0)
+
+    def test_refund(self):
+        """Test that refunded tokens are available again"""
+        bucket = TokenBucket(60, clock=Clock())
+        bucket.reserve(60)
+        bucket.refund(30)
+        assert bucket.reserve(30) == 0
+
+
+class TestAdaptiveConcurrency:
+    """Test AIMD concurrency control"""
+
+    def test_additive_increase_multiplicative_decrease(self):
+        """Test that successes grow the cap slowly and a throttle halves it"""
+        gate = AdaptiveConcurrency(initial=8)
+        for _ in range(8):
+            gate.on_success()
+        assert 8.9 < gate.limit < 9.0
+
+        gate.on_throttle(gate.acquire())
+        assert 4.4 < gate.limit < 4.5
+
+    def test_throttle_burst_counts_once(self):
+        """Test that 429s from requests already in flight only decrease the cap once"""
+        gate = AdaptiveConcurrency(initial=16)
+        tickets = [gate.acquire() for _ in range(5)]
+        for ticket in tickets:
+            gate.on_throttle(ticket)
+        assert gate.limit == 8
+        # A request admitted after the decrease is a fresh signal
+        gate.on_throttle(gate.acquire())
+        assert gate.limit == 4
+
+    def test_limit_bounds(self):
+        """Test that the cap stays within [minimum, maximum]"""
+        gate = AdaptiveConcurrency(initial=2, minimum=1, maximum=3)
+        for _ in range(10):
+            gate.on_throttle(gate._generation)
+        assert gate.limit == 1
+        for _ in range(100):
+            gate.on_success()
+        assert gate.limit == 3
+
+    def test_async_waiter_woken_by_release(self):
+        """Test that a coroutine waiting for a slot proceeds once one is released"""
+        gate = AdaptiveConcurrency(initial=1)
+
+        async def scenario():
+            await gate.aacquire()
+            waiter = asyncio.create_task(gate.aacquire())
+            await asyncio.sleep(0.01)
+            assert not waiter.done()
+            gate.release()
+            await asyncio.wait_for(waiter, 1)
+            return gate.in_flight
+
+        assert asyncio.run(scenario()) == 1
+
+
+class TestRetryPolicy:
+    """Test which errors are retried and how long to wait"""
+
+    def test_retry_after_headers(self):
+        """Test that retry-after-ms and retry-after are both honoured"""
+        assert retry_after(_status_error(RateLimitError, 429, {"retry-after-ms": "1500"})) == 1.5
+        assert retry_after(_status_error(RateLimitError, 429, {"retry-after": "3"})) == 3.0
+        assert retry_after(_status_error(RateLimitError, 429)) is None
+        assert retry_after(ValueError()) is None
+
+    def test_retryable_errors(self):
+        """Test that rate limits and connection errors retry but bad requests and exhausted quota do not"""
+        assert is_retryable(_status_error(RateLimitError, 429))
+        assert is_retryable(APIConnectionError(request=_REQUEST))
+        assert not is_retryable(_status_error(BadRequestError, 400))
+        assert not is_retryable(_status_error(RateLimitError, 429, code="insufficient_quota"))
+
+    def test_estimate_tokens(self):
+        """Test that the estimate covers the prompt and the completion budget"""
+        params = {"messages": [{"role": "user", "content": "x" * 400}], "max_tokens": 50}
+        assert estimate_tokens(params) == 150
+
+
+class TestRateLimiter:
+    """Test limited, retried calls"""
+
+    def test_retries_429_after_retry_after(self, limiter, sleeps):
+        """Test that a 429 is retried after at least the server's Retry-After and shrinks concurrency"""
+        create = FlakyCreate(_status_error(RateLimitError, 429, {"retry-after": "2"}))
+        before = limiter.concurrency.limit
+
+        limiter.call(create, messages=[])
+
+        assert create.calls == 2
+        assert len(sleeps) == 1 and sleeps[0] >= 2
+        assert limiter.stats()["throttled"] == 1
+        assert limiter.concurrency.limit < before
+        assert limiter.concurrency.in_flight == 0
+
+    def test_bad_request_not_retried(self, limiter):
+        """Test that a 400 surfaces immediately"""
+        create = FlakyCreate(_status_error(BadRequestError, 400))
+        with pytest.raises(BadRequestError):
+            limiter.call(create, messages=[])
+        assert create.calls == 1
+
+    def test_connection_errors_give_up(self, limiter):
+        """Test that connection failures stop after CONNECTION_ATTEMPTS"""
+        create = FlakyCreate(*[APIConnectionError(request=_REQUEST)] * 10)
+        with pytest.raises(APIConnectionError):
+            limiter.call(create, messages=[])
+        assert create.calls == CONNECTION_ATTEMPTS
+
+    def test_requests_paced_by_quota(self, sleeps):
+        """Test that requests beyond the per-minute quota wait for the bucket"""
+        limiter = RateLimiter(rpm=60, tpm=1_000_000, clock=Clock(), sleep=sleeps.append)
+        for _ in range(61):
+            limiter.call(FlakyCreate(), messages=[])
+        assert sleeps == [pytest.approx(1.0)]
+
+    def test_async_call_retries(self, sleeps):
+        """Test that acall retries like call"""
+        async def asleep(seconds):
+            sleeps.append(seconds)
+
+        limiter = RateLimiter(clock=Clock(), asleep=asleep)
+        flaky = FlakyCreate(_status_error(RateLimitError, 429, {"retry-after-ms": "10"}))
+
+        async def create(**params):
+            return flaky(**params)
+
+        asyncio.run(limiter.acall(create, messages=[]))
+        assert flaky.calls == 2
+        assert sleeps and sleeps[0] >= 0.01
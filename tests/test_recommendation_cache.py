@@ -0,0 +1,111 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import json
+import time
+import pytest
+from catalog import get_catalog, invalidate_catalog_cache
+from factories import recommend_factories, load_factories
+from model.requirements import ManufacturingRequirements
+from recommendation_cache import RecommendationCache, requirements_key
+
+
+@pytest.fixture
+def cache():
+    return RecommendationCache(maxsize=16, ttl=60)
+
+
+class TestRequirementsKey:
+    """Test canonical requirement hashing"""
+
+    def test_near_identical_requests_share_key(self):
+        """Test that list order, duplicates and geography/certification case do not change the key"""
+        a = ManufacturingRequirements(product_type="jeans", materials=["denim", "cotton"], moq=2000,
+                                      geography="Bangladesh", certifications=["ISO9001"], budget_tier="low")
+        b = ManufacturingRequirements(product_type="jeans", materials=["cotton", "denim", "denim"], moq=2000,
+                                      geography=" bangladesh ", certifications=["iso9001"], budget_tier="low")
+        assert requirements_key(a) == requirements_key(b)
+
+    def test_case_sensitive_fields_keep_case(self, jeans_requirements):
+        """Test that case differences scoring does not ignore change the key"""
+        for field, value in (("product_type", "Jeans"), ("materials", ["Denim"]), ("budget_tier", "LOW")):
+            other = jeans_requirements.model_copy(update={field: value})
+            assert requirements_key(other) != requirements_key(jeans_requirements), field
+
+    def test_description_keyed_only_when_scored(self, jeans_requirements):
+        """Test that product_description is part of the key only with use_description"""
+        other = jeans_requirements.model_copy(update={"product_description": "winter jackets"})
+        assert requirements_key(other) == requirements_key(jeans_requirements)
+        assert requirements_key(other, use_description=True) != requirements_key(jeans_requirements, use_description=True)
+
+    def test_different_requests_differ(self, jeans_requirements):
+        """Test that scoring-relevant changes change the key"""
+        other = jeans_requirements.model_copy(update={"moq": 2501})
+        assert requirements_key(other) != requirements_key(jeans_requirements)
+
+
+class TestRecommendationCache:
+    """Test the LRU + TTL recommendation cache"""
+
+    def test_hit_after_miss(self, cache, jeans_requirements):
+        """Test that a repeated request is served from cache"""
+        first = cache.recommend(jeans_requirements)
+        second = cache.recommend(jeans_requirements)
+
+        assert first == second == recommend_factories(jeans_requirements)
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"]) == (1, 1)
+        assert stats["hit_rate"] == 0.5
+
+    def test_results_are_copies(self, cache, jeans_requirements):
+        """Test that mutating returned results does not corrupt the cache"""
+        cache.recommend(jeans_requirements)[0]["reasons"].append("tampered")
+        assert "tampered" not in cache.recommend(jeans_requirements)[0]["reasons"]
+
+    def test_ttl_expiry(self, jeans_requirements):
+        """Test that entries expire after the TTL"""
+        cache = RecommendationCache(maxsize=16, ttl=0.05)
+        cache.recommend(jeans_requirements)
+        time.sleep(0.1)
+        cache.recommend(jeans_requirements)
+        assert cache.stats()["misses"] == 2
+
+    def test_catalog_change_invalidates(self, cache, tmp_path, jeans_requirements):
+        """Test that a new catalog version is never served stale results"""
+        path = tmp_path / "factories.json"
+        path.write_text(json.dumps([f.to_dict() for f in load_factories()]))
+        try:
+            best = cache.recommend(jeans_requirements, path=path)[0]["factory"].id
+            get_catalog(path).apply_delta([{"op": "delete", "id": best}])
+            after = cache.recommend(jeans_requirements, path=path)
+
+            assert best not in [r["factory"].id for r in after]
+            assert cache.stats()["misses"] == 2
+        finally:
+            invalidate_catalog_cache(path)
+
+    def test_catalog_change_keeps_other_paths(self, cache, tmp_path, jeans_requirements):
+        """Test that a new version of one catalog only evicts that catalog's entries"""
+        changed, other = tmp_path / "changed.json", tmp_path / "other.json"
+        records = json.dumps([f.to_dict() for f in load_factories()])
+        changed.write_text(records)
+        other.write_text(records)
+        try:
+            cache.recommend(jeans_requirements, path=changed)
+            cache.recommend(jeans_requirements, path=other)
+            get_catalog(changed).apply_delta([{"op": "delete", "id": "A001"}])
+            cache.recommend(jeans_requirements, path=changed)
+
+            assert cache.stats()["entries"] == 2
+            cache.recommend(jeans_requirements, path=other)
+            assert cache.stats()["hits"] == 1
+        finally:
+            invalidate_catalog_cache(changed)
+            invalidate_catalog_cache(other)
+
+    def test_mixed_case_matches_uncached(self, cache, jeans_requirements):
+        """Test that cached results equal recommend_factories for mixed-case requirements"""
+        for update in ({"product_type": "Jeans"}, {"materials": ["Denim"]}, {"geography": "BANGLADESH"}):
+            req = jeans_requirements.model_copy(update=update)
+            assert cache.recommend(req, top_n=5) == recommend_factories(req, top_n=5)
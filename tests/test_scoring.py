@@ -301,3 +301,154 @@ class TestFactoryDataLoading:
             assert isinstance(factory["geography"], str)
             assert isinstance(factory["certifications"], list)
             assert isinstance(factory["cost_tier"], str)
+
+
+class TestTopNSelection:
+    """Test bounded top-N selection and early exit"""
+
+    REQUESTS = [
+        dict(product_type="jeans", materials=["denim"], moq=2000, geography="Bangladesh", budget_tier="low"),
+        dict(product_type="fashion", materials=["cotton", "silk"], moq=300, geography="Europe", budget_tier="high"),
+        dict(product_type="jackets", materials=["wool"], moq=50000),
+        dict(product_type="apparel", materials=[], moq=100, geography="india"),
+    ]
+
+    def _reference(self, req, top_n):
+        scored = []
+        for f in load_factories():
+            score, reasons = score_factory(f, req)
+            if score > 0:
+                scored.append({"factory": f, "score": score, "reasons": reasons})
+        scored.sort(key=lambda r: (-r["score"], r["factory"]["id"]))
+        return scored[:top_n]
+
+    @pytest.mark.parametrize("top_n", [1, 3, 10, 100])
+    def test_matches_full_sort(self, top_n):
+        """Test that heap selection equals a full sort with (score, id) ordering"""
+        for fields in self.REQUESTS:
+            req = ManufacturingRequirements(**fields)
+            assert recommend_factories(req, top_n=top_n) == self._reference(req, top_n)
+
+    def test_ties_broken_by_factory_id(self):
+        """Test that equal scores are ordered by ascending factory id"""
+        req = ManufacturingRequirements(product_type="apparel", materials=[], moq=100000)
+        results = recommend_factories(req, top_n=10)
+
+        keys = [(-r["score"], r["factory"]["id"]) for r in results]
+        assert keys == sorted(keys)
+
+    def test_early_exit_skips_scoring(self, monkeypatch):
+        """Test that candidates whose upper bound cannot win are never scored"""
+        import factories
+        calls = []
+        original = factories.score_components
+
+        def counting_score(factory, req):
+            calls.append(factory["id"])
+            return original(factory, req)
+
+        monkeypatch.setattr(factories, "score_components", counting_score)
+        req = ManufacturingRequirements(
+            product_type="jeans", materials=["denim"], moq=5000,
+            geography="Bangladesh", budget_tier="low"
+        )
+        results = factories.recommend_factories(req, top_n=3)
+
+        assert len(results) == 3
+        assert len(calls) < len(load_factories())
+
+    def test_zero_top_n(self, sample_requirements):
+        """Test that top_n=0 returns no results"""
+        assert recommend_factories(sample_requirements, top_n=0) == []
+
+
+class TestLazyReasons:
+    """Test numeric scoring with reasons rendered only for winners"""
+
+    def test_components_match_score_factory(self, sample_factory, jeans_factory, sample_requirements, jeans_requirements):
+        """Test that score_components + render_reasons reproduce score_factory"""
+        from factories import score_components, render_reasons
+        for factory in (sample_factory, jeans_factory):
+            for req in (sample_requirements, jeans_requirements):
+                score, mask = score_components(factory, req)
+                assert (score, render_reasons(factory, req, mask)) == score_factory(factory, req)
+
+    def test_negotiable_moq_mask(self):
+        """Test that the negotiable-MOQ component is distinct from a full MOQ match"""
+        from factories import score_components, MOQ_MATCH, MOQ_NEGOTIABLE
+        factory = {"product_types": [], "materials": [], "moq_min": 1000,
+                   "geography": "China", "certifications": [], "cost_tier": "low"}
+        req = ManufacturingRequirements(product_type="x", moq=600)
+        score, mask = score_components(factory, req)
+        assert score == 1
+        assert mask & MOQ_NEGOTIABLE and not mask & MOQ_MATCH
+
+    @pytest.mark.parametrize("backend", ["indexed", "vectorized"])
+    def test_reasons_rendered_only_for_results(self, monkeypatch, backend):
+        """Test that reason strings are built only for the returned factories"""
+        import factories
+        rendered = []
+        original = factories.render_reasons
+        monkeypatch.setattr(factories, "render_reasons",
+                            lambda f, req, mask: rendered.append(f.id) or original(f, req, mask))
+
+        req = ManufacturingRequirements(product_type="apparel", materials=["cotton"], moq=5000)
+        results = factories.recommend_factories(req, top_n=3, backend=backend)
+        assert rendered == [r["factory"].id for r in results]
+
+
+class TestHardConstraints:
+    """Test mandatory geography, certification and MOQ constraints"""
+
+    REQUEST = dict(product_type="jeans", materials=["denim"], moq=2500, geography="Asia",
+                   certifications=["ISO9001"], budget_tier="low")
+
+    def _reference(self, req, top_n, constraints):
+        from factories import covers_certifications
+        from geography import geography_matches
+        allowed = [
+            f for f in load_factories()
+            if ("moq" not in constraints or f.moq_min <= req.moq)
+            and ("geography" not in constraints or geography_matches(req.geography, f.geography))
+            and ("certifications" not in constraints or covers_certifications(f, req))
+        ]
+        scored = [(score_factory(f, req)[0], f.id) for f in allowed]
+        return sorted((s for s in scored if s[0] > 0), key=lambda s: (-s[0], s[1]))[:top_n]
+
+    @pytest.mark.parametrize("constraints", [{"moq"}, {"geography"}, {"certifications"},
+                                             {"geography", "certifications", "moq"}])
+    @pytest.mark.parametrize("top_n", [1, 3, 50])
+    def test_matches_filtered_full_sort(self, constraints, top_n):
+        """Test that constrained results equal filtering then ranking every factory"""
+        req = ManufacturingRequirements(**self.REQUEST)
+        results = recommend_factories(req, top_n=top_n, constraints=constraints)
+        assert [(r["score"], r["factory"].id) for r in results] == self._reference(req, top_n, constraints)
+
+    def test_geography_is_mandatory(self):
+        """Test that out-of-region factories are excluded rather than down-ranked"""
+        req = ManufacturingRequirements(**dict(self.REQUEST, geography="Europe"))
+        results = recommend_factories(req, top_n=10, constraints={"geography"})
+        assert results
+        assert all(r["factory"].geography in ("Europe", "Portugal", "Italy", "Spain", "France", "Germany",
+                                              "Poland", "Romania", "Bulgaria", "United Kingdom")
+                   for r in results)
+
+    def test_empty_intersection_short_circuits(self, monkeypatch):
+        """Test that no factory is scored when the constraints leave no survivors"""
+        import factories
+        monkeypatch.setattr(factories, "score_components", lambda f, req: pytest.fail("scored"))
+        req = ManufacturingRequirements(**dict(self.REQUEST, certifications=["NO-SUCH-CERT"]))
+        assert factories.recommend_factories(req, constraints={"certifications"}) == []
+
+    def test_unconstrained_fields_ignored(self):
+        """Test that a constraint on a field the request leaves empty filters nothing"""
+        req = ManufacturingRequirements(**dict(self.REQUEST, geography=None, certifications=[]))
+        assert recommend_factories(req, constraints={"geography", "certifications"}) == recommend_factories(req)
+
+    def test_invalid_constraints(self):
+        """Test unknown constraint names and unsupported backends"""
+        req = ManufacturingRequirements(**self.REQUEST)
+        with pytest.raises(ValueError):
+            recommend_factories(req, constraints={"budget"})
+        with pytest.raises(ValueError):
+            recommend_factories(req, backend="vectorized", constraints={"moq"})
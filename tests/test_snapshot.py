@@ -0,0 +1,81 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import pytest
+import numpy as np
+from catalog import get_catalog, invalidate_catalog_cache
+from factories import load_factories, recommend_factories, recommend_factories_batch
+from snapshot import compile_snapshot, load_snapshot
+
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    """Compile the shipped catalog into a temporary snapshot"""
+    path = compile_snapshot(out_path=tmp_path / "factories.snap")
+    yield path
+    invalidate_catalog_cache(path)
+
+
+class TestSnapshot:
+    """Test compiled, memory-mapped catalog snapshots"""
+
+    def test_records_round_trip(self, snapshot_path):
+        """Test that every factory record survives compilation unchanged"""
+        snapshot = load_snapshot(snapshot_path)
+        assert list(snapshot.factories) == load_factories()
+        assert snapshot.factories[-1] == load_factories()[-1]
+
+    def test_columns_are_zero_copy_views(self, snapshot_path):
+        """Test that columns are read-only views over the mapped file"""
+        columns = load_snapshot(snapshot_path).columns
+        assert not columns.moq_min.flags.writeable
+        assert not columns.moq_min.flags.owndata
+
+    def test_scores_match_json_catalog(self, snapshot_path, jeans_requirements, sample_requirements):
+        """Test that snapshot columns score like the JSON catalog"""
+        snapshot = load_snapshot(snapshot_path)
+        for req in (jeans_requirements, sample_requirements):
+            expected = get_catalog().columns.score(req)
+            assert np.array_equal(snapshot.columns.score(req), expected)
+
+    def test_prebuilt_candidates_match(self, snapshot_path, jeans_requirements, minimal_requirements):
+        """Test that prebuilt posting lists produce the same candidates"""
+        snapshot = load_snapshot(snapshot_path)
+        for req in (jeans_requirements, minimal_requirements):
+            assert snapshot.candidates(req) == get_catalog().candidates(req)
+
+    @pytest.mark.parametrize("backend", ["indexed", "vectorized"])
+    def test_recommend_from_snapshot_path(self, snapshot_path, jeans_requirements, backend):
+        """Test recommend_factories against a .snap path"""
+        results = recommend_factories(jeans_requirements, top_n=5, backend=backend, path=snapshot_path)
+        assert results == recommend_factories(jeans_requirements, top_n=5)
+
+    def test_constraints_on_snapshot(self, snapshot_path, jeans_requirements):
+        """Test hard constraints against a snapshot, whose certification index is built lazily"""
+        req = jeans_requirements.model_copy(update={"certifications": ["iso9001"]})
+        constraints = {"geography", "certifications", "moq"}
+        results = recommend_factories(req, top_n=10, path=snapshot_path, constraints=constraints)
+        assert results == recommend_factories(req, top_n=10, constraints=constraints)
+
+    def test_batch_from_snapshot_path(self, snapshot_path, jeans_requirements, sample_requirements):
+        """Test recommend_factories_batch against a .snap path"""
+        reqs = [jeans_requirements, sample_requirements]
+        assert recommend_factories_batch(reqs, path=snapshot_path) == recommend_factories_batch(reqs)
+
+    def test_rejects_non_snapshot(self, tmp_path):
+        """Test that arbitrary files are rejected"""
+        path = tmp_path / "bogus.snap"
+        path.write_bytes(b"not a snapshot at all")
+        with pytest.raises(ValueError):
+            load_snapshot(path)
+
+    def test_delta_rejected(self, snapshot_path, tmp_path):
+        """Test that deltas against a snapshot raise ReadOnlyCatalogError"""
+        from catalog import ReadOnlyCatalogError, apply_delta_file
+        delta = tmp_path / "delta.jsonl"
+        delta.write_text('{"op": "delete", "id": "A001"}\n')
+        with pytest.raises(ReadOnlyCatalogError):
+            load_snapshot(snapshot_path).apply_delta([{"op": "delete", "id": "A001"}])
+        with pytest.raises(ReadOnlyCatalogError, match="JSON catalog"):
+            apply_delta_file(delta, snapshot_path)
@@ -0,0 +1,83 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import pytest
+from catalog import invalidate_catalog_cache
+from factories import load_factories, recommend_factories
+from model.requirements import ManufacturingRequirements
+from sqlite_store import build_sqlite_catalog, SqliteCatalog
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    """Build a SQLite store from the shipped catalog"""
+    path = build_sqlite_catalog(out_path=tmp_path / "factories.sqlite")
+    yield path
+    invalidate_catalog_cache(path)
+
+
+REQUESTS = [
+    dict(product_type="jeans", materials=["denim"], moq=2000, geography="Bangladesh", budget_tier="low"),
+    dict(product_type="fashion", materials=["cotton", "silk"], moq=300, geography="Asia", budget_tier="high"),
+    dict(product_type="jackets", materials=["wool"], moq=50000),
+    dict(product_type="toys", materials=[], moq=100),
+    dict(product_type="apparel", materials=[], moq=0, geography="india"),
+]
+
+
+class TestSqliteStore:
+    """Test the SQLite catalog backend"""
+
+    def test_load_factories(self, store_path):
+        """Test that load_factories reads every record back from the store"""
+        assert load_factories(store_path) == load_factories()
+
+    @pytest.mark.parametrize("fields", REQUESTS)
+    @pytest.mark.parametrize("top_n", [1, 3, 10])
+    def test_recommend_matches_memory(self, store_path, fields, top_n):
+        """Test that SQL pushdown returns the same recommendations"""
+        req = ManufacturingRequirements(**fields)
+        assert recommend_factories(req, top_n=top_n, path=store_path) == recommend_factories(req, top_n=top_n)
+
+    def test_scores_only_candidates(self, store_path, monkeypatch):
+        """Test that selective queries only score a small candidate set"""
+        import sqlite_store
+        calls = []
+        original = sqlite_store.score_components
+        monkeypatch.setattr(sqlite_store, "score_components", lambda f, req: calls.append(f.id) or original(f, req))
+
+        req = ManufacturingRequirements(**REQUESTS[0])
+        SqliteCatalog(store_path).recommend(req, top_n=3)
+        assert 0 < len(calls) < len(load_factories())
+
+    def test_candidates_read_lazily(self, store_path):
+        """Test that indexed candidates stream from a cursor and MOQ-only ones exclude them in SQL"""
+        catalog = SqliteCatalog(store_path)
+        req = ManufacturingRequirements(**REQUESTS[0])
+        bounds = catalog.indexed_bounds(req)
+        first = next(bounds)
+        assert first[0] == max(bound for bound, _, _ in [first, *bounds])
+
+        matched = {pos for _, pos, _ in catalog.indexed_bounds(req)}
+        moq_fits = {pos for pos, f in enumerate(load_factories()) if f.moq_min <= 2 * req.moq}
+        moq_only = catalog.moq_only(req, limit=len(load_factories()))
+        assert moq_only
+        assert {pos for pos, _ in moq_only} == moq_fits - matched
+
+    def test_store_is_read_only(self, store_path):
+        """Test that the catalog opens the store read-only"""
+        import sqlite3
+        catalog = SqliteCatalog(store_path)
+        with pytest.raises(sqlite3.OperationalError):
+            catalog._conn().execute("DELETE FROM factories")
+
+    def test_delta_rejected(self, store_path, tmp_path):
+        """Test that deltas against a SQLite store raise ReadOnlyCatalogError"""
+        from catalog import ReadOnlyCatalogError, apply_delta_file
+        delta = tmp_path / "delta.jsonl"
+        delta.write_text('{"op": "delete", "id": "A001"}\n')
+        with pytest.raises(ReadOnlyCatalogError):
+            SqliteCatalog(store_path).apply_delta([{"op": "delete", "id": "A001"}])
+        with pytest.raises(ReadOnlyCatalogError, match="JSON catalog"):
+            apply_delta_file(delta, store_path)
@@ -0,0 +1,53 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+from synthetic import generate_catalog, generate_requirements, write_catalog
+from catalog import get_catalog, invalidate_catalog_cache
+from factories import load_factories, recommend_factories
+from model.factory import FIELDS
+
+
+class TestSyntheticCatalog:
+    """Test the seeded synthetic catalog generator"""
+
+    def test_seeded_and_deterministic(self):
+        """Test that the same seed reproduces the same catalog"""
+        assert generate_catalog(200, seed=7) == generate_catalog(200, seed=7)
+        assert generate_catalog(200, seed=7) != generate_catalog(200, seed=8)
+
+    def test_follows_schema_and_vocabulary(self):
+        """Test that records use the mock catalog's fields and vocabulary"""
+        base = load_factories()
+        vocab = {field: {v for f in base for v in f[field]} for field in ("product_types", "materials", "certifications")}
+        records = generate_catalog(500)
+
+        assert len({r["id"] for r in records}) == 500
+        for r in records:
+            assert tuple(r) == FIELDS
+            assert isinstance(r["moq_min"], int)
+            for field, values in vocab.items():
+                assert r[field] and set(r[field]) <= values
+                assert len(set(r[field])) == len(r[field])
+
+    def test_catalog_is_recommendable(self, tmp_path):
+        """Test that generated requirements find factories in a generated catalog"""
+        path = write_catalog(tmp_path / "synthetic.json", 1000)
+        try:
+            for req in generate_requirements(5):
+                assert recommend_factories(req, path=path)
+            assert len(get_catalog(path)) == 1000
+        finally:
+            invalidate_catalog_cache(path)
+
+    def test_indexed_matches_vectorized(self, tmp_path):
+        """Test that bucketed candidate ranking returns the vectorized results, past the first bucket too"""
+        path = write_catalog(tmp_path / "synthetic.json", 2000)
+        try:
+            for req in generate_requirements(10):
+                for top_n in (3, 200):
+                    expected = recommend_factories(req, top_n=top_n, path=path, backend="vectorized")
+                    assert recommend_factories(req, top_n=top_n, path=path) == expected
+        finally:
+            invalidate_catalog_cache(path)
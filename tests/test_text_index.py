@@ -0,0 +1,108 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import numpy as np
+import pytest
+from catalog import get_catalog
+from factories import (
+    recommend_factories,
+    recommend_factories_batch,
+    load_factories,
+    score_components,
+    DESCRIPTION_WEIGHT,
+)
+from model.factory import Factory
+from model.requirements import ManufacturingRequirements
+from text_index import DescriptionIndex, text_terms
+
+
+def _names(index, text):
+    factories = load_factories()
+    return {factories[pos].name for pos in index.matches(text)}
+
+
+class TestDescriptionIndex:
+    """Test the TF-IDF description index"""
+
+    @pytest.fixture
+    def index(self):
+        return get_catalog().description_index
+
+    def test_related_descriptions_match(self, index):
+        """Test that descriptions match factories making those products"""
+        factories = load_factories()
+        jackets = {f.name for f in factories if "jackets" in f.product_types}
+        assert jackets <= _names(index, "winter jackets")
+        assert "Dhaka Denim Works" in _names(index, "denim jeans")
+
+    def test_unrelated_descriptions_do_not_match(self, index):
+        """Test that shared trigrams alone ("organizers" / "organic") are not a match"""
+        assert _names(index, "kitchen organizers") == set()
+        assert _names(index, "phone cases") == set()
+        assert _names(index, "") == set()
+
+    def test_similarity_is_cosine(self, index):
+        """Test that an exact product-type query scores highest for that type"""
+        similarity = index.similarity("jeans")
+        assert similarity.shape == (len(load_factories()),)
+        assert np.all((similarity >= 0) & (similarity <= 1 + 1e-6))
+        best = load_factories()[int(similarity.argmax())]
+        assert "jeans" in best.product_types
+
+    def test_plurals_and_numbers(self):
+        """Test plural folding and that bare numbers are ignored"""
+        assert dict(text_terms("Jackets"))["jacket"] == 1
+        assert dict(text_terms("dresses"))["dress"] == 1
+        assert text_terms("500 units") == text_terms("units")
+
+    def test_duplicate_terms_are_merged(self, sample_factory):
+        """Test that a term from both materials and name is one normalised matrix entry"""
+        factory = Factory.from_dict(dict(sample_factory, name="Metal Works", materials=["metal"]))
+        index = DescriptionIndex([factory])
+        cols = np.repeat(np.arange(len(index.vocab)), np.diff(index.col_ptr))
+        assert len(set(zip(cols.tolist(), index.rows.tolist()))) == len(index.data)
+        assert np.isclose(np.sum(index.data.astype(np.float64) ** 2), 1.0)
+
+
+class TestDescriptionScoring:
+    """Test opt-in description scoring in recommend_factories"""
+
+    REQUEST = dict(product_type="apparel", product_description="winter jackets", materials=["wool"], moq=800)
+
+    def _reference(self, req, top_n):
+        matched = set(get_catalog().description_index.matches(req.product_description).tolist())
+        scored = []
+        for pos, f in enumerate(load_factories()):
+            score = score_components(f, req)[0] + (DESCRIPTION_WEIGHT if pos in matched else 0)
+            if score > 0:
+                scored.append((score, f.id))
+        return sorted(scored, key=lambda s: (-s[0], s[1]))[:top_n]
+
+    @pytest.mark.parametrize("backend", ["indexed", "vectorized"])
+    def test_matches_full_scan(self, backend):
+        """Test that description scores agree with a full scan on every backend"""
+        req = ManufacturingRequirements(**self.REQUEST)
+        results = recommend_factories(req, top_n=10, backend=backend, use_description=True)
+        assert [(r["score"], r["factory"].id) for r in results] == self._reference(req, 10)
+        assert "Makes products similar to winter jackets" in results[0]["reasons"]
+
+    def test_batch(self):
+        """Test that batch recommendations score descriptions the same way"""
+        req = ManufacturingRequirements(**self.REQUEST)
+        batch = recommend_factories_batch([req], top_n=10, use_description=True)
+        assert batch[0] == recommend_factories(req, top_n=10, use_description=True)
+
+    def test_off_by_default(self):
+        """Test that descriptions do not change scores unless requested"""
+        req = ManufacturingRequirements(**self.REQUEST)
+        plain = recommend_factories(req, top_n=10)
+        assert plain == recommend_factories(req.model_copy(update={"product_description": None}), top_n=10)
+        assert all("Makes products similar" not in reason for r in plain for reason in r["reasons"])
+
+    def test_with_constraints(self):
+        """Test description scoring combined with hard constraints"""
+        req = ManufacturingRequirements(**dict(self.REQUEST, geography="Europe"))
+        results = recommend_factories(req, top_n=5, use_description=True, constraints={"geography"})
+        assert results
+        assert all(r["score"] > 0 for r in results)